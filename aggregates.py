@@ -0,0 +1,80 @@
+import math
+from typing import Dict, Iterable
+
+class StockTotals:
+    """Running stock value and unit totals, overall and per product type.
+
+    Every mutation adjusts the totals by its delta, so reads are O(1). Totals
+    for a type are reset to exactly zero when its last product is removed,
+    which keeps floating-point drift from accumulating across add/remove cycles.
+    """
+
+    def __init__(self):
+        self.total_value = 0.0
+        self.total_units = 0
+        self.product_count = 0
+        self._by_type: Dict[str, Dict[str, float]] = {}
+
+    def add(self, product) -> None:
+        """Account for a product entering the inventory."""
+        bucket = self._by_type.setdefault(
+            product.product_type, {'value': 0.0, 'units': 0, 'products': 0})
+        value = product.get_total_value()
+        bucket['value'] += value
+        bucket['units'] += product.quantity_in_stock
+        bucket['products'] += 1
+        self.total_value += value
+        self.total_units += product.quantity_in_stock
+        self.product_count += 1
+
+    def remove(self, product) -> None:
+        """Account for a product leaving the inventory."""
+        type_name = product.product_type
+        bucket = self._by_type[type_name]
+        value = product.get_total_value()
+        bucket['value'] -= value
+        bucket['units'] -= product.quantity_in_stock
+        bucket['products'] -= 1
+        if not bucket['products']:
+            del self._by_type[type_name]
+        self.total_value -= value
+        self.total_units -= product.quantity_in_stock
+        self.product_count -= 1
+        if not self.product_count:
+            self.total_value = 0.0
+
+    def adjust(self, product, quantity_delta: int) -> None:
+        """Account for a change in a product's stock level."""
+        bucket = self._by_type[product.product_type]
+        value_delta = product.price * quantity_delta
+        bucket['value'] += value_delta
+        bucket['units'] += quantity_delta
+        self.total_value += value_delta
+        self.total_units += quantity_delta
+
+    def adjust_price(self, product, old_price: float) -> None:
+        """Account for a change in a product's price."""
+        value_delta = (product.price - old_price) * product.quantity_in_stock
+        self._by_type[product.product_type]['value'] += value_delta
+        self.total_value += value_delta
+
+    def by_type(self) -> Dict[str, Dict[str, float]]:
+        """Return a copy of the per-type breakdown keyed by type name."""
+        return {type_name: dict(bucket) for type_name, bucket in self._by_type.items()}
+
+    def matches(self, products: Iterable) -> bool:
+        """Recompute the totals from scratch and report whether they agree."""
+        fresh = StockTotals()
+        for product in products:
+            fresh.add(product)
+        if (fresh.total_units != self.total_units or fresh.product_count != self.product_count
+                or not math.isclose(fresh.total_value, self.total_value, rel_tol=1e-9, abs_tol=1e-6)):
+            return False
+        if fresh._by_type.keys() != self._by_type.keys():
+            return False
+        for type_name, bucket in fresh._by_type.items():
+            mine = self._by_type[type_name]
+            if (bucket['units'] != mine['units'] or bucket['products'] != mine['products']
+                    or not math.isclose(bucket['value'], mine['value'], rel_tol=1e-9, abs_tol=1e-6)):
+                return False
+        return True
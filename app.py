@@ -1,166 +1,377 @@
 import streamlit as st
+import os
+import tempfile
+import threading
 import pandas as pd
 from datetime import datetime
+from shared_inventory import SharedInventory
+from sqlite_inventory import SQLiteInventory
+from journal import TransactionJournal
+from persistence import BackgroundWriter
+from utils import parse_transactions
+from bulk_io import import_products, export_products
+from metrics import REGISTRY, timed, profile, enable_from_environment
 from inventory import Inventory
-from utils import save_inventory_to_file, load_inventory_from_file
-from exceptions import ( InvalidProductDataError)
-from product import Electronics, Grocery, Clothing
+from query import Query
+from sales_ledger import SalesLedger
+from pricing import PriceRule, ExpiryMarkdown
+from pos_api import InventoryAPI, BackgroundServer
+from exceptions import ( InvalidProductDataError, JournalCorruptedError, JournalLockedError)
+from product import DEFAULT_REORDER_POINT
+from schema import Field, PRODUCT_TYPES, all_fields
 
-# Initialize session state
-if 'inventory' not in st.session_state:
-    st.session_state.inventory = Inventory()
+# Maximum number of rows shown for a name search
+SEARCH_RESULT_LIMIT = 200
+
+# Seconds of quiet before a burst of changes is written to inventory.json
+SAVE_DEBOUNCE_SECONDS = 2.0
+
+# Prometheus text-format dump written from the Diagnostics page
+METRICS_FILE = "inventory_metrics.prom"
+
+# Append-only log of sales and restocks behind the Analytics page
+LEDGER_FILE = "sales.ledger"
+
+# Set INVENTORY_API_PORT to also serve the POS terminal API from this process
+API_PORT = os.environ.get("INVENTORY_API_PORT")
+
+# Storage behind the app: 'memory' (journal plus inventory.json) or 'sqlite' (SQLITE_FILE)
+BACKEND = os.environ.get("INVENTORY_BACKEND", "memory")
+SQLITE_FILE = "inventory.db"
+
+def open_backend():
+    """Open the configured backend; returns (inventory, load error or None)."""
+    if BACKEND == "sqlite":
+        return SQLiteInventory(SQLITE_FILE), None
+    if BACKEND != "memory":
+        raise ValueError(f"Unknown INVENTORY_BACKEND {BACKEND!r}: use 'memory' or 'sqlite'")
+    inventory = SharedInventory()
+    journal = TransactionJournal("inventory.journal", "inventory.json")
     try:
-        load_inventory_from_file(st.session_state.inventory, "inventory.json")
-    except (FileNotFoundError, InvalidProductDataError) as e:
-        st.warning(f"Starting with empty inventory: {str(e)}")
+        # Writes a starting inventory.json on the first run
+        journal.recover(inventory)
+    except (InvalidProductDataError, JournalCorruptedError) as e:
+        # Leave the unreadable files alone; the writer reports every failed save
+        return inventory, str(e)
+    return inventory, None
+
+@st.cache_resource
+def load_shared_inventory():
+    """Load the inventory once per server process; every browser session shares it."""
+    inventory, error = open_backend()
+    # Attached after recovery so replayed journal records aren't counted as new sales
+    ledger = SalesLedger(LEDGER_FILE)
+    inventory.attach_ledger(ledger)
+    
+    def persist():
+        ledger.flush()
+        inventory.persist()
+    
+    writer = BackgroundWriter(persist, lambda: inventory.version, debounce=SAVE_DEBOUNCE_SECONDS)
+    inventory.set_background_writer(writer)
+    if API_PORT:
+        BackgroundServer(InventoryAPI(inventory), port=int(API_PORT))
+    return inventory, writer, ledger, error
+
+# Set INVENTORY_METRICS=1 to collect metrics from startup; the Diagnostics page toggles it too
+enable_from_environment([Inventory, SharedInventory, SQLiteInventory])
+
+try:
+    inventory, writer, ledger, load_error = load_shared_inventory()
+except JournalLockedError as e:
+    # Not cached, so a reload retries once the other process has stopped
+    st.error(f"{e}. Stop it (a standalone pos_api.py or a cli.py job) and reload this page.")
+    st.stop()
+if load_error and 'load_warning_shown' not in st.session_state:
+    st.session_state.load_warning_shown = True
+    st.warning(f"Starting with empty inventory: {load_error}")
 
 def save_inventory():
+    # Changes are journaled in the background; wait for the writer, then write a full snapshot
+    if not writer.flush(timeout=30):
+        st.error(f"Error saving inventory: {writer.last_error or 'timed out'}")
+        return
     try:
-        save_inventory_to_file(st.session_state.inventory, "inventory.json")
+        inventory.compact()
         st.success("Inventory saved successfully!")
     except Exception as e:
         st.error(f"Error saving inventory: {str(e)}")
 
+def persistence_status():
+    status = "saving..." if writer.pending else "saved"
+    st.sidebar.caption(f"Version {inventory.version}, last saved {writer.last_persisted_version} ({status})")
+    if writer.last_error:
+        st.sidebar.error(f"Background save failed: {writer.last_error}")
+
+def field_input(field: Field):
+    """Render the form widget for a schema field and return its value in serialized form."""
+    if field.kind == 'date':
+        return st.date_input(field.label).strftime("%Y-%m-%d")
+    if field.kind == 'int':
+        return st.number_input(field.label, min_value=int(field.minimum or 0), step=1,
+                               value=int(field.default or field.minimum or 0))
+    if field.kind == 'float':
+        # Optional fields without a default start empty and stay None unless filled in
+        value = field.default if not field.required else float(field.minimum or 0)
+        return st.number_input(field.label, min_value=float(field.minimum or 0), step=0.01, value=value)
+    return st.text_input(field.label)
+
 def add_product():
     st.subheader("Add New Product")
     
     # Product type selection
     product_type = st.selectbox(
         "Select Product Type",
-        ["Electronics", "Grocery", "Clothing"]
+        list(PRODUCT_TYPES)
     )
+    schema = PRODUCT_TYPES[product_type]
     
-    # Common fields for all products
-    product_id = st.text_input("Product ID")
-    name = st.text_input("Product Name")
-    price = st.number_input("Price", min_value=0.0, step=0.01)
-    quantity = st.number_input("Quantity", min_value=0, step=1)
-    
-    # Type-specific fields
+    # Common fields first, then the type's own fields, all from the type's schema
+    product_data = {field.name: field_input(field) for field in schema.fields}
     try:
-        if product_type == "Electronics":
-            brand = st.text_input("Brand")
-            warranty_years = st.number_input("Warranty (years)", min_value=0, step=1)
-            if st.button("Add Electronics"):
-                product = Electronics(product_id, name, price, quantity, brand, warranty_years)
-                st.session_state.inventory.add_product(product)
-                st.success("Electronics added successfully!")
-                save_inventory()
-                
-        elif product_type == "Grocery":
-            expiry_date = st.date_input("Expiry Date")
-            if st.button("Add Grocery"):
-                product = Grocery(product_id, name, price, quantity, expiry_date.strftime("%Y-%m-%d"))
-                st.session_state.inventory.add_product(product)
-                st.success("Grocery item added successfully!")
-                save_inventory()
-                
-        elif product_type == "Clothing":
-            size = st.text_input("Size")
-            material = st.text_input("Material")
-            if st.button("Add Clothing"):
-                product = Clothing(product_id, name, price, quantity, size, material)
-                st.session_state.inventory.add_product(product)
-                st.success("Clothing item added successfully!")
-                save_inventory()
-                
+        if st.button(f"Add {product_type}"):
+            inventory.add_product(schema.decode(product_data))
+            st.success(f"{product_type} added successfully!")
     except Exception as e:
         st.error(f"Error adding product: {str(e)}")
 
+def table_columns() -> dict:
+    """Inventory table columns, serialized field name -> display name.
+    
+    Built from every registered product schema, with the type and the
+    derived value and expiry status columns placed among them.
+    """
+    columns = {}
+    for field in all_fields():
+        columns[field.name] = field.column
+        if field.name == 'name':
+            columns['type'] = 'Type'
+        elif field.name == 'quantity_in_stock':
+            columns['value'] = 'Value'
+    columns['status'] = 'Status'
+    return columns
+
+TABLE_COLUMNS = table_columns()
+
+TABLE_FORMATS = {
+    'Value': st.column_config.NumberColumn(format="$%.2f"),
+    **{field.column: st.column_config.NumberColumn(format=field.format)
+       for field in all_fields() if field.format}
+}
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+@st.cache_data(max_entries=4)
+@timed('app.inventory_frame')
+def inventory_frame(_inventory, version: int, today: str) -> pd.DataFrame:
+    """Build the inventory table once per inventory version and day.
+    
+    Derived columns are computed column-wise, and numbers stay numeric so
+    currency formatting happens in the browser.
+    """
+    df = pd.DataFrame.from_records(_inventory.to_dict_list())
+    df = df.reindex(columns=[column for column in TABLE_COLUMNS if column not in ('value', 'status')])
+    df['value'] = df['price'] * df['quantity_in_stock']
+    is_grocery = df['type'] == 'Grocery'
+    df['status'] = None
+    df.loc[is_grocery, 'status'] = (df.loc[is_grocery, 'expiry_date'] < today).map(
+        {True: 'Expired', False: 'Valid'})
+    return df[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS)
+
+@st.cache_data(max_entries=16)
+@timed('app.filtered_frame')
+def filtered_frame(_inventory, version: int, today: str, types: tuple, name_filter: str,
+                   sort_by: str, ascending: bool) -> pd.DataFrame:
+    """Filter and sort the inventory table; cached per version and view settings."""
+    df = inventory_frame(_inventory, version, today)
+    if types:
+        df = df[df['Type'].isin(types)]
+    if name_filter:
+        df = df[df['Name'].str.contains(name_filter, case=False, regex=False)]
+    if sort_by:
+        df = df.sort_values(sort_by, ascending=ascending, kind='stable')
+    return df
+
 def view_products():
     st.subheader("Current Inventory")
-    products = st.session_state.inventory.list_all_products()
-    
-    if not products:
+    if not len(inventory):
         st.info("No products in inventory.")
         return
-        
-    # Convert products to DataFrame for better display
-    product_data = []
-    for p in products:
-        data = {
-            'ID': p.product_id,
-            'Name': p.name,
-            'Type': p.__class__.__name__,
-            'Price': f"${p.price:.2f}",
-            'Stock': p.quantity_in_stock,
-            'Value': f"${p.get_total_value():.2f}"
-        }
-        if isinstance(p, Electronics):
-            data.update({'Brand': p.brand, 'Warranty': f"{p.warranty_years} years"})
-        elif isinstance(p, Grocery):
-            data.update({'Expiry': p.expiry_date, 'Status': 'Expired' if p.is_expired() else 'Valid'})
-        elif isinstance(p, Clothing):
-            data.update({'Size': p.size, 'Material': p.material})
-        product_data.append(data)
-    
-    df = pd.DataFrame(product_data)
-    st.dataframe(df, use_container_width=True)
+    
+    filter_col, sort_col, order_col = st.columns(3)
+    with filter_col:
+        types = st.multiselect("Type", list(PRODUCT_TYPES))
+        name_filter = st.text_input("Name contains")
+    with sort_col:
+        sort_by = st.selectbox("Sort by", [""] + list(TABLE_COLUMNS.values()))
+    with order_col:
+        ascending = st.radio("Order", ["Ascending", "Descending"]) == "Ascending"
+    
+    today = datetime.now().date().isoformat()
+    df = filtered_frame(inventory, inventory.version, today, tuple(types), name_filter,
+                        sort_by, ascending)
+    if df.empty:
+        st.info("No products match the filters.")
+        return
+    
+    # Only the current page is sent to the browser
+    page_size = st.selectbox("Rows per page", PAGE_SIZES)
+    page_count = (len(df) - 1) // page_size + 1
+    page = st.number_input("Page", min_value=1, max_value=page_count, step=1)
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size], use_container_width=True,
+                 column_config=TABLE_FORMATS, hide_index=True)
+    st.caption(f"Page {page} of {page_count} ({len(df)} products)")
+
+class ProductOptions:
+    """Picker labels by product ID, kept current from the inventory's change feed.
+    
+    Only products added, replaced or removed since the last refresh are touched, so
+    a rerun doesn't rebuild the labels from the whole catalog.
+    """
+    
+    def __init__(self):
+        self.version = None
+        self.labels = {}
+        self._lock = threading.Lock()
+    
+    def refresh(self, inventory):
+        """Apply pending changes; returns (product IDs in order, ID -> label)."""
+        with self._lock:
+            changes = None if self.version is None else inventory.changes_since(self.version)
+            if changes is None:
+                snapshot = inventory.snapshot()
+                self.labels = {p.product_id: f"{p.name} (ID: {p.product_id})" for p in snapshot}
+                self.version = snapshot.version
+            else:
+                for version, op, product_id in changes:
+                    if op == 'remove':
+                        self.labels.pop(product_id, None)
+                    elif op in ('add', 'replace') and product_id in inventory:
+                        product = inventory.get_product(product_id)
+                        self.labels[product_id] = f"{product.name} (ID: {product_id})"
+                    self.version = version
+            return list(self.labels), self.labels
+
+@st.cache_resource
+def product_options():
+    return ProductOptions()
 
 def sell_products():
     st.subheader("Sell Products")
-    products = st.session_state.inventory.list_all_products()
-    if not products:
+    options, labels = product_options().refresh(inventory)
+    if not options:
         st.info("No products available to sell.")
         return
         
-    product_dict = {p.product_id: p for p in products}
-    product_id = st.selectbox("Select Product", options=list(product_dict.keys()),
-                            format_func=lambda x: f"{product_dict[x].name} (ID: {x})")
+    product_id = st.selectbox("Select Product", options=options, format_func=labels.get)
     
-    if product_id:
-        product = product_dict[product_id]
+    if product_id and product_id in inventory:
+        product = inventory.get_product(product_id)
         st.write(f"Available stock: {product.quantity_in_stock}")
         quantity = st.number_input("Quantity to sell", min_value=1, max_value=product.quantity_in_stock)
         
         if st.button("Complete Sale"):
             try:
-                st.session_state.inventory.sell_product(product_id, quantity)
+                inventory.sell_product(product_id, quantity)
                 st.success(f"Successfully sold {quantity} units of {product.name}")
-                save_inventory()
             except Exception as e:
                 st.error(f"Error completing sale: {str(e)}")
 
 def restock_products():
     st.subheader("Restock Products")
-    products = st.session_state.inventory.list_all_products()
-    if not products:
+    options, labels = product_options().refresh(inventory)
+    if not options:
         st.info("No products available to restock.")
         return
         
-    product_dict = {p.product_id: p for p in products}
-    product_id = st.selectbox("Select Product", options=list(product_dict.keys()),
-                            format_func=lambda x: f"{product_dict[x].name} (ID: {x})")
+    product_id = st.selectbox("Select Product", options=options, format_func=labels.get)
     
-    if product_id:
-        product = product_dict[product_id]
+    if product_id and product_id in inventory:
+        product = inventory.get_product(product_id)
         st.write(f"Current stock: {product.quantity_in_stock}")
         quantity = st.number_input("Quantity to add", min_value=1)
         
         if st.button("Restock"):
             try:
-                st.session_state.inventory.restock_product(product_id, quantity)
+                inventory.restock_product(product_id, quantity)
                 st.success(f"Successfully added {quantity} units to stock")
-                save_inventory()
             except Exception as e:
                 st.error(f"Error restocking: {str(e)}")
 
+def bulk_restock():
+    st.subheader("Bulk Restock")
+    st.write("Upload a CSV with `product_id,quantity` lines. The file is applied all-or-nothing.")
+    uploaded = st.file_uploader("Restock file", type=["csv"])
+    
+    if uploaded is not None and st.button("Apply Restock File"):
+        try:
+            transactions = parse_transactions(uploaded.getvalue().decode("utf-8").splitlines())
+            result = inventory.apply_batch(transactions)
+            if result.applied:
+                st.success(f"Restocked {len(result.lines)} lines")
+            else:
+                st.error(f"Restock file rejected: {len(result.errors)} invalid lines")
+                st.dataframe(pd.DataFrame([line.to_dict() for line in result.errors]),
+                             use_container_width=True)
+        except Exception as e:
+            st.error(f"Error applying restock file: {str(e)}")
+
+def bulk_import():
+    st.subheader("Bulk Import")
+    st.write("Upload a supplier catalog as CSV or Parquet with a `type` column and the product fields. "
+             "Existing product IDs are updated; invalid rows are listed in a reject file.")
+    uploaded = st.file_uploader("Catalog file", type=["csv", "parquet"])
+    
+    if uploaded is not None and st.button("Import Catalog"):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, os.path.basename(uploaded.name))
+            rejects = os.path.join(directory, "rejects.csv")
+            with open(source, "wb") as f:
+                f.write(uploaded.getbuffer())
+            try:
+                status = st.empty()
+                report = import_products(inventory, source, reject_filename=rejects,
+                                         progress=lambda rows, _: status.info(f"Processed {rows} rows..."))
+                status.empty()
+                st.success(f"Imported {report.inserted} new and {report.updated} updated products")
+                if not report.ok:
+                    st.warning(f"{len(report.errors)} rows rejected")
+                    with open(rejects, "rb") as f:
+                        st.download_button("Download Reject File", f.read(), file_name="rejects.csv")
+            except Exception as e:
+                st.error(f"Error importing catalog: {str(e)}")
+
+def export_inventory():
+    st.subheader("Export Inventory")
+    file_format = st.selectbox("Format", ["csv", "json", "parquet"])
+    if st.button("Prepare Export"):
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, f"inventory.{file_format}")
+            try:
+                count = export_products(inventory, target)
+                with open(target, "rb") as f:
+                    st.download_button(f"Download {count} products", f.read(),
+                                       file_name=f"inventory.{file_format}")
+            except Exception as e:
+                st.error(f"Error exporting inventory: {str(e)}")
+
 def search_products():
     st.subheader("Search Products")
-    search_type = st.radio("Search by", ["Name", "Product Type"])
+    search_type = st.radio("Search by", ["Name", "Product Type", "Attributes"])
     
     try:
         if search_type == "Name":
             name = st.text_input("Enter product name")
             if name:
-                results = st.session_state.inventory.search_by_name(name)
+                results = inventory.search_by_name(name, limit=SEARCH_RESULT_LIMIT)
                 if results:
                     product_data = []
                     for p in results:
                         data = {
                             'ID': p.product_id,
                             'Name': p.name,
-                            'Type': p.__class__.__name__,
+                            'Type': p.product_type,
                             'Price': f"${p.price:.2f}",
                             'Stock': p.quantity_in_stock
                         }
@@ -168,15 +379,11 @@ def search_products():
                     st.dataframe(pd.DataFrame(product_data), use_container_width=True)
                 else:
                     st.info("No products found.")
+        elif search_type == "Attributes":
+            attribute_search()
         else:
-            product_type = st.selectbox("Select Product Type", 
-                                      ["Electronics", "Grocery", "Clothing"])
-            type_map = {
-                "Electronics": Electronics,
-                "Grocery": Grocery,
-                "Clothing": Clothing
-            }
-            results = st.session_state.inventory.search_by_type(type_map[product_type])
+            product_type = st.selectbox("Select Product Type", list(PRODUCT_TYPES))
+            results = inventory.search_by_type(PRODUCT_TYPES[product_type].cls)
             if results:
                 product_data = []
                 for p in results:
@@ -193,52 +400,264 @@ def search_products():
     except Exception as e:
         st.error(f"Error searching products: {str(e)}")
 
+def attribute_search():
+    col1, col2 = st.columns(2)
+    with col1:
+        product_type = st.selectbox("Type", ["Any"] + list(PRODUCT_TYPES))
+        brand = st.text_input("Brand (Electronics)")
+        size = st.text_input("Size (Clothing)")
+        material = st.text_input("Material (Clothing)")
+    with col2:
+        min_price = st.number_input("Min Price", min_value=0.0, value=0.0, step=1.0)
+        max_price = st.number_input("Max Price (0 = no limit)", min_value=0.0, value=0.0, step=1.0)
+        min_stock = st.number_input("Min Stock", min_value=0, value=0)
+        max_stock = st.number_input("Max Stock (0 = no limit)", min_value=0, value=0)
+    
+    query = Query(product_type=None if product_type == "Any" else product_type,
+                  brand=brand.strip() or None, size=size.strip() or None,
+                  material=material.strip() or None,
+                  min_price=min_price or None, max_price=max_price or None,
+                  min_stock=min_stock or None, max_stock=max_stock or None)
+    results = inventory.query(query, limit=SEARCH_RESULT_LIMIT)
+    plan = inventory.explain_query(query)
+    st.caption("Plan: " + (", ".join(f"{name} (~{count})" for name, count in plan) or "all products"))
+    if results:
+        st.dataframe(pd.DataFrame([{
+            'ID': p.product_id,
+            'Name': p.name,
+            'Type': p.product_type,
+            'Price': f"${p.price:.2f}",
+            'Stock': p.quantity_in_stock
+        } for p in results]), use_container_width=True)
+    else:
+        st.info("No products found.")
+
+def low_stock_products():
+    st.subheader("Low Stock Products")
+    use_reorder_points = st.checkbox("Use each product's reorder point", value=True)
+    threshold = None
+    if not use_reorder_points:
+        threshold = st.number_input("Stock threshold", min_value=0, step=1, value=DEFAULT_REORDER_POINT)
+    
+    results = inventory.get_low_stock_products(threshold)
+    if results:
+        product_data = []
+        for p in results:
+            data = {
+                'ID': p.product_id,
+                'Name': p.name,
+                'Type': p.product_type,
+                'Stock': p.quantity_in_stock,
+                'Reorder Point': p.reorder_point
+            }
+            product_data.append(data)
+        st.dataframe(pd.DataFrame(product_data), use_container_width=True)
+    else:
+        st.info("No low stock products.")
+
 def remove_expired():
     st.subheader("Remove Expired Products")
     if st.button("Remove All Expired Products"):
         try:
-            expired_products = st.session_state.inventory.remove_expired_products()
+            expired_products = inventory.remove_expired_products()
             if expired_products:
                 st.success(f"Removed {len(expired_products)} expired products")
-                save_inventory()
             else:
                 st.info("No expired products found")
         except Exception as e:
             st.error(f"Error removing expired products: {str(e)}")
 
+def repricing():
+    st.subheader("Repricing")
+    st.write("Change prices by percentage or amount, optionally only for one type, brand or material.")
+    col1, col2 = st.columns(2)
+    with col1:
+        percent = st.number_input("Percent change", value=0.0, step=5.0, help="-10 is 10% off")
+        scope = st.selectbox("Product type", ["All Types"] + list(PRODUCT_TYPES))
+    with col2:
+        amount = st.number_input("Amount change", value=0.0, step=0.5, format="%.2f")
+        brand = st.text_input("Brand") or None
+    material = st.text_input("Material") or None
+    markdown = st.text_input("Near-expiry markdown tiers", placeholder="3:25, 1:50",
+                             help="DAYS:PERCENT off for groceries expiring within DAYS")
+    
+    try:
+        rules = []
+        if percent or amount:
+            rules.append(PriceRule(percent, amount, None if scope == "All Types" else scope,
+                                   brand, material))
+        if markdown.strip():
+            tiers = [tier.split(':') for tier in markdown.split(',')]
+            rules.append(ExpiryMarkdown([(int(days), float(off)) for days, off in tiers]))
+    except ValueError as e:
+        st.error(f"Invalid rule: {str(e)}")
+        return
+    if not rules:
+        st.info("Enter a price change or markdown tiers.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        preview = st.button("Preview")
+    with col2:
+        apply = st.button("Apply Repricing")
+    if preview or apply:
+        try:
+            plan = inventory.reprice(rules, dry_run=not apply)
+        except ValueError as e:
+            st.error(f"Error repricing: {str(e)}")
+            return
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Products Repriced", len(plan.changes))
+        col2.metric("Inventory Value", f"${plan.value_after:,.2f}", f"{plan.value_delta:,.2f}")
+        col3.metric("Value Before", f"${plan.value_before:,.2f}")
+        if plan.applied:
+            st.success(f"Repriced {len(plan.changes)} products")
+        if plan.changes:
+            st.dataframe(pd.DataFrame(plan.changes[:SEARCH_RESULT_LIMIT],
+                                      columns=['ID', 'Old Price', 'New Price']),
+                         use_container_width=True, hide_index=True)
+
+def sales_analytics():
+    st.subheader("Sales Analytics")
+    units_today, revenue_today = ledger.sales(1)
+    units_week, revenue_week = ledger.sales(7)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Units Sold Today", units_today)
+    col2.metric("Revenue Today", f"${revenue_today:,.2f}")
+    col3.metric("Units Sold (7 days)", units_week)
+    col4.metric("Revenue (7 days)", f"${revenue_week:,.2f}")
+    
+    scope = st.selectbox("Show", ["All Products"] + list(PRODUCT_TYPES) + ["Single Product"])
+    product_id = product_type = None
+    if scope == "Single Product":
+        product_id = st.text_input("Product ID") or None
+        if product_id:
+            st.write(f"Velocity: {ledger.velocity(product_id):.2f} units/day over 7 days, "
+                     f"{ledger.units_restocked(product_id)} units restocked in total")
+    elif scope != "All Products":
+        product_type = scope
+    
+    hourly = pd.DataFrame(ledger.hourly(48, product_id, product_type), columns=['Hour', 'Units', 'Revenue'])
+    hourly['Hour'] = pd.to_datetime(hourly['Hour'], unit='s')
+    st.write("Units per hour (UTC, last 48 hours)")
+    st.bar_chart(hourly.set_index('Hour')['Units'])
+    daily = pd.DataFrame(ledger.daily(30, product_id, product_type), columns=['Day', 'Units', 'Revenue'])
+    daily['Day'] = pd.to_datetime(daily['Day'], unit='s')
+    st.write("Revenue per day (UTC, last 30 days)")
+    st.bar_chart(daily.set_index('Day')['Revenue'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("Top sellers today")
+        st.dataframe(pd.DataFrame(ledger.top_sellers(10), columns=['ID', 'Units']), use_container_width=True)
+    with col2:
+        st.write("Top sellers all time")
+        st.dataframe(pd.DataFrame(ledger.top_sellers(10, today=False), columns=['ID', 'Units']),
+                     use_container_width=True)
+    by_type = ledger.sales_by_type(7)
+    if by_type:
+        st.write("Sales by type (7 days)")
+        st.dataframe(pd.DataFrame([{'Type': t, 'Units': u, 'Revenue': r} for t, (u, r) in by_type.items()]),
+                     use_container_width=True)
+
+def diagnostics():
+    st.subheader("Diagnostics")
+    enabled = st.checkbox("Collect metrics", value=REGISTRY.enabled,
+                          help="Times Inventory methods, file loads/saves and table building")
+    if enabled and not REGISTRY.enabled:
+        REGISTRY.enable()
+    elif not enabled and REGISTRY.enabled:
+        REGISTRY.disable()
+    
+    rows = REGISTRY.summary()
+    if rows:
+        st.dataframe(pd.DataFrame(rows).set_index('name').sort_values('total_ms', ascending=False),
+                     use_container_width=True)
+    else:
+        st.info("No metrics recorded yet.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Reset Metrics"):
+            REGISTRY.reset()
+            st.rerun()
+    with col2:
+        if st.button("Write Prometheus File"):
+            try:
+                REGISTRY.write_prometheus(METRICS_FILE)
+                st.success(f"Metrics written to {METRICS_FILE}")
+            except Exception as e:
+                st.error(f"Error writing metrics: {str(e)}")
+    st.download_button("Download Prometheus Metrics", REGISTRY.to_prometheus(),
+                       file_name=METRICS_FILE)
+    
+    st.subheader("Profiler")
+    st.write("Profile the next interaction on any page, then come back here for the report.")
+    if st.button("Profile Next Rerun"):
+        st.session_state.profile_next = True
+    if 'profile_report' in st.session_state:
+        page, report = st.session_state.profile_report
+        st.caption(f"Last profiled page: {page}")
+        st.code(report)
+
 def main():
     st.title("Inventory Management System")
     
     # Sidebar menu
+    persistence_status()
     menu = st.sidebar.selectbox(
         "Menu",
         ["View Inventory", "Add Product", "Sell Product", "Restock Product", 
-         "Search Products", "Remove Expired", "Save Inventory"]
+         "Search Products", "Low Stock", "Remove Expired", "Repricing", "Analytics", "Save Inventory", "Diagnostics"]
     )
     
-    if menu == "View Inventory":
-        view_products()
-        total_value = st.session_state.inventory.total_inventory_value()
-        st.metric("Total Inventory Value", f"${total_value:.2f}")
+    if menu == "Diagnostics":
+        diagnostics()
+    elif st.session_state.pop('profile_next', False):
+        _, report, _ = profile(lambda: render_page(menu))
+        st.session_state.profile_report = (menu, report)
+    else:
+        render_page(menu)
+
+def render_page(menu: str):
+    with REGISTRY.time(f"app.page.{menu}"):
+        if menu == "View Inventory":
+            view_products()
+            total_value = inventory.total_inventory_value()
+            st.metric("Total Inventory Value", f"${total_value:.2f}")
+            st.metric("Total Units in Stock", inventory.total_units())
+        
+        elif menu == "Add Product":
+            add_product()
+            bulk_import()
+        
+        elif menu == "Sell Product":
+            sell_products()
         
-    elif menu == "Add Product":
-        add_product()
+        elif menu == "Restock Product":
+            restock_products()
+            bulk_restock()
         
-    elif menu == "Sell Product":
-        sell_products()
+        elif menu == "Search Products":
+            search_products()
         
-    elif menu == "Restock Product":
-        restock_products()
+        elif menu == "Low Stock":
+            low_stock_products()
         
-    elif menu == "Search Products":
-        search_products()
+        elif menu == "Remove Expired":
+            remove_expired()
         
-    elif menu == "Remove Expired":
-        remove_expired()
+        elif menu == "Repricing":
+            repricing()
         
-    elif menu == "Save Inventory":
-        if st.button("Save Current Inventory"):
-            save_inventory()
+        elif menu == "Analytics":
+            sales_analytics()
+        
+        elif menu == "Save Inventory":
+            if st.button("Save Current Inventory"):
+                save_inventory()
+            export_inventory()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Tuple, Type, runtime_checkable
+
+from batch import BatchResult
+from pricing import RepricePlan
+from product import Grocery, Product
+from query import Query
+from versioning import Change, ProductSnapshot
+
+@runtime_checkable
+class InventoryBackend(Protocol):
+    """The inventory API shared by Inventory, ColumnarInventory and SQLiteInventory.
+
+    Code written against this protocol (the POS API, bulk import, the
+    journal and the sales ledger) works with any of the three. Each one
+    versions its changes, feeds them to changes_since() and logs them to an
+    attached TransactionJournal.
+    """
+
+    @property
+    def version(self) -> int: ...
+
+    def changes_since(self, version: int) -> Optional[List[Change]]: ...
+
+    def snapshot(self) -> ProductSnapshot: ...
+
+    def attach_journal(self, journal) -> None: ...
+
+    def attach_ledger(self, ledger) -> None: ...
+
+    def subscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None: ...
+
+    def unsubscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None: ...
+
+    def add_product(self, product: Product) -> None: ...
+
+    def add_products(self, products: Iterable[Product]) -> None: ...
+
+    def upsert_products(self, products: Iterable[Product]) -> int: ...
+
+    def remove_product(self, product_id: str) -> None: ...
+
+    def get_product(self, product_id: str) -> Product: ...
+
+    def list_all_products(self) -> List[Product]: ...
+
+    def search_by_name(self, name: str, limit: Optional[int] = None) -> List[Product]: ...
+
+    def search_by_type(self, product_type: Type[Product]) -> List[Product]: ...
+
+    def query(self, query: Optional[Query] = None, limit: Optional[int] = None,
+              **filters) -> List[Product]: ...
+
+    def explain_query(self, query: Optional[Query] = None, **filters) -> List[Tuple[str, int]]: ...
+
+    def sell_product(self, product_id: str, quantity: int) -> None: ...
+
+    def restock_product(self, product_id: str, quantity: int) -> None: ...
+
+    def apply_batch(self, transactions: Iterable[Tuple[str, str, int]]) -> BatchResult: ...
+
+    def set_reorder_point(self, product_id: str, reorder_point: int) -> None: ...
+
+    def set_prices(self, prices: Iterable[Tuple[str, float]],
+                   list_prices: Optional[Dict[str, float]] = None) -> int: ...
+
+    def reprice(self, rules: Iterable, today: Optional[date] = None,
+                dry_run: bool = False) -> RepricePlan: ...
+
+    def total_inventory_value(self) -> float: ...
+
+    def total_units(self) -> int: ...
+
+    def value_by_type(self) -> Dict[str, Dict[str, float]]: ...
+
+    def remove_expired_products(self) -> List[str]: ...
+
+    def get_expiring_products(self, days: int, today: Optional[date] = None) -> List[Grocery]: ...
+
+    def get_low_stock_products(self, threshold: Optional[int] = None) -> List[Product]: ...
+
+    def to_dict_list(self) -> List[dict]: ...
+
+@runtime_checkable
+class PersistentBackend(InventoryBackend, Protocol):
+    """A backend the app can run on: it owns its storage and saves in the background.
+
+    Implemented by SharedInventory (journal plus JSON snapshot) and
+    SQLiteInventory (database file).
+    """
+
+    def set_background_writer(self, writer) -> None: ...
+
+    def persist(self) -> None:
+        """Make every change so far durable; the background writer's save."""
+
+    def compact(self) -> None:
+        """Fold accumulated changes into the main file."""
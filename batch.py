@@ -0,0 +1,92 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SELL = 'sell'
+RESTOCK = 'restock'
+
+class BatchLine:
+    """Outcome of one line of a batch.
+
+    Attributes:
+        line: Position of the line in the batch (0-based)
+        op: 'sell' or 'restock'
+        product_id: The product the line applies to
+        quantity: Units sold or restocked
+        error: Why the line was rejected, or None if it is valid
+        stock_after: Stock level after this line, when valid
+    """
+    __slots__ = ('line', 'op', 'product_id', 'quantity', 'error', 'stock_after')
+
+    def __init__(self, line: int, op: str, product_id: str, quantity: int):
+        self.line = line
+        self.op = op
+        self.product_id = product_id
+        self.quantity = quantity
+        self.error: Optional[str] = None
+        self.stock_after: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> dict:
+        return {
+            'line': self.line,
+            'op': self.op,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'ok': self.ok,
+            'error': self.error,
+            'stock_after': self.stock_after
+        }
+
+class BatchResult:
+    """Per-line results of Inventory.apply_batch and whether the batch was applied."""
+
+    def __init__(self, lines: List[BatchLine], applied: bool):
+        self.lines = lines
+        self.applied = applied
+
+    @property
+    def errors(self) -> List[BatchLine]:
+        return [line for line in self.lines if not line.ok]
+
+def plan_batch(inventory, transactions: Iterable[Tuple[str, str, int]]) -> Tuple[List[BatchLine], Dict[str, int]]:
+    """Validate a batch against current stock without changing anything.
+
+    Lines are checked in order against a running stock level per product, so
+    several lines for the same SKU are aggregated: a basket that sells more
+    than the available stock in total is rejected even if each line alone fits.
+
+    Args:
+        inventory: The inventory the batch will be applied to
+        transactions: (op, product_id, quantity) tuples with op 'sell' or 'restock'
+
+    Returns:
+        The per-line results and the net stock change per product ID
+    """
+    lines = []
+    stock: Dict[str, int] = {}
+    net: Dict[str, int] = {}
+    for index, (op, product_id, quantity) in enumerate(transactions):
+        line = BatchLine(index, op, product_id, quantity)
+        lines.append(line)
+        if op not in (SELL, RESTOCK):
+            line.error = f"Unknown operation: {op}"
+            continue
+        if not isinstance(quantity, int) or quantity <= 0:
+            line.error = ("Sell quantity must be positive" if op == SELL
+                          else "Restock amount must be positive")
+            continue
+        if product_id not in stock:
+            if product_id not in inventory:
+                line.error = f"Product with ID '{product_id}' not found."
+                continue
+            stock[product_id] = inventory.get_product(product_id).quantity_in_stock
+        delta = -quantity if op == SELL else quantity
+        if stock[product_id] + delta < 0:
+            line.error = f"Not enough stock available. Current stock: {stock[product_id]}"
+            continue
+        stock[product_id] += delta
+        net[product_id] = net.get(product_id, 0) + delta
+        line.stock_after = stock[product_id]
+    return lines, net
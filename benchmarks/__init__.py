@@ -0,0 +1,11 @@
+"""Reproducible performance benchmarks for the inventory backends.
+
+Run from the repository root, e.g.::
+
+    python -m benchmarks --sizes 1000 10000 100000 --output results.json
+    python -m benchmarks --sizes 1000 10000 --compare results.json
+"""
+from benchmarks.catalog import generate_catalog, search_terms
+from benchmarks.scenarios import BACKENDS, run_size
+
+__all__ = ['generate_catalog', 'search_terms', 'BACKENDS', 'run_size']
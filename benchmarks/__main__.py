@@ -0,0 +1,85 @@
+import argparse
+import json
+import platform
+import sys
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+from benchmarks.scenarios import BACKENDS, run_size
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """Return a message for every scenario that got slower than threshold x baseline."""
+    previous = {(r['backend'], r['size'], r['scenario']): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result['backend'], result['size'], result['scenario']))
+        if old is None or not old['seconds']:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        if ratio > threshold:
+            regressions.append(f"{result['backend']} {result['scenario']} @ {result['size']}: "
+                               f"{old['seconds']:.4f}s -> {result['seconds']:.4f}s ({ratio:.2f}x)")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Benchmark inventory operations on synthetic catalogs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="catalog sizes to run (up to 1000000)")
+    parser.add_argument('--backend', nargs='+', choices=sorted(BACKENDS), default=['inventory'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--operations', type=int, default=10000,
+                        help="operations per search, sell and mixed scenario")
+    parser.add_argument('--read-ratio', type=float, default=0.9)
+    parser.add_argument('--today', type=date.fromisoformat, default=date.today(),
+                        help="reference date for expiry, for exactly repeatable catalogs")
+    parser.add_argument('--no-memory', action='store_true', help="skip peak memory measurements")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="baseline JSON results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in args.backend:
+        for size in args.sizes:
+            print(f"{backend}: {size} SKUs", file=sys.stderr)
+            for result in run_size(size, backend, args.seed, args.repeat, args.operations,
+                                   args.read_ratio, not args.no_memory, args.today,
+                                   log=lambda message: print(message, file=sys.stderr)):
+                result['backend'] = backend
+                results.append(result)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'today': args.today.isoformat(),
+            'repeat': args.repeat,
+            'operations': args.operations,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import random
+from datetime import date, timedelta
+from typing import Iterator, List, Optional
+
+from product import Product, Electronics, Grocery, Clothing
+
+_ADJECTIVES = ['Classic', 'Deluxe', 'Organic', 'Smart', 'Ultra', 'Compact', 'Premium', 'Eco',
+               'Wireless', 'Fresh', 'Slim', 'Heavy Duty', 'Vintage', 'Pro', 'Mini', 'Family']
+_ELECTRONICS = ['Laptop', 'Headphones', 'Monitor', 'Speaker', 'Keyboard', 'Camera', 'Router',
+                'Tablet', 'Charger', 'Smartwatch', 'Television', 'Drone']
+_GROCERIES = ['Milk', 'Bread', 'Apples', 'Cheese', 'Coffee', 'Yogurt', 'Rice', 'Pasta',
+              'Orange Juice', 'Eggs', 'Butter', 'Cereal']
+_CLOTHING = ['Shirt', 'Jeans', 'Jacket', 'Sweater', 'Dress', 'Socks', 'Scarf', 'Hoodie',
+             'Shorts', 'Coat', 'Skirt', 'Sneakers']
+_BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Tyrell']
+_SIZES = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+_MATERIALS = ['Cotton', 'Wool', 'Polyester', 'Denim', 'Linen', 'Silk', 'Leather']
+
+def generate_catalog(size: int, seed: int = 0, today: Optional[date] = None,
+                     expired_fraction: float = 0.1) -> Iterator[Product]:
+    """Yield a reproducible mixed catalog of Electronics, Grocery and Clothing.
+
+    The same seed and size always produce the same products. Grocery expiry
+    dates are offsets from today, with roughly expired_fraction of them
+    already in the past so remove_expired_products has work to do.
+
+    Args:
+        size: Number of products to generate
+        seed: Random seed
+        today: Reference date for expiry offsets (defaults to date.today())
+        expired_fraction: Share of groceries that are already expired
+
+    Yields:
+        Product: Products with IDs SKU0000000, SKU0000001, ...
+    """
+    rng = random.Random(seed)
+    today = today if today is not None else date.today()
+    for index in range(size):
+        product_id = f"SKU{index:07d}"
+        adjective = rng.choice(_ADJECTIVES)
+        quantity = rng.randint(0, 500)
+        reorder_point = rng.randint(0, 20)
+        roll = rng.random()
+        if roll < 0.4:
+            yield Electronics(product_id, f"{adjective} {rng.choice(_ELECTRONICS)} {index}",
+                              round(rng.uniform(20, 2500), 2), quantity,
+                              rng.choice(_BRANDS), rng.randint(0, 5), reorder_point)
+        elif roll < 0.7:
+            if rng.random() < expired_fraction:
+                offset = -rng.randint(1, 30)
+            else:
+                offset = rng.randint(0, 365)
+            yield Grocery(product_id, f"{adjective} {rng.choice(_GROCERIES)} {index}",
+                          round(rng.uniform(0.5, 50), 2), quantity,
+                          (today + timedelta(days=offset)).isoformat(), reorder_point)
+        else:
+            yield Clothing(product_id, f"{adjective} {rng.choice(_CLOTHING)} {index}",
+                           round(rng.uniform(5, 300), 2), quantity,
+                           rng.choice(_SIZES), rng.choice(_MATERIALS), reorder_point)
+
+def search_terms(count: int, seed: int = 0) -> List[str]:
+    """Reproducible mix of name queries: whole words, prefixes, and misses."""
+    rng = random.Random(seed)
+    words = _ADJECTIVES + _ELECTRONICS + _GROCERIES + _CLOTHING
+    terms = []
+    for _ in range(count):
+        word = rng.choice(words)
+        roll = rng.random()
+        if roll < 0.5:
+            terms.append(word.lower())
+        elif roll < 0.9:
+            terms.append(word[:rng.randint(3, max(3, len(word)))].lower())
+        else:
+            terms.append(f"zz{rng.randint(0, 9999)}")
+    return terms
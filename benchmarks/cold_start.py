@@ -0,0 +1,77 @@
+"""Cold-start check for the headless CLI.
+
+Runs ``python cli.py valuation`` against an empty snapshot several times
+in fresh interpreters and compares the median wall time with the budget
+in cli.COLD_START_BUDGET_MS. It also verifies that importing the CLI
+leaves streamlit, pandas and other heavy packages unloaded::
+
+    python -m benchmarks.cold_start --runs 20
+
+Exits with status 1 if the budget is exceeded or a heavy module is loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_runs(runs: int, directory: str) -> List[float]:
+    command = [sys.executable, os.path.join(ROOT, 'cli.py'),
+               '--snapshot', os.path.join(directory, 'inventory.json'),
+               '--journal', os.path.join(directory, 'inventory.journal'), 'valuation']
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return samples
+
+def loaded_heavy_modules() -> List[str]:
+    script = ("import json, sys, cli; "
+              "print(json.dumps([m for m in cli.HEAVY_MODULES if m in sys.modules]))")
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def baseline_ms(runs: int) -> float:
+    """Median time of a bare interpreter start, for context."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+def main(argv=None) -> int:
+    sys.path.insert(0, ROOT)
+    from cli import COLD_START_BUDGET_MS
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.cold_start',
+                                     description="Measure CLI cold start against its budget.")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=COLD_START_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        samples = time_runs(args.runs, directory)
+    heavy = loaded_heavy_modules()
+    report = {
+        'runs': args.runs,
+        'median_ms': round(statistics.median(samples), 1),
+        'max_ms': round(max(samples), 1),
+        'interpreter_ms': round(baseline_ms(args.runs), 1),
+        'budget_ms': args.budget_ms,
+        'heavy_modules_loaded': heavy,
+    }
+    report['ok'] = report['median_ms'] <= args.budget_ms and not heavy
+    json.dump(report, sys.stdout, indent=4)
+    print()
+    return 0 if report['ok'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
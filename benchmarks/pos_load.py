@@ -0,0 +1,168 @@
+"""Load test for the POS terminal API.
+
+Simulates many checkout terminals, each holding one keep-alive connection
+and issuing a mix of product lookups, name searches and sells::
+
+    python -m benchmarks.pos_load --terminals 50 --requests 200
+    python -m benchmarks.pos_load --url http://127.0.0.1:8765 --terminals 20
+
+Without --url a server is started in-process on a generated catalog.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from benchmarks.catalog import generate_catalog, search_terms
+
+class Terminal:
+    """One keep-alive HTTP connection to the API."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self._writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                           .encode('latin-1') + body)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        data = await self._reader.readexactly(length)
+        return status, json.loads(data) if data else None
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+async def run_terminal(host: str, port: int, ids: List[str], terms: List[str], requests: int,
+                       sell_ratio: float, rng: random.Random,
+                       latencies: Dict[str, List[float]], statuses: Dict[int, int]) -> None:
+    terminal = Terminal(host, port)
+    await terminal.connect()
+    clock = time.perf_counter
+    try:
+        for _ in range(requests):
+            roll = rng.random()
+            if roll < sell_ratio:
+                kind, method, path = 'sell', 'POST', '/sell'
+                payload = {'product_id': rng.choice(ids), 'quantity': rng.randint(1, 3)}
+            elif roll < sell_ratio + (1 - sell_ratio) / 2:
+                kind, method, path, payload = 'lookup', 'GET', f"/products/{quote(rng.choice(ids))}", None
+            else:
+                kind, method, path, payload = 'search', 'GET', f"/search?name={quote(rng.choice(terms))}&limit=20", None
+            start = clock()
+            status, _ = await terminal.request(method, path, payload)
+            latencies[kind].append(clock() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        await terminal.close()
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e3
+    return {'count': len(samples), 'mean_ms': statistics.fmean(samples) * 1e3,
+            'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'max_ms': ordered[-1] * 1e3}
+
+async def load_test(host: str, port: int, ids: List[str], terms: List[str], terminals: int,
+                    requests: int, sell_ratio: float, seed: int) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {'sell': [], 'lookup': [], 'search': []}
+    statuses: Dict[int, int] = {}
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_terminal(host, port, ids, terms, requests, sell_ratio,
+                     random.Random(rng.random()), latencies, statuses)
+        for _ in range(terminals)))
+    elapsed = time.perf_counter() - start
+    monitor = Terminal(host, port)
+    await monitor.connect()
+    _, stats = await monitor.request('GET', '/stats')
+    await monitor.close()
+    total = sum(map(len, latencies.values()))
+    return {
+        'terminals': terminals,
+        'requests': total,
+        'seconds': elapsed,
+        'requests_per_second': total / elapsed if elapsed else 0.0,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'latency': {kind: _percentiles(samples) for kind, samples in latencies.items()},
+        'server': stats,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.pos_load',
+                                     description="Drive the POS API with simulated terminals.")
+    parser.add_argument('--url', help="existing server to test; default starts one in-process")
+    parser.add_argument('--size', type=int, default=10000, help="catalog size for the in-process server")
+    parser.add_argument('--terminals', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help="requests per terminal")
+    parser.add_argument('--sell-ratio', type=float, default=0.6)
+    parser.add_argument('--batch-window', type=float, default=0.005)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+        ids, terms = None, None
+    else:
+        from shared_inventory import SharedInventory
+        from pos_api import InventoryAPI, BackgroundServer
+        inventory = SharedInventory()
+        products = list(generate_catalog(args.size, args.seed))
+        for product in products:
+            inventory.add_product(product)
+        ids = [product.product_id for product in products]
+        terms = search_terms(100, args.seed)
+        server = BackgroundServer(InventoryAPI(inventory, args.batch_window), port=0)
+        host, port = server.host, server.port
+
+    async def run() -> Dict[str, Any]:
+        nonlocal ids, terms
+        if ids is None:
+            # Sample IDs and search terms from the remote catalog
+            client = Terminal(host, port)
+            await client.connect()
+            _, found = await client.request('GET', '/search?limit=100')
+            await client.close()
+            ids = [product['product_id'] for product in found]
+            terms = [product['name'][:3] for product in found]
+            if not ids:
+                raise SystemExit("The server has no products to sell")
+        return await load_test(host, port, ids, terms, args.terminals, args.requests,
+                               args.sell_ratio, args.seed)
+
+    try:
+        report = asyncio.run(run())
+    finally:
+        if server is not None:
+            server.stop()
+    json.dump(report, sys.stdout, indent=4)
+    print()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
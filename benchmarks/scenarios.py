@@ -0,0 +1,231 @@
+import gc
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+from product import Electronics, Grocery, Clothing
+from inventory import Inventory
+from utils import save_inventory_to_file, load_inventory_from_file
+from benchmarks.catalog import generate_catalog, search_terms
+
+def _sqlite_backend():
+    from sqlite_inventory import SQLiteInventory
+    return SQLiteInventory(':memory:')
+
+def _shared_backend():
+    from shared_inventory import SharedInventory
+    return SharedInventory()
+
+def _columnar_backend():
+    from columnar import ColumnarInventory
+    return ColumnarInventory()
+
+# Backend name -> factory for an empty inventory
+BACKENDS: Dict[str, Callable[[], Any]] = {
+    'inventory': Inventory,
+    'shared': _shared_backend,
+    'columnar': _columnar_backend,
+    'sqlite': _sqlite_backend,
+}
+
+class Timer:
+    """Accumulates wall-clock time of repeated runs of one scenario."""
+
+    def __init__(self):
+        self.runs: List[float] = []
+
+    def __enter__(self) -> 'Timer':
+        gc.collect()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.runs.append(time.perf_counter() - self._start)
+
+def _result(scenario: str, size: int, ops: int, runs: List[float], **extra) -> Dict[str, Any]:
+    best = min(runs)
+    result = {
+        'scenario': scenario,
+        'size': size,
+        'ops': ops,
+        'repeat': len(runs),
+        'seconds': best,
+        'median_seconds': statistics.median(runs),
+        'per_op_us': best / ops * 1e6 if ops else 0.0,
+        'ops_per_sec': ops / best if best else 0.0,
+    }
+    result.update(extra)
+    return result
+
+def _peak_memory(function: Callable[[], Any]) -> int:
+    """Peak bytes allocated by Python while running function."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_size(size: int, backend: str = 'inventory', seed: int = 0, repeat: int = 3,
+             operations: int = 10000, read_ratio: float = 0.9, track_memory: bool = True,
+             today: Optional[date] = None,
+             log: Callable[[str], None] = lambda message: None) -> List[Dict[str, Any]]:
+    """Run every scenario for one catalog size.
+
+    Args:
+        size: Number of SKUs in the generated catalog
+        backend: Key of BACKENDS
+        seed: Seed for the catalog and the workloads
+        repeat: Runs of each non-destructive scenario; the fastest is reported
+        operations: Number of operations in the search, sell and mixed scenarios
+        read_ratio: Share of reads in the mixed workload
+        track_memory: Also measure peak memory of building, loading and saving
+        today: Reference date for expiry (defaults to date.today())
+        log: Callback for progress messages
+
+    Returns:
+        List of result dictionaries, one per scenario
+    """
+    make_inventory = BACKENDS[backend]
+    today = today if today is not None else date.today()
+    results = []
+    rng = random.Random(seed)
+
+    def record(result: Dict[str, Any]) -> None:
+        log(f"  {result['scenario']:<28} {result['seconds']:10.4f}s  {result['per_op_us']:10.2f} us/op")
+        results.append(result)
+
+    timer = Timer()
+    with timer:
+        products = list(generate_catalog(size, seed, today))
+    record(_result('generate_catalog', size, size, timer.runs))
+
+    timer = Timer()
+    for _ in range(repeat):
+        inventory = make_inventory()
+        with timer:
+            for product in products:
+                inventory.add_product(product)
+        # Products are bound to the inventory that holds them; build fresh copies each run
+        products = list(generate_catalog(size, seed, today))
+    extra = {}
+    if track_memory:
+        def build():
+            built = make_inventory()
+            for product in generate_catalog(size, seed, today):
+                built.add_product(product)
+        extra['peak_bytes'] = _peak_memory(build)
+    record(_result('add_product', size, size, timer.runs, **extra))
+    del products
+
+    ids = [f"SKU{rng.randrange(size):07d}" for _ in range(operations)]
+    terms = search_terms(min(operations, 1000), seed)
+
+    timer = Timer()
+    for _ in range(repeat):
+        with timer:
+            for term in terms:
+                inventory.search_by_name(term)
+    record(_result('search_by_name', size, len(terms), timer.runs))
+
+    timer = Timer()
+    for _ in range(repeat):
+        with timer:
+            for term in terms:
+                inventory.search_by_name(term, limit=50)
+    record(_result('search_by_name_limit50', size, len(terms), timer.runs))
+
+    types = [Electronics, Grocery, Clothing]
+    timer = Timer()
+    for _ in range(repeat):
+        with timer:
+            for product_type in types:
+                inventory.search_by_type(product_type)
+    record(_result('search_by_type', size, len(types), timer.runs))
+
+    timer = Timer()
+    failures = 0
+    for _ in range(repeat):
+        with timer:
+            for product_id in ids:
+                try:
+                    inventory.sell_product(product_id, 1)
+                except ValueError:
+                    failures += 1
+        for product_id in ids:
+            inventory.restock_product(product_id, 1)
+    record(_result('sell_product', size, len(ids), timer.runs, failures=failures))
+
+    calls = max(1, operations // 10)
+    timer = Timer()
+    for _ in range(repeat):
+        with timer:
+            for _ in range(calls):
+                inventory.total_inventory_value()
+    record(_result('total_inventory_value', size, calls, timer.runs))
+
+    workload = []
+    for product_id in ids:
+        if rng.random() < read_ratio:
+            kind = rng.random()
+            if kind < 0.5:
+                workload.append(('get', product_id))
+            elif kind < 0.9:
+                workload.append(('search', rng.choice(terms)))
+            else:
+                workload.append(('value', None))
+        else:
+            workload.append(('sell' if rng.random() < 0.5 else 'restock', product_id))
+    timer = Timer()
+    for _ in range(repeat):
+        with timer:
+            for op, argument in workload:
+                if op == 'get':
+                    inventory.get_product(argument)
+                elif op == 'search':
+                    inventory.search_by_name(argument, limit=20)
+                elif op == 'value':
+                    inventory.total_inventory_value()
+                elif op == 'sell':
+                    try:
+                        inventory.sell_product(argument, 1)
+                    except ValueError:
+                        pass
+                else:
+                    inventory.restock_product(argument, 1)
+    record(_result('mixed_workload', size, len(workload), timer.runs, read_ratio=read_ratio))
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'inventory.json')
+        timer = Timer()
+        for _ in range(repeat):
+            with timer:
+                save_inventory_to_file(inventory, filename)
+        extra = {'file_bytes': os.path.getsize(filename)}
+        if track_memory:
+            extra['peak_bytes'] = _peak_memory(lambda: save_inventory_to_file(inventory, filename))
+        record(_result('save_inventory_to_file', size, size, timer.runs, **extra))
+
+        timer = Timer()
+        for _ in range(repeat):
+            loaded = make_inventory()
+            with timer:
+                load_inventory_from_file(loaded, filename)
+            del loaded
+        extra = {}
+        if track_memory:
+            extra['peak_bytes'] = _peak_memory(lambda: load_inventory_from_file(make_inventory(), filename))
+        record(_result('load_inventory_from_file', size, size, timer.runs, **extra))
+
+    # Destructive, so it runs once and last
+    timer = Timer()
+    with timer:
+        removed = len(inventory.remove_expired_products())
+    record(_result('remove_expired_products', size, max(1, removed), timer.runs, removed=removed))
+    return results
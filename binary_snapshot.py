@@ -0,0 +1,326 @@
+import math
+import mmap
+import operator
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from product import Product
+from schema import PRODUCT_TYPES, ProductSchema, all_fields, schema_for
+from exceptions import InvalidProductDataError
+
+# File layout (all integers little-endian):
+#
+#   header    magic, format version, column count, record count, string
+#             count, then a directory entry (name, array typecode, length,
+#             byte offset) per column and the byte offset of the strings
+#   columns   one fixed-width array per column
+#   strings   UTF-8 blob of every string, indexed by the string_offsets column
+#
+# Besides one column per registered product field there are 'type' (an
+# index into 'type_names'), 'by_id' (row numbers sorted by product ID, for
+# O(log n) lookups) and 'string_offsets' (count + 1 entries). String fields
+# hold indexes into the string table, so repeated values such as brands,
+# sizes and materials are stored once. Since the file names its columns,
+# registering a type or field needs no new format version.
+MAGIC = b'INVSNAP\x00'
+FORMAT_VERSION = 3
+
+_NO_STRING = 0xFFFFFFFF
+_NO_INT = -2 ** 63
+_NO_DATE = 0
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+
+# Per field kind: array typecode, stored value where a row has no value,
+# and the conversion from the stored value back to the serialized one
+# (None where the row has no value)
+_KIND_STORAGE = {
+    'str': ('I', _NO_STRING, lambda snapshot, code: None if code == _NO_STRING else snapshot._string(code)),
+    'int': ('q', _NO_INT, lambda snapshot, value: None if value == _NO_INT else value),
+    'float': ('d', math.nan, lambda snapshot, value: None if math.isnan(value) else value),
+    'date': ('i', _NO_DATE,
+             lambda snapshot, ordinal: None if ordinal == _NO_DATE else date.fromordinal(ordinal).isoformat()),
+}
+
+_HEADER = struct.Struct('<8sHHIQQ')
+_ENTRY = struct.Struct('<32sc7xQQ')
+_BLOB_OFFSET = struct.Struct('<Q')
+
+# Versions 1 and 2 had a fixed layout for the three built-in types: the
+# header lists only offsets, type codes index _LEGACY_TYPES, and some
+# fields are stored under other names, brand and size sharing a column.
+_LEGACY_TYPES = ('Electronics', 'Grocery', 'Clothing')
+_LEGACY_FIELD_COLUMNS = {'quantity_in_stock': 'quantity', 'expiry_date': 'expiry',
+                         'brand': 'attr_a', 'size': 'attr_a', 'material': 'attr_b'}
+_LEGACY_COLUMNS = (
+    ('type', 'B'),
+    ('price', 'd'),
+    ('quantity', 'q'),
+    ('reorder_point', 'q'),
+    ('warranty_years', 'i'),
+    ('expiry', 'i'),
+    ('list_price', 'd'),
+    ('product_id', 'I'),
+    ('name', 'I'),
+    ('attr_a', 'I'),
+    ('attr_b', 'I'),
+    ('by_id', 'I'),
+    ('string_offsets', 'Q'),
+)
+_LEGACY_LAYOUTS = {
+    1: tuple(column for column in _LEGACY_COLUMNS if column[0] != 'list_price'),
+    2: _LEGACY_COLUMNS,
+}
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def write_binary_snapshot(products: Iterable[Product], f: BinaryIO) -> int:
+    """Write products to a binary snapshot.
+
+    Args:
+        products: The products to store, in order
+        f: A binary file opened for writing at position 0
+
+    Returns:
+        int: Number of products written
+    """
+    strings: List[bytes] = []
+    codes: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(strings)
+            strings.append(value.encode('utf-8'))
+        return code
+
+    store = {'str': intern, 'int': int, 'float': float,
+             'date': lambda value: _parse_date(value).toordinal()}
+    fields = all_fields()
+    type_codes = {name: code for code, name in enumerate(PRODUCT_TYPES)}
+    columns = {'type': array('B'), 'type_names': array('I', map(intern, PRODUCT_TYPES))}
+    writers = []
+    for field in fields:
+        typecode, empty, _ = _KIND_STORAGE[field.kind]
+        columns[field.name] = array(typecode)
+        writers.append((field.name, columns[field.name].append, empty, store[field.kind]))
+
+    ids = []
+    for product in products:
+        data = product.to_dict()
+        columns['type'].append(type_codes[data['type']])
+        for name, append, empty, convert in writers:
+            value = data.get(name)
+            append(empty if value is None else convert(value))
+        ids.append(data['product_id'])
+
+    columns['by_id'] = array('I', sorted(range(len(ids)), key=ids.__getitem__))
+    columns['string_offsets'] = offsets = array('Q')
+    position = 0
+    for value in strings:
+        offsets.append(position)
+        position += len(value)
+    offsets.append(position)
+
+    if sys.byteorder == 'big':
+        for column in columns.values():
+            column.byteswap()
+
+    offsets = []
+    position = _align(_HEADER.size + _ENTRY.size * len(columns) + _BLOB_OFFSET.size)
+    for column in columns.values():
+        offsets.append(position)
+        position = _align(position + len(column) * column.itemsize)
+
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(columns), 0, len(ids), len(strings)))
+    for (name, column), offset in zip(columns.items(), offsets):
+        f.write(_ENTRY.pack(name.encode('ascii'), column.typecode.encode('ascii'), len(column), offset))
+    f.write(_BLOB_OFFSET.pack(position))
+    for column, offset in zip(columns.values(), offsets):
+        f.write(b'\x00' * (offset - f.tell()))
+        column.tofile(f)
+    f.write(b'\x00' * (position - f.tell()))
+    f.write(b''.join(strings))
+    return len(ids)
+
+class BinarySnapshot:
+    """Read-only, memory-mapped view of a binary inventory snapshot.
+
+    Opening only parses the header and column directory; columns are zero-copy
+    memoryviews over the mapping and products are decoded on first access
+    and cached, so startup cost doesn't depend on catalog size. Aggregates
+    such as total_inventory_value read the numeric columns directly.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise InvalidProductDataError(f"Empty binary snapshot: {filename}")
+        if len(self._mmap) < _HEADER.size:
+            raise InvalidProductDataError(f"Truncated binary snapshot: {filename}")
+        magic, version, column_count, _, self._count, string_count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise InvalidProductDataError(f"Not a binary inventory snapshot: {filename}")
+        if version == FORMAT_VERSION:
+            directory = self._read_directory(column_count)
+        elif version in _LEGACY_LAYOUTS:
+            directory = self._read_legacy_directory(_LEGACY_LAYOUTS[version], string_count)
+        else:
+            raise InvalidProductDataError(f"Unsupported snapshot format version {version} in {filename}")
+        blob_offset = directory.pop()
+
+        view = memoryview(self._mmap)
+        self._columns = {}
+        for name, typecode, length, start in directory:
+            column = view[start:start + length * array(typecode).itemsize]
+            if len(column) != length * array(typecode).itemsize:
+                raise InvalidProductDataError(f"Truncated binary snapshot: {filename}")
+            if sys.byteorder == 'big':
+                swapped = array(typecode, column.tobytes())
+                swapped.byteswap()
+                self._columns[name] = swapped
+            else:
+                self._columns[name] = column.cast(typecode)
+        self._blob = view[blob_offset:]
+        if version == FORMAT_VERSION:
+            self._type_names = [self._string(code) for code in self._columns['type_names']]
+            self._field_columns = {field.name: self._columns.get(field.name) for field in all_fields()}
+        else:
+            self._type_names = list(_LEGACY_TYPES)
+            self._field_columns = {
+                field.name: self._columns.get(_LEGACY_FIELD_COLUMNS.get(field.name, field.name))
+                for field in all_fields()}
+        self._decoders: Dict[int, Tuple[ProductSchema, List[Tuple[str, object, Callable]]]] = {}
+        self._cache: Dict[int, Product] = {}
+
+    def _read_directory(self, column_count: int) -> List:
+        """(name, typecode, length, offset) of each column, then the strings offset."""
+        end = _HEADER.size + _ENTRY.size * column_count + _BLOB_OFFSET.size
+        if len(self._mmap) < end:
+            raise InvalidProductDataError(f"Truncated binary snapshot: {self.filename}")
+        directory: List = []
+        for index in range(column_count):
+            name, typecode, length, offset = _ENTRY.unpack_from(
+                self._mmap, _HEADER.size + _ENTRY.size * index)
+            directory.append((name.rstrip(b'\x00').decode('ascii'), typecode.decode('ascii'),
+                              length, offset))
+        directory.append(_BLOB_OFFSET.unpack_from(self._mmap, end - _BLOB_OFFSET.size)[0])
+        return directory
+
+    def _read_legacy_directory(self, layout, string_count: int) -> List:
+        """Directory of a version 1 or 2 file, whose header lists only offsets."""
+        offsets_struct = struct.Struct('<' + 'Q' * (len(layout) + 1))
+        if len(self._mmap) < _HEADER.size + offsets_struct.size:
+            raise InvalidProductDataError(f"Truncated binary snapshot: {self.filename}")
+        offsets = offsets_struct.unpack_from(self._mmap, _HEADER.size)
+        directory: List = [
+            (name, typecode, string_count + 1 if name == 'string_offsets' else self._count, offset)
+            for (name, typecode), offset in zip(layout, offsets)]
+        directory.append(offsets[-1])
+        return directory
+
+    def close(self) -> None:
+        self._cache.clear()
+        self._decoders.clear()
+        self._field_columns.clear()
+        self._columns.clear()
+        self._blob.release()
+        self._mmap.close()
+
+    def __enter__(self) -> 'BinarySnapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _string(self, code: int) -> Optional[str]:
+        if code == _NO_STRING:
+            return None
+        offsets = self._columns['string_offsets']
+        return str(self._blob[offsets[code]:offsets[code + 1]], 'utf-8')
+
+    def product_id(self, row: int) -> str:
+        return self._string(self._columns['product_id'][row])
+
+    def _decoder(self, type_code: int) -> Tuple[ProductSchema, List[Tuple[str, object, Callable]]]:
+        """Schema of a type code and the (field, column, load) of each of its fields."""
+        decoder = self._decoders.get(type_code)
+        if decoder is None:
+            if type_code >= len(self._type_names):
+                raise InvalidProductDataError(f"Unknown product type code {type_code}")
+            schema = schema_for(self._type_names[type_code])
+            decoder = self._decoders[type_code] = (schema, [
+                (field.name, self._field_columns.get(field.name), _KIND_STORAGE[field.kind][2])
+                for field in schema.fields])
+        return decoder
+
+    def product(self, row: int) -> Product:
+        """Decode the product stored at a row, caching the result."""
+        product = self._cache.get(row)
+        if product is not None:
+            return product
+        schema, fields = self._decoder(self._columns['type'][row])
+        data = {}
+        for name, column, load in fields:
+            if column is not None:
+                value = load(self, column[row])
+                if value is not None:
+                    data[name] = value
+        product = self._cache[row] = schema.decode(data)
+        return product
+
+    def find(self, product_id: str) -> Optional[int]:
+        """Return the row of a product ID by binary search, or None."""
+        by_id = self._columns['by_id']
+        keys = _KeyView(self, by_id)
+        index = bisect_left(keys, product_id)
+        if index < len(by_id) and keys[index] == product_id:
+            return by_id[index]
+        return None
+
+    def get_product(self, product_id: str) -> Product:
+        """Get a product by its ID."""
+        row = self.find(product_id)
+        if row is None:
+            raise ValueError(f"Product with ID '{product_id}' not found.")
+        return self.product(row)
+
+    def __contains__(self, product_id: str) -> bool:
+        return self.find(product_id) is not None
+
+    def __iter__(self) -> Iterator[Product]:
+        for row in range(self._count):
+            yield self.product(row)
+
+    def total_inventory_value(self) -> float:
+        """Total stock value computed straight from the price and quantity columns."""
+        return math.fsum(map(operator.mul, self._field_columns['price'],
+                             self._field_columns['quantity_in_stock']))
+
+class _KeyView:
+    """Sequence of product IDs in sorted order, decoded on demand for bisect."""
+
+    def __init__(self, snapshot: BinarySnapshot, by_id):
+        self._snapshot = snapshot
+        self._by_id = by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __getitem__(self, index: int) -> str:
+        return self._snapshot.product_id(self._by_id[index])
@@ -0,0 +1,320 @@
+import csv
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack, closing
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from product import Product
+from inventory import Inventory
+from exceptions import InvalidProductDataError
+from utils import atomic_write, write_products_json
+from schema import all_fields, schema_for
+
+# Column order used for CSV and Parquet exports: the type, then every registered field
+EXPORT_COLUMNS = ('type',) + tuple(field.name for field in all_fields())
+
+# Parquet column types by field kind
+_ARROW_TYPES = {'str': 'string', 'date': 'string', 'int': 'int64', 'float': 'float64'}
+
+# Row: (1-based data row number, raw field mapping)
+Row = Tuple[int, Dict[str, Any]]
+
+class ImportReport:
+    """Outcome of a bulk import.
+
+    Attributes:
+        inserted: Number of new products added
+        updated: Number of existing products replaced (upsert)
+        errors: (row number, message) pairs for rejected rows
+    """
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def loaded(self) -> int:
+        return self.inserted + self.updated
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+def _file_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension == '.json':
+        return 'json'
+    raise InvalidProductDataError(f"Unsupported file type: {filename}")
+
+def _parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files require the pyarrow package (pip install pyarrow)")
+    return pyarrow
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value == '' or (isinstance(value, float) and math.isnan(value))
+
+def product_from_row(row: Dict[str, Any]) -> Product:
+    """Build a product from a flat CSV/Parquet row.
+
+    CSV values arrive as strings, so numeric fields are converted here and
+    empty cells count as missing. Columns that don't belong to the row's
+    product type are ignored.
+
+    Raises:
+        InvalidProductDataError: If the type is unknown or the data fails schema validation
+        ValueError: If a field can't be converted or is rejected by the product
+    """
+    if None in row:
+        raise InvalidProductDataError("Row has more fields than the header")
+    product_type = row.get('type')
+    if isinstance(product_type, str):
+        product_type = product_type.strip()
+    schema = schema_for(product_type)
+    return schema.decode(schema.parse(row, _is_missing))
+
+def _build_chunk(rows: List[Row]) -> Tuple[List[Tuple[int, Product]], List[Tuple[int, str]]]:
+    """Validate and construct one chunk of rows; runs in a worker process."""
+    products = []
+    errors = []
+    for row_number, row in rows:
+        try:
+            products.append((row_number, product_from_row(row)))
+        except (InvalidProductDataError, ValueError, TypeError) as e:
+            errors.append((row_number, str(e)))
+    return products, errors
+
+def _iter_csv_chunks(f: IO, chunk_size: int) -> Tuple[List[str], Iterator[List[Row]]]:
+    reader = csv.DictReader(f)
+    fieldnames = list(reader.fieldnames or [])
+
+    def chunks() -> Iterator[List[Row]]:
+        chunk: List[Row] = []
+        for row_number, row in enumerate(reader, start=1):
+            chunk.append((row_number, row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    return fieldnames, chunks()
+
+def _iter_parquet_chunks(filename: str, chunk_size: int) -> Tuple[List[str], Iterator[List[Row]]]:
+    parquet_file = _parquet().parquet.ParquetFile(filename)
+    fieldnames = list(parquet_file.schema_arrow.names)
+
+    def chunks() -> Iterator[List[Row]]:
+        row_number = 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            chunk = []
+            for row in batch.to_pylist():
+                row_number += 1
+                chunk.append((row_number, row))
+            yield chunk
+
+    return fieldnames, chunks()
+
+def _map_chunks(chunks: Iterator[List[Row]], workers: int):
+    """Yield (rows, built chunk) in input order, keeping a bounded number in flight."""
+    if workers <= 1:
+        for rows in chunks:
+            yield rows, _build_chunk(rows)
+        return
+    # Spawned, not forked: the caller may be a threaded server (Streamlit) holding locks
+    executor: Executor = ProcessPoolExecutor(max_workers=workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+    pending = deque()
+    try:
+        for rows in chunks:
+            pending.append((rows, executor.submit(_build_chunk, rows)))
+            if len(pending) >= 2 * workers:
+                rows, future = pending.popleft()
+                yield rows, future.result()
+        while pending:
+            rows, future = pending.popleft()
+            yield rows, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def import_products(inventory: Inventory, filename: str, chunk_size: int = 5000,
+                    workers: Optional[int] = None, upsert: bool = True,
+                    reject_filename: Optional[str] = None,
+                    progress: Optional[Callable[[int, ImportReport], None]] = None) -> ImportReport:
+    """Bulk import a CSV or Parquet product file.
+
+    The file is read in chunks; each chunk is validated and turned into
+    product objects in a (spawned) process pool, then merged into the
+    inventory with one add_products or upsert_products call per chunk. With
+    upsert, a product ID that already exists (or repeats later in the file)
+    replaces the earlier product in place;
+    otherwise it is rejected as a duplicate. Rejected rows are written to
+    reject_filename as CSV with their row number and error message.
+
+    Args:
+        inventory: The inventory to import into
+        filename: Path to a .csv, .parquet or .pq file
+        chunk_size: Number of rows handed to a worker at a time
+        workers: Number of worker processes; defaults to the CPU count,
+            and 1 builds products in this process
+        upsert: Replace existing products instead of rejecting them
+        reject_filename: Optional CSV path for rejected rows
+        progress: Optional callback receiving (rows processed, report) after each chunk
+
+    Returns:
+        ImportReport: Counts of inserted and updated products and the rejected rows
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        InvalidProductDataError: If the file type isn't supported
+        ImportError: If a Parquet file is given and pyarrow isn't installed
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    file_format = _file_format(filename)
+    if file_format not in ('csv', 'parquet'):
+        raise InvalidProductDataError(f"Bulk import reads CSV or Parquet files, not {filename}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    report = ImportReport()
+    with ExitStack() as files:
+        if file_format == 'csv':
+            source = files.enter_context(open(filename, 'r', newline='', encoding='utf-8'))
+            fieldnames, chunks = _iter_csv_chunks(source, chunk_size)
+        else:
+            fieldnames, chunks = _iter_parquet_chunks(filename, chunk_size)
+        reject_writer = None
+        if reject_filename is not None:
+            reject_file = files.enter_context(open(reject_filename, 'w', newline='', encoding='utf-8'))
+            reject_writer = csv.DictWriter(reject_file, ['row', 'error'] + fieldnames,
+                                           extrasaction='ignore')
+            reject_writer.writeheader()
+
+        def reject(row_number: int, message: str, raw: Dict[str, Any]) -> None:
+            report.errors.append((row_number, message))
+            if reject_writer is not None:
+                reject_writer.writerow(dict(raw, row=row_number, error=message))
+
+        rows_processed = 0
+        # Closed on the way out too, so an error shuts the worker pool down promptly
+        built_chunks = files.enter_context(closing(_map_chunks(chunks, workers)))
+        for rows, (built, errors) in built_chunks:
+            raw_rows = dict(rows)
+            for row_number, message in errors:
+                reject(row_number, message, raw_rows[row_number])
+
+            # Last occurrence of an ID within the chunk wins
+            latest: Dict[str, Product] = {}
+            for row_number, product in built:
+                product_id = product.product_id
+                exists = product_id in latest or product_id in inventory
+                if exists and not upsert:
+                    reject(row_number, f"Product with ID '{product_id}' already exists.",
+                           raw_rows[row_number])
+                    continue
+                if product_id in latest:
+                    del latest[product_id]
+                latest[product_id] = product
+
+            if upsert:
+                # Replaced in place, one journal record each, never briefly missing
+                replaced = inventory.upsert_products(latest.values())
+            else:
+                inventory.add_products(latest.values())
+                replaced = 0
+            report.updated += replaced
+            report.inserted += len(latest) - replaced
+
+            rows_processed += len(rows)
+            if progress is not None:
+                progress(rows_processed, report)
+    return report
+
+def _iter_products(inventory: Inventory) -> Iterator[Product]:
+    # SQLiteInventory pages through its table; in-memory backends already hold the products
+    iter_products = getattr(inventory, 'iter_products', None)
+    if iter_products is not None:
+        return iter_products()
+    return iter(inventory.list_all_products())
+
+def _export_row(product: Product) -> Dict[str, Any]:
+    row = dict.fromkeys(EXPORT_COLUMNS)
+    row.update(product.to_dict())
+    return row
+
+def export_products(inventory: Inventory, filename: str, chunk_size: int = 5000) -> int:
+    """Stream an inventory to a JSON, CSV or Parquet file.
+
+    Products are converted one at a time (Parquet: one chunk at a time)
+    instead of building the full to_dict_list() result, and the file is
+    replaced atomically. JSON output matches save_inventory_to_file; CSV
+    and Parquet use EXPORT_COLUMNS and can be read back by import_products.
+
+    Args:
+        inventory: The inventory to export
+        filename: Path to a .json, .csv, .parquet or .pq file
+        chunk_size: Rows per Parquet row group
+
+    Returns:
+        int: Number of products written
+
+    Raises:
+        InvalidProductDataError: If the file type isn't supported
+        ImportError: If a Parquet file is requested and pyarrow isn't installed
+    """
+    return write_products(_iter_products(inventory), filename, chunk_size)
+
+def write_products(products: Iterable[Product], filename: str, chunk_size: int = 5000) -> int:
+    """Stream any iterable of products to a JSON, CSV or Parquet file.
+
+    Same formats and guarantees as export_products, for callers that
+    produce products without an inventory, e.g. straight from a snapshot.
+
+    Returns:
+        int: Number of products written
+    """
+    file_format = _file_format(filename)
+    if file_format == 'json':
+        with atomic_write(filename, 'w') as f:
+            return write_products_json(products, f)
+
+    if file_format == 'csv':
+        count = 0
+        with atomic_write(filename, 'w') as f:
+            writer = csv.DictWriter(f, EXPORT_COLUMNS, lineterminator='\n')
+            writer.writeheader()
+            for product in products:
+                writer.writerow(_export_row(product))
+                count += 1
+        return count
+
+    pyarrow = _parquet()
+    schema = pyarrow.schema([('type', pyarrow.string())] + [
+        (field.name, getattr(pyarrow, _ARROW_TYPES[field.kind])()) for field in all_fields()])
+    count = 0
+    with atomic_write(filename, 'wb') as f:
+        with pyarrow.parquet.ParquetWriter(f, schema) as writer:
+            chunk = []
+            for product in products:
+                chunk.append(_export_row(product))
+                if len(chunk) >= chunk_size:
+                    writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+                    count += len(chunk)
+                    chunk = []
+            if chunk:
+                writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+                count += len(chunk)
+    return count
@@ -0,0 +1,240 @@
+"""Headless entry point for nightly and scripted inventory jobs.
+
+Only the core modules are imported; bulk_io (and pyarrow behind it) load
+on demand for exports, and streamlit and pandas are never imported::
+
+    python cli.py valuation
+    python cli.py low-stock --threshold 10 --format csv
+    python cli.py expiring --days 7 --format jsonl
+    python cli.py sweep-expired
+    python cli.py reprice --percent -10 --type Clothing --dry-run
+    python cli.py reprice --markdown 3:25 --markdown 1:50
+    python cli.py export nightly.parquet
+
+Summaries are printed as one JSON object; row reports as a JSON list,
+JSON lines or CSV. Errors go to stderr as {"error": ...} with exit status 1.
+Read-only commands stream products straight from the snapshot when the
+journal holds no pending records, so memory stays flat for large files.
+sweep-expired and reprice (without --dry-run) take the journal's owner
+lock and refuse to run while the app or the POS server has the files open.
+"""
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional
+
+from aggregates import StockTotals
+from exceptions import InventoryError
+from inventory import Inventory
+from journal import TransactionJournal
+from pricing import ExpiryMarkdown, PriceRule, plan_repricing
+from product import Product, Grocery
+from schema import all_fields
+from utils import iter_product_records, product_from_dict
+
+# Median wall-clock budget for starting the CLI and running a trivial
+# command, checked by python -m benchmarks.cold_start
+COLD_START_BUDGET_MS = 150
+
+# Modules the CLI must never pull in
+HEAVY_MODULES = ('streamlit', 'pandas', 'numpy', 'pyarrow')
+
+ROW_COLUMNS = ['type'] + [field.name for field in all_fields()]
+
+def iter_products(snapshot: str, journal_filename: str) -> Iterator[Product]:
+    """Yield the current products without modifying the snapshot or journal.
+
+    With no pending journal records the snapshot is parsed one record at a
+    time; otherwise it is loaded and the journal replayed in memory.
+    """
+    journal = TransactionJournal(journal_filename, snapshot)
+    if journal.pending_records():
+        inventory = Inventory()
+        journal.replay(inventory)
+        yield from inventory.list_all_products()
+        return
+    if not os.path.exists(snapshot):
+        return
+    for record in iter_product_records(snapshot):
+        yield product_from_dict(record)
+
+def write_rows(rows: Iterable[Dict[str, Any]], output_format: str, out: IO) -> int:
+    """Write product rows as a JSON list, JSON lines or CSV as they are produced."""
+    count = 0
+    if output_format == 'csv':
+        writer = csv.DictWriter(out, ROW_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+    if output_format == 'jsonl':
+        for row in rows:
+            out.write(json.dumps(row) + '\n')
+            count += 1
+        return count
+    for row in rows:
+        out.write(',\n' if count else '[\n')
+        out.write(json.dumps(row))
+        count += 1
+    out.write('\n]\n' if count else '[]\n')
+    return count
+
+def write_summary(summary: Dict[str, Any], out: IO) -> None:
+    out.write(json.dumps(summary, indent=2) + '\n')
+
+def cmd_valuation(args: argparse.Namespace, out: IO) -> None:
+    totals = StockTotals()
+    for product in iter_products(args.snapshot, args.journal):
+        totals.add(product)
+    write_summary({
+        'products': totals.product_count,
+        'units': totals.total_units,
+        'value': round(totals.total_value, 2),
+        'by_type': totals.by_type(),
+    }, out)
+
+def cmd_low_stock(args: argparse.Namespace, out: IO) -> None:
+    # Only the matches are held, so they can be ordered lowest stock first
+    if args.threshold is None:
+        matches = [p for p in iter_products(args.snapshot, args.journal) if p.needs_reorder()]
+        matches.sort(key=lambda p: (p.quantity_in_stock - p.reorder_point, p.product_id))
+    else:
+        matches = [p for p in iter_products(args.snapshot, args.journal)
+                   if p.quantity_in_stock <= args.threshold]
+        matches.sort(key=lambda p: (p.quantity_in_stock, p.product_id))
+    write_rows((p.to_dict() for p in matches), args.format, out)
+
+def cmd_expiring(args: argparse.Namespace, out: IO) -> None:
+    if args.days < 0:
+        raise ValueError("Days cannot be negative")
+    today = args.today if args.today is not None else date.today()
+    end = today + timedelta(days=args.days)
+    matches = [p for p in iter_products(args.snapshot, args.journal)
+               if isinstance(p, Grocery) and today <= p.expiry <= end]
+    matches.sort(key=lambda p: (p.expiry, p.product_id))
+    write_rows((p.to_dict() for p in matches), args.format, out)
+
+def cmd_sweep_expired(args: argparse.Namespace, out: IO) -> None:
+    today = date.today()
+    if args.dry_run:
+        removed = [p.product_id for p in iter_products(args.snapshot, args.journal)
+                   if isinstance(p, Grocery) and p.is_expired(today)]
+    else:
+        # Mutating: recover, remove through the journal, then write a fresh snapshot
+        inventory = Inventory()
+        journal = TransactionJournal(args.journal, args.snapshot)
+        try:
+            journal.recover(inventory)
+            removed = inventory.remove_expired_products()
+            if removed:
+                journal.compact(inventory)
+        finally:
+            journal.close()
+    write_summary({'removed': len(removed), 'product_ids': removed, 'dry_run': args.dry_run}, out)
+
+def markdown_tier(text: str) -> tuple:
+    """Parse a DAYS:PERCENT markdown tier argument."""
+    days, _, percent = text.partition(':')
+    try:
+        return int(days), float(percent)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected DAYS:PERCENT, got {text!r}") from None
+
+def cmd_reprice(args: argparse.Namespace, out: IO) -> None:
+    rules = []
+    if args.percent or args.amount:
+        rules.append(PriceRule(args.percent, args.amount, args.type, args.brand, args.material))
+    if args.markdown:
+        rules.append(ExpiryMarkdown(args.markdown))
+    if not rules:
+        raise ValueError("Nothing to do: give --percent, --amount or --markdown")
+    if args.dry_run:
+        plan = plan_repricing(iter_products(args.snapshot, args.journal), rules, args.today)
+    else:
+        inventory = Inventory()
+        journal = TransactionJournal(args.journal, args.snapshot)
+        try:
+            journal.recover(inventory)
+            plan = inventory.reprice(rules, args.today)
+            if plan.changes:
+                journal.compact(inventory)
+        finally:
+            journal.close()
+    write_summary(plan.to_dict(changes=args.show_changes), out)
+
+def cmd_export(args: argparse.Namespace, out: IO) -> None:
+    from bulk_io import write_products
+    count = write_products(iter_products(args.snapshot, args.journal), args.output, args.chunk_size)
+    write_summary({'exported': count, 'file': args.output}, out)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python cli.py', description="Headless inventory jobs.")
+    parser.add_argument('--snapshot', default='inventory.json', help="JSON inventory snapshot")
+    parser.add_argument('--journal', default='inventory.journal', help="transaction journal")
+    parser.add_argument('--timings', action='store_true',
+                        help="print startup and run times to stderr as JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def rows_command(name: str, handler: Callable, help: str) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help=help)
+        command.add_argument('--format', choices=['json', 'jsonl', 'csv'], default='json')
+        command.set_defaults(handler=handler)
+        return command
+
+    commands.add_parser('valuation', help="stock value and units, total and by type") \
+        .set_defaults(handler=cmd_valuation)
+    low_stock = rows_command('low-stock', cmd_low_stock,
+                             "products at or below a threshold or their reorder point")
+    low_stock.add_argument('--threshold', type=int)
+    expiring = rows_command('expiring', cmd_expiring, "groceries expiring within N days")
+    expiring.add_argument('--days', type=int, default=7)
+    expiring.add_argument('--today', type=date.fromisoformat, help="reference date (YYYY-MM-DD)")
+    sweep = commands.add_parser('sweep-expired', help="remove expired groceries and compact")
+    sweep.add_argument('--dry-run', action='store_true', help="only list what would be removed")
+    sweep.set_defaults(handler=cmd_sweep_expired)
+    reprice = commands.add_parser('reprice', help="change prices by rule and mark down groceries "
+                                                 "near expiry")
+    reprice.add_argument('--percent', type=float, default=0.0, help="e.g. -10 for 10%% off")
+    reprice.add_argument('--amount', type=float, default=0.0, help="absolute change per unit")
+    reprice.add_argument('--type', help="only this product type")
+    reprice.add_argument('--brand', help="only this brand")
+    reprice.add_argument('--material', help="only this material")
+    reprice.add_argument('--markdown', type=markdown_tier, action='append', metavar='DAYS:PERCENT',
+                         help="percent off groceries expiring within DAYS (repeatable)")
+    reprice.add_argument('--today', type=date.fromisoformat, help="reference date (YYYY-MM-DD)")
+    reprice.add_argument('--dry-run', action='store_true',
+                         help="only report the effect on stock value")
+    reprice.add_argument('--show-changes', action='store_true', help="list every price change")
+    reprice.set_defaults(handler=cmd_reprice)
+    export = commands.add_parser('export', help="stream products to .json, .csv or .parquet")
+    export.add_argument('output')
+    export.add_argument('--chunk-size', type=int, default=5000)
+    export.set_defaults(handler=cmd_export)
+    return parser
+
+def main(argv: Optional[List[str]] = None, out: IO = sys.stdout) -> int:
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    try:
+        args.handler(args, out)
+    except (InventoryError, ValueError, OSError, ImportError) as e:
+        sys.stderr.write(json.dumps({'error': str(e)}) + '\n')
+        return 1
+    finally:
+        if args.timings:
+            sys.stderr.write(json.dumps({
+                'import_ms': round((started - _STARTED) * 1e3, 2),
+                'run_ms': round((time.perf_counter() - started) * 1e3, 2),
+            }) + '\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
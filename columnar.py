@@ -0,0 +1,588 @@
+import math
+import operator
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import compress, repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from product import Product, Grocery
+from schema import PRODUCT_TYPES, Field, ProductSchema
+from search_index import NameIndex
+from batch import BatchResult, plan_batch
+from query import Query, CATEGORICAL_FIELDS
+from pricing import RepricePlan, plan_repricing
+from versioning import Change, ChangeFeed, ProductSnapshot
+
+# Stored in date columns for rows without the field so every "expired" test skips them
+_NO_EXPIRY = date.max.toordinal()
+_NO_INT = -2 ** 63
+
+# Type codes are indexes into the registered types
+_TYPE_NAMES = list(PRODUCT_TYPES)
+_TYPE_CLASSES = [schema.cls for schema in PRODUCT_TYPES.values()]
+_TYPE_CODES = {name: code for code, name in enumerate(_TYPE_NAMES)}
+
+# Fields beyond the shared ones, each name once; every one gets a column
+_TYPE_FIELDS: List[Field] = list({field.name: field for schema in PRODUCT_TYPES.values()
+                                  for field in schema.type_fields}.values())
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+
+# Per field kind: array typecode, stored value where the row has no value,
+# and store(store, value) / load(store, stored) converting to and from the
+# serialized value. Strings are interned in the store's StringTable.
+_KIND_STORAGE = {
+    'str': ('i', -1, lambda store, value: store._strings.intern(value),
+            lambda store, code: None if code == -1 else store._strings.lookup(code)),
+    'int': ('q', _NO_INT, lambda store, value: value,
+            lambda store, value: None if value == _NO_INT else value),
+    'float': ('d', math.nan, lambda store, value: value,
+              lambda store, value: None if math.isnan(value) else value),
+    'date': ('i', _NO_EXPIRY, lambda store, value: _parse_date(value).toordinal(),
+             lambda store, ordinal: None if ordinal == _NO_EXPIRY else date.fromordinal(ordinal).isoformat()),
+}
+
+class StringTable:
+    """Interns repeated strings so each distinct value is stored once."""
+
+    def __init__(self):
+        self._strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def lookup(self, code: int) -> str:
+        return self._strings[code]
+
+    def matching_codes(self, value: str) -> set:
+        """Codes of all strings equal to value, ignoring case."""
+        key = value.casefold()
+        return {code for code, string in enumerate(self._strings) if string.casefold() == key}
+
+def _column(name: str, setter: bool = False) -> property:
+    """Property reading (and optionally writing) a view's row in a store column."""
+    def get(self):
+        store = self._store
+        return getattr(store, name)[store._rows[self._product_id]]
+
+    def set(self, value):
+        store = self._store
+        getattr(store, name)[store._rows[self._product_id]] = value
+
+    return property(get, set if setter else None)
+
+# (name, empty value, store) of every type field, in column order
+_FIELD_STORAGE = [(field.name, *_KIND_STORAGE[field.kind][1:3]) for field in _TYPE_FIELDS]
+
+def _field_property(field: Field) -> property:
+    """Property reading a view's value of a type field from the store's column for it."""
+    name = field.name
+    load = _KIND_STORAGE[field.kind][3]
+
+    def get(self):
+        store = self._store
+        return load(store, store._fields[name][store._rows[self._product_id]])
+
+    return property(get)
+
+class _ColumnarView:
+    """Row view over a ColumnarInventory exposing the regular Product API.
+
+    The private attributes that Product methods read (_price,
+    _quantity_in_stock, ...) are redirected to the store's columns, so the
+    inherited sell, restock, to_dict and __str__ work unchanged. Price
+    changes go through the store's set_prices, so they are versioned and
+    journaled. A view only holds the store and product ID.
+    """
+
+    __slots__ = ('_store', '_product_id')
+
+    def __init__(self, store: 'ColumnarInventory', product_id: str):
+        self._store = store
+        self._product_id = product_id
+
+    _name = _column('_names')
+    _price = _column('_prices')
+    _quantity_in_stock = _column('_quantities', setter=True)
+    _reorder_point = _column('_reorder_points', setter=True)
+
+    @property
+    def _stock_listener(self):
+        return self._store._on_stock_change
+
+    def set_stock_listener(self, listener) -> None:
+        raise TypeError("Columnar product views are bound to their store")
+
+    def set_price(self, price: float) -> None:
+        self._store.set_prices([(self._product_id, price)])
+
+    def __eq__(self, other):
+        return (isinstance(other, _ColumnarView) and other._store is self._store
+                and other._product_id == self._product_id)
+
+    def __hash__(self):
+        return hash(self._product_id)
+
+def _view_class(schema: ProductSchema) -> type:
+    """Generate the view class of a product type, reading its own fields from columns."""
+    namespace: Dict[str, Any] = {'__slots__': (), 'product_type': schema.type_name}
+    for field in schema.type_fields:
+        namespace[field.attribute] = _field_property(field)
+    return type(f"{schema.type_name}View", (_ColumnarView, schema.cls), namespace)
+
+_VIEW_CLASSES = [_view_class(schema) for schema in PRODUCT_TYPES.values()]
+
+class GroceryView(_VIEW_CLASSES[_TYPE_CODES['Grocery']]):
+    """Grocery view adding the parsed expiry date Grocery methods read."""
+
+    __slots__ = ()
+
+    @property
+    def _expiry(self) -> date:
+        store = self._store
+        return date.fromordinal(store._fields['expiry_date'][store._rows[self._product_id]])
+
+    def set_list_price(self, list_price: Optional[float]) -> None:
+        self._store.set_prices([], {self._product_id: list_price})
+
+_VIEW_CLASSES[_TYPE_CODES['Grocery']] = GroceryView
+
+class ColumnarInventory:
+    """Inventory backend storing products in typed column arrays.
+
+    Every field of every registered type has an ``array`` column, with
+    string fields (brand, size, material) interned, so a SKU costs a few dozen bytes plus its
+    ID and name instead of a full Product object. get_product and the list
+    methods hand out lightweight views implementing the Product API.
+    Valuation, low-stock and expiry queries run as C-level passes over the
+    columns. Rows are removed by moving the last row into the freed slot.
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._types = array('b')
+        self._prices = array('d')
+        self._quantities = array('q')
+        self._reorder_points = array('q')
+        # Type field name -> column; rows without the field hold the kind's empty value
+        self._fields: Dict[str, array] = {
+            field.name: array(_KIND_STORAGE[field.kind][0]) for field in _TYPE_FIELDS}
+        self._strings = StringTable()
+        self._name_index = NameIndex()
+        self._journal = None
+        self._ledger = None
+        self._reorder_subscribers: List[Callable[[Product], None]] = []
+        self._version = 0
+        self._changes = ChangeFeed()
+        self._snapshot: Optional[ProductSnapshot] = None
+
+    @property
+    def version(self) -> int:
+        """Counter incremented by every change to the inventory's contents."""
+        return self._version
+
+    def _bump_version(self, op: str, product_id: str) -> None:
+        self._version += 1
+        self._changes.append(self._version, op, product_id)
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        """Return the (version, op, product_id) changes made after a version; see Inventory.changes_since."""
+        return self._changes.since(version)
+
+    def snapshot(self) -> ProductSnapshot:
+        """Return views of the current products in row order, frozen at the current version.
+
+        Unlike Inventory.snapshot this lists the IDs once per version, and
+        the views read the live columns, so a view of a product removed
+        since can no longer be read.
+        """
+        if self._snapshot is None or self._snapshot.version != self._version:
+            views = self._views(self._ids)
+            self._snapshot = ProductSnapshot(self._version, (views,), len(views))
+        return self._snapshot
+
+    def _columns(self) -> List:
+        return [self._ids, self._names, self._types, self._prices, self._quantities,
+                self._reorder_points, *self._fields.values()]
+
+    def attach_journal(self, journal) -> None:
+        """Log every subsequent mutation to a TransactionJournal (or None to stop)."""
+        self._journal = journal
+
+    def attach_ledger(self, ledger) -> None:
+        """Record every subsequent sale and restock in a SalesLedger (or None to stop)."""
+        self._ledger = ledger
+
+    def _record(self, record: dict) -> None:
+        """Append a mutation record to the attached journal, compacting when due."""
+        if self._journal is None:
+            return
+        self._journal.append(record)
+        if self._journal.should_compact():
+            self._journal.compact(self)
+
+    def _view(self, product_id: str) -> Product:
+        return _VIEW_CLASSES[self._types[self._rows[product_id]]](self, product_id)
+
+    def _views(self, product_ids: Iterable[str]) -> List[Product]:
+        return [self._view(product_id) for product_id in product_ids]
+
+    def _on_stock_change(self, product: Product, old_quantity: int, old_reorder_point: int) -> None:
+        self._bump_version('stock' if product.quantity_in_stock != old_quantity else 'reorder',
+                           product.product_id)
+        if old_quantity > old_reorder_point and product.needs_reorder():
+            for callback in list(self._reorder_subscribers):
+                callback(product)
+
+    def subscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None:
+        """Call callback(product) whenever a product's stock drops to or below its reorder point."""
+        self._reorder_subscribers.append(callback)
+
+    def unsubscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None:
+        """Stop delivering reorder alerts to a callback registered with subscribe_reorder_alerts."""
+        self._reorder_subscribers.remove(callback)
+
+    def add_product(self, product: Product) -> None:
+        """Add a product to the inventory, copying its fields into the columns."""
+        if not isinstance(product, Product):
+            raise TypeError("Product must be an instance of Product class")
+        if product.product_id in self._rows:
+            raise ValueError(f"Product with ID '{product.product_id}' already exists.")
+        data = product.to_dict()
+        self._append_row(data)
+        self._bump_version('add', product.product_id)
+        self._record({'op': 'add', 'product': data})
+
+    def _append_row(self, data: Dict[str, Any]) -> None:
+        """Append a product in its to_dict() form as a new row."""
+        product_id = data['product_id']
+        self._rows[product_id] = len(self._ids)
+        self._ids.append(product_id)
+        self._names.append(data['name'])
+        self._types.append(_TYPE_CODES[data['type']])
+        self._prices.append(data['price'])
+        self._quantities.append(data['quantity_in_stock'])
+        self._reorder_points.append(data['reorder_point'])
+        for name, empty, store in _FIELD_STORAGE:
+            value = data.get(name)
+            self._fields[name].append(empty if value is None else store(self, value))
+        self._name_index.add(product_id, data['name'])
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """Add a batch of products to the inventory."""
+        for product in products:
+            self.add_product(product)
+
+    def upsert_products(self, products: Iterable[Product]) -> int:
+        """Add products, replacing existing ones with the same ID as one journal record each.
+
+        Returns:
+            int: Number of existing products replaced
+        """
+        replaced = 0
+        for product in products:
+            if not isinstance(product, Product):
+                raise TypeError("Product must be an instance of Product class")
+            if product.product_id not in self._rows:
+                self.add_product(product)
+                continue
+            data = product.to_dict()
+            self._delete_row(product.product_id)
+            self._append_row(data)
+            self._bump_version('replace', product.product_id)
+            self._record({'op': 'upsert', 'product': data})
+            replaced += 1
+        return replaced
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _delete_row(self, product_id: str) -> None:
+        row = self._rows.pop(product_id)
+        last = len(self._ids) - 1
+        if row != last:
+            for column in self._columns():
+                column[row] = column[last]
+            self._rows[self._ids[row]] = row
+        for column in self._columns():
+            column.pop()
+        self._name_index.remove(product_id)
+
+    def remove_product(self, product_id: str) -> None:
+        """Remove a product from the inventory."""
+        if product_id not in self._rows:
+            raise ValueError(f"Product with ID '{product_id}' not found.")
+        self._delete_row(product_id)
+        self._bump_version('remove', product_id)
+        self._record({'op': 'remove', 'id': product_id})
+
+    def get_product(self, product_id: str) -> Product:
+        """Get a view of a product by its ID."""
+        if product_id not in self._rows:
+            raise ValueError(f"Product with ID '{product_id}' not found.")
+        return self._view(product_id)
+
+    def list_all_products(self) -> List[Product]:
+        """List views of all products in the inventory."""
+        return self._views(self._ids)
+
+    def search_by_name(self, name: str, limit: Optional[int] = None) -> List[Product]:
+        """Search products by name (case-insensitive partial match), best matches first."""
+        return self._views(self._name_index.search(name, limit))
+
+    def search_by_type(self, product_type: Type[Product]) -> List[Product]:
+        """Search products by their type (Electronics, Grocery, or Clothing)."""
+        codes = {code for code, cls in enumerate(_TYPE_CLASSES) if issubclass(cls, product_type)}
+        return self._views(compress(self._ids, map(codes.__contains__, self._types)))
+
+    def _query_filters(self, query: Query) -> List[Tuple[array, Callable[[object], bool]]]:
+        """(column, value test) pairs, categorical and type filters first."""
+        filters = []
+        if query.product_type is not None:
+            if isinstance(query.product_type, str):
+                codes = {_TYPE_CODES[query.product_type]} if query.product_type in _TYPE_CODES else set()
+            else:
+                codes = {code for code, cls in enumerate(_TYPE_CLASSES)
+                         if issubclass(cls, query.product_type)}
+            filters.append((self._types, codes.__contains__))
+        for field in CATEGORICAL_FIELDS:
+            value = getattr(query, field)
+            if value is not None:
+                filters.append((self._fields[field], self._strings.matching_codes(value).__contains__))
+
+        def in_range(minimum, maximum, exclude=None):
+            return lambda value: (value != exclude and (minimum is None or value >= minimum)
+                                  and (maximum is None or value <= maximum))
+
+        if query.min_price is not None or query.max_price is not None:
+            filters.append((self._prices, in_range(query.min_price, query.max_price)))
+        if query.min_stock is not None or query.max_stock is not None:
+            filters.append((self._quantities, in_range(query.min_stock, query.max_stock)))
+        if query.expires_from is not None or query.expires_to is not None:
+            filters.append((self._fields['expiry_date'], in_range(
+                None if query.expires_from is None else query.expires_from.toordinal(),
+                None if query.expires_to is None else query.expires_to.toordinal(),
+                _NO_EXPIRY)))
+        return filters
+
+    def query(self, query: Optional[Query] = None, limit: Optional[int] = None,
+              **filters) -> List[Product]:
+        """Find products matching every filter.
+
+        The columns are this backend's indexes: each filter narrows the
+        surviving rows with one pass over its column, cheapest filters first.
+        """
+        query = (query or Query()).where(**filters) if filters else (query or Query())
+        rows: Iterable[int] = range(len(self._ids))
+        for column, test in self._query_filters(query):
+            rows = list(compress(rows, map(test, map(column.__getitem__, rows))))
+        product_ids = map(self._ids.__getitem__, rows)
+        if limit is not None:
+            product_ids = (product_id for _, product_id in zip(range(limit), product_ids))
+        return self._views(product_ids)
+
+    def explain_query(self, query: Optional[Query] = None, **filters) -> List[Tuple[str, int]]:
+        """Return (filter, matching rows) pairs in the order query() applies them."""
+        query = (query or Query()).where(**filters) if filters else (query or Query())
+        names = [name for name, value in (
+            ('type', query.product_type),
+            *((field, getattr(query, field)) for field in CATEGORICAL_FIELDS),
+            ('price', (query.min_price, query.max_price) != (None, None) or None),
+            ('stock', (query.min_stock, query.max_stock) != (None, None) or None),
+            ('expiry', (query.expires_from, query.expires_to) != (None, None) or None))
+            if value is not None]
+        return [(name, sum(map(test, column)))
+                for name, (column, test) in zip(names, self._query_filters(query))]
+
+    def sell_product(self, product_id: str, quantity: int) -> None:
+        """Sell a quantity of a product."""
+        product = self.get_product(product_id)
+        try:
+            product.sell(quantity)
+        except ValueError as e:
+            raise ValueError(f"Error selling product {product_id}: {str(e)}")
+        self._record({'op': 'sell', 'id': product_id, 'qty': quantity})
+        if self._ledger is not None:
+            self._ledger.record('sell', product, quantity)
+
+    def restock_product(self, product_id: str, quantity: int) -> None:
+        """Restock a quantity of a product."""
+        product = self.get_product(product_id)
+        try:
+            product.restock(quantity)
+        except ValueError as e:
+            raise ValueError(f"Error restocking product {product_id}: {str(e)}")
+        self._record({'op': 'restock', 'id': product_id, 'qty': quantity})
+        if self._ledger is not None:
+            self._ledger.record('restock', product, quantity)
+
+    def apply_batch(self, transactions: Iterable[Tuple[str, str, int]]) -> BatchResult:
+        """Apply a batch of sells and restocks all-or-nothing.
+
+        The whole batch is validated first, aggregating lines for the same
+        product; if any line is rejected nothing is changed. A valid batch is
+        applied as one net stock change per product and persisted as a single
+        journal record.
+
+        Args:
+            transactions: (op, product_id, quantity) tuples with op 'sell' or 'restock'
+
+        Returns:
+            BatchResult: Per-line results and whether the batch was applied
+        """
+        lines, net = plan_batch(self, transactions)
+        if any(not line.ok for line in lines):
+            return BatchResult(lines, applied=False)
+        for product_id, delta in net.items():
+            product = self._view(product_id)
+            if delta > 0:
+                product.restock(delta)
+            elif delta < 0:
+                product.sell(-delta)
+        if lines:
+            self._record({'op': 'batch',
+                          'lines': [[line.op, line.product_id, line.quantity] for line in lines]})
+            if self._journal is not None:
+                self._journal.sync()
+        if self._ledger is not None:
+            for line in lines:
+                self._ledger.record(line.op, self._view(line.product_id), line.quantity)
+        return BatchResult(lines, applied=True)
+
+    def set_reorder_point(self, product_id: str, reorder_point: int) -> None:
+        """Set the stock level at or below which a product should be reordered."""
+        product = self.get_product(product_id)
+        try:
+            product.set_reorder_point(reorder_point)
+        except ValueError as e:
+            raise ValueError(f"Error setting reorder point for product {product_id}: {str(e)}")
+        self._record({'op': 'reorder', 'id': product_id, 'point': reorder_point})
+
+    def set_prices(self, prices: Iterable[Tuple[str, float]],
+                   list_prices: Optional[Dict[str, float]] = None) -> int:
+        """Change prices and grocery list prices all-or-nothing; see Inventory.set_prices."""
+        changes = []
+        for product_id, price in prices:
+            if product_id not in self._rows:
+                raise ValueError(f"Product with ID '{product_id}' not found.")
+            if price < 0:
+                raise ValueError(f"Error repricing product {product_id}: Price cannot be negative")
+            changes.append((product_id, price))
+        list_prices = list_prices or {}
+        for product_id, list_price in list_prices.items():
+            if product_id not in self._rows:
+                raise ValueError(f"Product with ID '{product_id}' not found.")
+            if not issubclass(_TYPE_CLASSES[self._types[self._rows[product_id]]], Grocery):
+                raise ValueError(f"Error repricing product {product_id}: Only groceries have a list price")
+            if list_price is not None and list_price < 0:
+                raise ValueError(f"Error repricing product {product_id}: List price cannot be negative")
+        for product_id, price in changes:
+            self._prices[self._rows[product_id]] = price
+            self._bump_version('price', product_id)
+        repriced = {product_id for product_id, _ in changes}
+        for product_id, list_price in list_prices.items():
+            self._fields['list_price'][self._rows[product_id]] = math.nan if list_price is None else list_price
+            if product_id not in repriced:
+                self._bump_version('price', product_id)
+        if changes or list_prices:
+            record = {'op': 'price', 'prices': [list(change) for change in changes]}
+            if list_prices:
+                record['list_prices'] = dict(list_prices)
+            self._record(record)
+            if self._journal is not None:
+                self._journal.sync()
+        return len(changes)
+
+    def reprice(self, rules: Iterable, today: Optional[date] = None,
+                dry_run: bool = False) -> RepricePlan:
+        """Apply pricing rules to every product; see Inventory.reprice."""
+        plan = plan_repricing(self.list_all_products(), list(rules), today)
+        if not dry_run:
+            self.set_prices([(product_id, new) for product_id, _, new in plan.changes],
+                            plan.list_prices)
+            plan.applied = True
+        return plan
+
+    def total_inventory_value(self) -> float:
+        """Calculate the total value of all products in a single pass over the columns."""
+        return math.fsum(map(operator.mul, self._prices, self._quantities))
+
+    def total_units(self) -> int:
+        """Get the total number of units in stock across all products."""
+        return sum(self._quantities)
+
+    def value_by_type(self) -> Dict[str, Dict[str, float]]:
+        """Get stock value, units and product count broken down by product type."""
+        breakdown = {}
+        for code, type_name in enumerate(_TYPE_NAMES):
+            mask = [type_code == code for type_code in self._types]
+            count = sum(mask)
+            if not count:
+                continue
+            prices = compress(self._prices, mask)
+            quantities = list(compress(self._quantities, mask))
+            breakdown[type_name] = {
+                'value': math.fsum(map(operator.mul, prices, quantities)),
+                'units': sum(quantities),
+                'products': count,
+            }
+        return breakdown
+
+    def remove_expired_products(self) -> List[str]:
+        """Remove expired grocery products and return their IDs."""
+        cutoff = date.today().toordinal()
+        expiry = self._fields['expiry_date']
+        expired_products = list(compress(self._ids, map(operator.lt, expiry, repeat(cutoff))))
+        for product_id in expired_products:
+            self._delete_row(product_id)
+            self._bump_version('remove', product_id)
+            self._record({'op': 'remove', 'id': product_id})
+        return expired_products
+
+    def get_expiring_products(self, days: int, today: Optional[date] = None) -> List[Grocery]:
+        """Get grocery products that are not yet expired but expire within the next N days."""
+        if days < 0:
+            raise ValueError("Days cannot be negative")
+        current_date = today if today is not None else date.today()
+        window = range(current_date.toordinal(),
+                       (current_date + timedelta(days=days)).toordinal() + 1)
+        expiry = self._fields['expiry_date']
+        product_ids = compress(self._ids, map(window.__contains__, expiry))
+        return self._views(sorted(product_ids, key=lambda product_id: expiry[self._rows[product_id]]))
+
+    def get_low_stock_products(self, threshold: Optional[int] = None) -> List[Product]:
+        """Get products with stock at or below the threshold, lowest stock first.
+
+        Without a threshold each product is compared against its own reorder point.
+        """
+        if threshold is None:
+            levels = list(map(operator.sub, self._quantities, self._reorder_points))
+            mask = map(operator.le, levels, repeat(0))
+        else:
+            levels = self._quantities
+            mask = map(operator.le, levels, repeat(threshold))
+        product_ids = sorted(compress(self._ids, mask),
+                             key=lambda product_id: (levels[self._rows[product_id]], product_id))
+        return self._views(product_ids)
+
+    def to_dict_list(self) -> List[dict]:
+        """Convert all products to a list of dictionaries for serialization."""
+        return [product.to_dict() for product in self.list_all_products()]
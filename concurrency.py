@@ -0,0 +1,96 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterator
+
+class ReadWriteLock:
+    """Writer-preferring reader/writer lock.
+
+    Both sides are reentrant for the owning thread, and a thread holding the
+    write lock may also take the read lock. Upgrading a read lock to a write
+    lock is not supported, since two upgrading readers would deadlock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def acquire_read(self) -> None:
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth or self._writer == threading.get_ident():
+            self._local.read_depth = depth + 1
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.read_depth = 1
+
+    def release_read(self) -> None:
+        depth = self._local.read_depth - 1
+        self._local.read_depth = depth
+        if depth or self._writer == threading.get_ident():
+            return
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, 'read_depth', 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        self._write_depth -= 1
+        if self._write_depth:
+            return
+        with self._cond:
+            self._writer = None
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+class StripedLock:
+    """Fixed pool of reentrant locks selected by key hash.
+
+    Operations on the same key always take the same lock, while operations on
+    different keys usually proceed in parallel.
+    """
+
+    def __init__(self, stripes: int = 64):
+        if stripes <= 0:
+            raise ValueError("Stripe count must be positive")
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def for_key(self, key: Hashable) -> threading.RLock:
+        return self._locks[hash(key) % len(self._locks)]
@@ -21,3 +21,11 @@ class InvalidProductDataError(InventoryError):
 class NegativeValueError(InventoryError):
     """Raised when attempting to set a negative value for price or quantity."""
     pass
+
+class JournalCorruptedError(InventoryError):
+    """Raised when the transaction journal contains an unreadable record before its tail."""
+    pass
+
+class JournalLockedError(InventoryError):
+    """Raised when another process or journal object already owns a transaction journal."""
+    pass
@@ -0,0 +1,68 @@
+import heapq
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+class ExpiryIndex:
+    """Min-heap of product expiry dates with lazy deletion.
+
+    Removing a product only forgets its live entry; the stale heap entry is
+    skipped when it surfaces and the heap is rebuilt once stale entries
+    outnumber live ones.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, str]] = []
+        self._live: Dict[str, Tuple[int, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def add(self, product_id: str, expiry: date) -> None:
+        """Index a product's expiry date, replacing any previous entry for the ID."""
+        entry = (expiry.toordinal(), product_id)
+        self._live[product_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, product_id: str) -> None:
+        """Drop a product from the index; unknown IDs are ignored."""
+        if self._live.pop(product_id, None) is not None and len(self._heap) > 2 * len(self._live) + 64:
+            self._heap = list(self._live.values())
+            heapq.heapify(self._heap)
+
+    def pop_expired(self, today: date) -> List[str]:
+        """Remove and return the IDs of products that expired before today, oldest first."""
+        cutoff = today.toordinal()
+        expired = []
+        while self._heap and self._heap[0][0] < cutoff:
+            entry = heapq.heappop(self._heap)
+            if self._live.get(entry[1]) is entry:
+                del self._live[entry[1]]
+                expired.append(entry[1])
+        return expired
+
+    def expiring_between(self, start: date, end: date) -> List[str]:
+        """Return IDs of products expiring from start to end inclusive, soonest first.
+
+        Only heap nodes at or before the end date are visited, since every
+        node's children expire no earlier than the node itself.
+        """
+        low, high = start.toordinal(), end.toordinal()
+        heap = self._heap
+        found = []
+        stack = [0] if heap else []
+        while stack:
+            index = stack.pop()
+            entry = heap[index]
+            if entry[0] > high:
+                continue
+            if entry[0] >= low and self._live.get(entry[1]) is entry:
+                found.append(entry)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    stack.append(child)
+        found.sort()
+        return [entry[1] for entry in found]
+
+    def expiring_within(self, days: int, today: date) -> List[str]:
+        """Return IDs of products that are still valid but expire within the next N days."""
+        return self.expiring_between(today, today + timedelta(days=days))
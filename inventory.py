@@ -1,10 +1,148 @@
-from typing import List, Dict, Type, Optional
-from datetime import datetime
-from product import Product, Grocery, Electronics, Clothing
+from typing import List, Dict, Type, Optional, Iterable, Callable, Tuple
+from datetime import date
+from product import Product, Grocery
+from search_index import NameIndex
+from expiry_index import ExpiryIndex
+from aggregates import StockTotals
+from sorted_index import SortedIndex
+from batch import BatchResult, plan_batch
+from query import Query, AttributeIndex
+from versioning import ChangeFeed, CopyOnWriteProducts, ProductSnapshot, Change
+from pricing import RepricePlan, plan_repricing
 
 class Inventory:
     def __init__(self):
         self._products: Dict[str, Product] = {}
+        self._journal = None
+        self._ledger = None
+        self._name_index = NameIndex()
+        self._expiry_index = ExpiryIndex()
+        self._totals = StockTotals()
+        # Keyed by quantity_in_stock, and by quantity minus the product's reorder point
+        self._stock_index = SortedIndex()
+        self._reorder_index = SortedIndex()
+        # Type buckets, brand/size/material and price/expiry indexes for query()
+        self._attributes = AttributeIndex(self._stock_index)
+        self._reorder_subscribers: List[Callable[[Product], None]] = []
+        self._version = 0
+        # One (version, op, product_id) entry per version bump, and the
+        # insertion-ordered product list snapshots are taken from
+        self._changes = ChangeFeed()
+        self._ordered = CopyOnWriteProducts()
+        self._snapshot: Optional[ProductSnapshot] = None
+
+    @property
+    def version(self) -> int:
+        """Counter incremented by every change to the inventory's contents."""
+        return self._version
+
+    def _bump_version(self, op: str, product_id: str) -> None:
+        self._version += 1
+        self._changes.append(self._version, op, product_id)
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        """Return the (version, op, product_id) changes made after a version, oldest first.
+
+        op is 'add', 'remove', 'replace', 'stock', 'reorder' or 'price'. Returns None when the
+        version is unknown or older than the retained feed, in which case
+        the caller should re-read everything, e.g. from snapshot().
+        """
+        return self._changes.since(version)
+
+    def snapshot(self) -> ProductSnapshot:
+        """Return the current products without copying the catalog.
+
+        The snapshot's membership and order are frozen at the current
+        version; repeated calls at the same version return the same object.
+        """
+        if self._snapshot is None or self._snapshot.version != self._version:
+            self._snapshot = self._ordered.snapshot(self._version)
+        return self._snapshot
+
+    def attach_journal(self, journal) -> None:
+        """Log every subsequent mutation to a TransactionJournal (or None to stop)."""
+        self._journal = journal
+
+    def attach_ledger(self, ledger) -> None:
+        """Record every subsequent sale and restock in a SalesLedger (or None to stop)."""
+        self._ledger = ledger
+
+    def _record(self, record: dict) -> None:
+        """Append a mutation record to the attached journal, compacting when due."""
+        if self._journal is None:
+            return
+        self._journal.append(record)
+        if self._journal.should_compact():
+            self._journal.compact(self)
+
+    def _index_product(self, product: Product) -> None:
+        """Register a newly added product with the secondary indexes."""
+        self._bump_version('add', product.product_id)
+        self._ordered.append(product)
+        self._add_to_indexes(product)
+
+    def _unindex_product(self, product: Product) -> None:
+        """Drop a removed product from the secondary indexes."""
+        self._bump_version('remove', product.product_id)
+        self._ordered.remove(product.product_id)
+        self._remove_from_indexes(product)
+
+    def _reindex_product(self, old: Product, new: Product) -> None:
+        """Swap a product for a new one with the same ID, keeping its position."""
+        self._bump_version('replace', new.product_id)
+        self._ordered.replace(new)
+        self._remove_from_indexes(old)
+        self._add_to_indexes(new)
+
+    def _add_to_indexes(self, product: Product) -> None:
+        self._name_index.add(product.product_id, product.name)
+        self._totals.add(product)
+        self._stock_index.add(product.quantity_in_stock, product.product_id)
+        self._reorder_index.add(product.quantity_in_stock - product.reorder_point, product.product_id)
+        self._attributes.add(product)
+        product.set_stock_listener(self._on_stock_change)
+        if isinstance(product, Grocery):
+            self._expiry_index.add(product.product_id, product.expiry)
+
+    def _remove_from_indexes(self, product: Product) -> None:
+        self._name_index.remove(product.product_id)
+        self._totals.remove(product)
+        self._stock_index.remove(product.quantity_in_stock, product.product_id)
+        self._reorder_index.remove(product.quantity_in_stock - product.reorder_point, product.product_id)
+        self._attributes.remove(product)
+        product.set_stock_listener(None)
+        self._expiry_index.remove(product.product_id)
+
+    def _on_stock_change(self, product: Product, old_quantity: int, old_reorder_point: int) -> None:
+        """Keep stock-keyed indexes in step with a product and raise reorder alerts."""
+        new_quantity = product.quantity_in_stock
+        product_id = product.product_id
+        self._bump_version('stock' if new_quantity != old_quantity else 'reorder', product_id)
+        if new_quantity != old_quantity:
+            self._totals.adjust(product, new_quantity - old_quantity)
+            self._stock_index.remove(old_quantity, product_id)
+            self._stock_index.add(new_quantity, product_id)
+        self._reorder_index.remove(old_quantity - old_reorder_point, product_id)
+        self._reorder_index.add(new_quantity - product.reorder_point, product_id)
+        if old_quantity > old_reorder_point and product.needs_reorder():
+            for callback in list(self._reorder_subscribers):
+                callback(product)
+
+    def _on_price_change(self, product: Product, price: float) -> None:
+        """Reprice a product and keep the price index and stock value in step."""
+        old_price = product.price
+        self._bump_version('price', product.product_id)
+        product.set_price(price)
+        self._totals.adjust_price(product, old_price)
+        self._attributes.update_price(product.product_id, old_price, price)
+
+    def subscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None:
+        """Call callback(product) whenever a product's stock drops to or below its reorder point."""
+        self._reorder_subscribers.append(callback)
+
+    def unsubscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None:
+        """Stop delivering reorder alerts to a callback registered with subscribe_reorder_alerts."""
+        self._reorder_subscribers.remove(callback)
 
     def add_product(self, product: Product) -> None:
         """Add a product to the inventory."""
@@ -13,12 +151,50 @@ class Inventory:
         if product.product_id in self._products:
             raise ValueError(f"Product with ID '{product.product_id}' already exists.")
         self._products[product.product_id] = product
+        self._index_product(product)
+        self._record({'op': 'add', 'product': product.to_dict()})
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """Add a batch of products to the inventory."""
+        for product in products:
+            self.add_product(product)
+
+    def upsert_products(self, products: Iterable[Product]) -> int:
+        """Add products, replacing any existing product with the same ID in place.
+
+        A replacement keeps the product's position, appears as one 'replace'
+        change and is journaled as a single record, so neither readers nor
+        recovery ever see the product missing.
+
+        Returns:
+            int: Number of existing products replaced
+        """
+        replaced = 0
+        for product in products:
+            if not isinstance(product, Product):
+                raise TypeError("Product must be an instance of Product class")
+            old = self._products.get(product.product_id)
+            if old is None:
+                self.add_product(product)
+                continue
+            self._products[product.product_id] = product
+            self._reindex_product(old, product)
+            self._record({'op': 'upsert', 'product': product.to_dict()})
+            replaced += 1
+        return replaced
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._products
+
+    def __len__(self) -> int:
+        return len(self._products)
 
     def remove_product(self, product_id: str) -> None:
         """Remove a product from the inventory."""
         if product_id not in self._products:
             raise ValueError(f"Product with ID '{product_id}' not found.")
-        del self._products[product_id]
+        self._unindex_product(self._products.pop(product_id))
+        self._record({'op': 'remove', 'id': product_id})
 
     def get_product(self, product_id: str) -> Product:
         """Get a product by its ID."""
@@ -30,15 +206,34 @@ class Inventory:
         """List all products in the inventory."""
         return list(self._products.values())
 
-    def search_by_name(self, name: str) -> List[Product]:
-        """Search products by name (case-insensitive partial match)."""
-        return [product for product in self._products.values() 
-                if name.lower() in product.name.lower()]
+    def search_by_name(self, name: str, limit: Optional[int] = None) -> List[Product]:
+        """Search products by name (case-insensitive partial match), best matches first."""
+        return [self._products[product_id]
+                for product_id in self._name_index.search(name, limit)]
 
     def search_by_type(self, product_type: Type[Product]) -> List[Product]:
         """Search products by their type (Electronics, Grocery, or Clothing)."""
-        return [product for product in self._products.values() 
-                if isinstance(product, product_type)]
+        return self.query(product_type=product_type)
+
+    def query(self, query: Optional[Query] = None, limit: Optional[int] = None,
+              **filters) -> List[Product]:
+        """Find products matching every filter, starting from the most selective index.
+
+        Args:
+            query: A Query; keyword filters (Query constructor arguments) are added to it
+            limit: Maximum number of products to return
+
+        Returns:
+            List[Product]: Matching products, in the order of the driving index
+        """
+        query = (query or Query()).where(**filters) if filters else (query or Query())
+        return [self._products[product_id]
+                for product_id in self._attributes.search(query, self._products, limit)]
+
+    def explain_query(self, query: Optional[Query] = None, **filters) -> List[Tuple[str, int]]:
+        """Return (filter, estimated matches) pairs in the order query() applies them."""
+        query = (query or Query()).where(**filters) if filters else (query or Query())
+        return self._attributes.explain(query)
 
     def sell_product(self, product_id: str, quantity: int) -> None:
         """Sell a quantity of a product."""
@@ -47,6 +242,9 @@ class Inventory:
             product.sell(quantity)
         except ValueError as e:
             raise ValueError(f"Error selling product {product_id}: {str(e)}")
+        self._record({'op': 'sell', 'id': product_id, 'qty': quantity})
+        if self._ledger is not None:
+            self._ledger.record('sell', product, quantity)
 
     def restock_product(self, product_id: str, quantity: int) -> None:
         """Restock a quantity of a product."""
@@ -55,28 +253,171 @@ class Inventory:
             product.restock(quantity)
         except ValueError as e:
             raise ValueError(f"Error restocking product {product_id}: {str(e)}")
+        self._record({'op': 'restock', 'id': product_id, 'qty': quantity})
+        if self._ledger is not None:
+            self._ledger.record('restock', product, quantity)
 
     def total_inventory_value(self) -> float:
-        """Calculate the total value of all products in inventory."""
-        return sum(product.get_total_value() for product in self._products.values())
+        """Get the total value of all products in inventory."""
+        return self._totals.total_value
+
+    def total_units(self) -> int:
+        """Get the total number of units in stock across all products."""
+        return self._totals.total_units
+
+    def value_by_type(self) -> Dict[str, Dict[str, float]]:
+        """Get stock value, units and product count broken down by product type."""
+        return self._totals.by_type()
+
+    def check_aggregates(self) -> bool:
+        """Recompute the running totals from scratch and report whether they are consistent."""
+        return self._totals.matches(self._products.values())
 
     def remove_expired_products(self) -> List[str]:
         """Remove expired grocery products and return their IDs."""
-        current_date = datetime.now().date()
-        expired_products = [
-            product_id for product_id, product in self._products.items()
-            if isinstance(product, Grocery) and product.is_expired()
-        ]
+        current_date = date.today()
+        expired_products = self._expiry_index.pop_expired(current_date)
         
         for product_id in expired_products:
-            del self._products[product_id]
+            self._unindex_product(self._products.pop(product_id))
+            self._record({'op': 'remove', 'id': product_id})
         
         return expired_products
 
-    def get_low_stock_products(self, threshold: int = 5) -> List[Product]:
-        """Get products with stock below the specified threshold."""
-        return [product for product in self._products.values() 
-                if product.quantity_in_stock <= threshold]
+    def get_expiring_products(self, days: int, today: Optional[date] = None) -> List[Grocery]:
+        """Get grocery products that are not yet expired but expire within the next N days."""
+        if days < 0:
+            raise ValueError("Days cannot be negative")
+        current_date = today if today is not None else date.today()
+        return [self._products[product_id]
+                for product_id in self._expiry_index.expiring_within(days, current_date)]
+
+    def apply_batch(self, transactions: Iterable[Tuple[str, str, int]]) -> BatchResult:
+        """Apply a batch of sells and restocks all-or-nothing.
+
+        The whole batch is validated first, aggregating lines for the same
+        product; if any line is rejected nothing is changed. A valid batch is
+        applied as one net stock change per product and persisted as a single
+        journal record.
+
+        Args:
+            transactions: (op, product_id, quantity) tuples with op 'sell' or 'restock'
+
+        Returns:
+            BatchResult: Per-line results and whether the batch was applied
+        """
+        lines, net = plan_batch(self, transactions)
+        if any(not line.ok for line in lines):
+            return BatchResult(lines, applied=False)
+        for product_id, delta in net.items():
+            product = self._products[product_id]
+            if delta > 0:
+                product.restock(delta)
+            elif delta < 0:
+                product.sell(-delta)
+        if lines:
+            self._record({'op': 'batch',
+                          'lines': [[line.op, line.product_id, line.quantity] for line in lines]})
+            if self._journal is not None:
+                self._journal.sync()
+        if self._ledger is not None:
+            for line in lines:
+                self._ledger.record(line.op, self._products[line.product_id], line.quantity)
+        return BatchResult(lines, applied=True)
+
+    def set_reorder_point(self, product_id: str, reorder_point: int) -> None:
+        """Set the stock level at or below which a product should be reordered."""
+        product = self.get_product(product_id)
+        try:
+            product.set_reorder_point(reorder_point)
+        except ValueError as e:
+            raise ValueError(f"Error setting reorder point for product {product_id}: {str(e)}")
+        self._record({'op': 'reorder', 'id': product_id, 'point': reorder_point})
+
+    def set_prices(self, prices: Iterable[Tuple[str, float]],
+                   list_prices: Optional[Dict[str, float]] = None) -> int:
+        """Change the prices of several products all-or-nothing.
+
+        Every product and price is checked before anything changes. The
+        new prices are persisted as a single journal record.
+
+        Args:
+            prices: (product_id, new_price) pairs
+            list_prices: Grocery ID -> list price to store alongside, as
+                set by expiry markdowns
+
+        Returns:
+            int: Number of products repriced
+
+        Raises:
+            ValueError: If a product doesn't exist or isn't a grocery with
+                a list price, or a price is negative
+        """
+        changes = []
+        for product_id, price in prices:
+            product = self.get_product(product_id)
+            if price < 0:
+                raise ValueError(f"Error repricing product {product_id}: Price cannot be negative")
+            changes.append((product, price))
+        list_changes = []
+        for product_id, list_price in (list_prices or {}).items():
+            product = self.get_product(product_id)
+            if not isinstance(product, Grocery):
+                raise ValueError(f"Error repricing product {product_id}: Only groceries have a list price")
+            if list_price is not None and list_price < 0:
+                raise ValueError(f"Error repricing product {product_id}: List price cannot be negative")
+            list_changes.append((product, list_price))
+        for product, price in changes:
+            self._on_price_change(product, price)
+        repriced = {product.product_id for product, _ in changes}
+        for product, list_price in list_changes:
+            if product.product_id not in repriced:
+                self._bump_version('price', product.product_id)
+            product.set_list_price(list_price)
+        if changes or list_changes:
+            record = {'op': 'price',
+                      'prices': [[product.product_id, price] for product, price in changes]}
+            if list_changes:
+                record['list_prices'] = {product.product_id: list_price
+                                         for product, list_price in list_changes}
+            self._record(record)
+            if self._journal is not None:
+                self._journal.sync()
+        return len(changes)
+
+    def reprice(self, rules: Iterable, today: Optional[date] = None,
+                dry_run: bool = False) -> RepricePlan:
+        """Apply pricing.PriceRule and ExpiryMarkdown rules to every product.
+
+        The rules are evaluated over all products in column passes (see
+        pricing.plan_repricing) and the result is applied with set_prices
+        as one all-or-nothing, journaled change.
+
+        Args:
+            rules: Rules applied in order, each on top of the previous ones
+            today: Reference date for expiry markdowns (defaults to today)
+            dry_run: Only compute the plan, leaving prices unchanged
+
+        Returns:
+            RepricePlan: The price changes and total stock value before and after
+        """
+        plan = plan_repricing(self.snapshot(), list(rules), today)
+        if not dry_run:
+            self.set_prices([(product_id, new) for product_id, _, new in plan.changes],
+                            plan.list_prices)
+            plan.applied = True
+        return plan
+
+    def get_low_stock_products(self, threshold: Optional[int] = None) -> List[Product]:
+        """Get products with stock at or below the threshold, lowest stock first.
+
+        Without a threshold each product is compared against its own reorder point.
+        """
+        if threshold is None:
+            product_ids = self._reorder_index.irange(maximum=0)
+        else:
+            product_ids = self._stock_index.irange(maximum=threshold)
+        return [self._products[product_id] for product_id in product_ids]
 
     def to_dict_list(self) -> List[dict]:
         """Convert all products to a list of dictionaries for serialization."""
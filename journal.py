@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import time
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from exceptions import JournalCorruptedError, JournalLockedError
+from utils import save_inventory_to_file, load_inventory_from_file, product_from_dict
+
+def _file_digest(filename: str) -> str:
+    """Return the SHA-256 hex digest of a file, or '' if it doesn't exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return ''
+    return digest.hexdigest()
+
+class TransactionJournal:
+    """Append-only write-ahead log of inventory mutations.
+
+    The journal pairs a JSON snapshot (the regular inventory.json format) with
+    a file of compact one-line JSON records. The first record is a header that
+    stores the digest of the snapshot the journal applies to, so a crash
+    between writing a new snapshot and resetting the journal is detected and
+    the stale records are not applied twice.
+
+    Every record is flushed to the OS as soon as it is written, so a process
+    crash loses nothing. fsync is batched: it runs once ``sync_every`` records
+    are pending or ``sync_interval`` seconds have passed since the last one.
+
+    The snapshot is JSON by default; pass load_inventory_from_binary and
+    save_inventory_to_binary as ``load``/``save`` to use a binary snapshot.
+
+    recover() takes an exclusive lock on ``<journal>.lock`` that is held
+    until close(), so only one process at a time can append to and compact
+    the journal. Compaction replaces the journal file, and a second writer
+    would keep appending to the replaced one and lose its records.
+    replay() and pending_records() only read and never need the lock.
+    """
+
+    def __init__(self, filename: str, snapshot_filename: str, sync_every: int = 32,
+                 sync_interval: float = 1.0, compact_every: int = 10000,
+                 load: Callable = load_inventory_from_file, save: Callable = save_inventory_to_file):
+        self.filename = filename
+        self.snapshot_filename = snapshot_filename
+        self._load = load
+        self._save = save
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+        self.lock_filename = filename + '.lock'
+        self._file = None
+        self._lock_file = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._record_count = 0
+
+    @property
+    def record_count(self) -> int:
+        """Number of records written since the last snapshot."""
+        return self._record_count
+
+    def recover(self, inventory) -> int:
+        """Load the snapshot and replay the journal into an inventory.
+
+        A torn last record (left by a crash mid-append) is discarded and the
+        file is truncated back to the last complete record. After recovery
+        the journal is attached to the inventory so further mutations are
+        logged. On a first run without a snapshot, a starting snapshot is
+        written so the journal has something to follow.
+
+        Args:
+            inventory: An empty Inventory instance to load into
+
+        Returns:
+            int: The number of journal records replayed
+
+        Raises:
+            JournalLockedError: If another process holds the journal
+            InvalidProductDataError: If the snapshot can't be loaded
+            JournalCorruptedError: If a record before the tail is unreadable
+        """
+        self._close_file()
+        self.acquire()
+        first_run = not os.path.exists(self.snapshot_filename)
+        self._load(inventory, self.snapshot_filename)
+        header, records, good_size = self._read_records()
+
+        if header is None or header.get('digest') != _file_digest(self.snapshot_filename):
+            # Missing journal, or one that predates the current snapshot
+            self._reset()
+            records = []
+        else:
+            if good_size != os.path.getsize(self.filename):
+                with open(self.filename, 'rb+') as f:
+                    f.truncate(good_size)
+                    os.fsync(f.fileno())
+            for record in records:
+                self._apply(inventory, record)
+            self._open()
+
+        self._record_count = len(records)
+        if first_run:
+            self.compact(inventory)
+        inventory.attach_journal(self)
+        return len(records)
+
+    @property
+    def locked(self) -> bool:
+        """Whether this journal object holds the owner lock."""
+        return self._lock_file is not None
+
+    def acquire(self) -> None:
+        """Take the exclusive owner lock without waiting; a no-op if already held.
+
+        Raises:
+            JournalLockedError: If another process (or journal object) holds it
+        """
+        if self._lock_file is not None:
+            return
+        lock_file = open(self.lock_filename, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise JournalLockedError(
+                f"Journal {self.filename} is in use by another process") from None
+        self._lock_file = lock_file
+
+    def release(self) -> None:
+        """Give up the owner lock; the lock file itself is left in place."""
+        if self._lock_file is None:
+            return
+        if fcntl is None:
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._lock_file.close()
+        self._lock_file = None
+
+    def pending_records(self) -> int:
+        """Number of records recover() would replay on top of the current snapshot."""
+        header, records, _ = self._read_records()
+        if header is None or header.get('digest') != _file_digest(self.snapshot_filename):
+            return 0
+        return len(records)
+
+    def replay(self, inventory) -> int:
+        """Load the snapshot and apply the journal without touching either file.
+
+        Unlike recover(), a torn tail is only skipped, nothing is truncated
+        or reset, and the journal is not attached. This makes it safe for
+        read-only reporting while another process owns the files.
+
+        Returns:
+            int: The number of journal records applied
+        """
+        self._load(inventory, self.snapshot_filename)
+        header, records, _ = self._read_records()
+        if header is None or header.get('digest') != _file_digest(self.snapshot_filename):
+            return 0
+        for record in records:
+            self._apply(inventory, record)
+        return len(records)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one mutation record to the journal."""
+        if self._file is None:
+            self._open()
+        self._file.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+        self._file.flush()
+        self._pending += 1
+        self._record_count += 1
+        if (self._pending >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self) -> None:
+        """Force pending records to stable storage."""
+        if self._file is not None and self._pending:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def should_compact(self) -> bool:
+        """Whether enough records have accumulated to warrant a new snapshot."""
+        return self._record_count >= self.compact_every
+
+    def compact(self, inventory) -> None:
+        """Write a fresh snapshot of the inventory and start an empty journal.
+
+        The snapshot save replaces the old file atomically before the
+        journal is reset.
+        """
+        self.sync()
+        self._save(inventory, self.snapshot_filename)
+        self._close_file()
+        self._reset()
+        self._record_count = 0
+
+    def close(self) -> None:
+        """Sync and close the journal file and release the owner lock."""
+        self._close_file()
+        self.release()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        self.acquire()
+        self._file = open(self.filename, 'ab')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _reset(self) -> None:
+        """Replace the journal with one holding only a header for the current snapshot."""
+        header = {'op': 'base', 'digest': _file_digest(self.snapshot_filename)}
+        tmp_journal = self.filename + '.tmp'
+        with open(tmp_journal, 'wb') as f:
+            f.write(json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_journal, self.filename)
+        self._open()
+
+    def _read_records(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """Read the header and complete records, plus the byte size they occupy."""
+        try:
+            with open(self.filename, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None, [], 0
+
+        lines = data.split(b'\n')
+        # Everything after the last newline is an incomplete (torn) record
+        complete = lines[:-1]
+        parsed = []
+        good_size = 0
+        for index, line in enumerate(complete):
+            try:
+                parsed.append(json.loads(line))
+            except ValueError:
+                if index == len(complete) - 1 and not lines[-1]:
+                    # Last record was newline-terminated but garbled
+                    break
+                raise JournalCorruptedError(
+                    f"Unreadable record {index + 1} in journal {self.filename}")
+            good_size += len(line) + 1
+
+        if not parsed or parsed[0].get('op') != 'base':
+            return None, [], 0
+        return parsed[0], parsed[1:], good_size
+
+    @staticmethod
+    def _apply(inventory, record: Dict[str, Any]) -> None:
+        op = record['op']
+        if op == 'add':
+            inventory.add_product(product_from_dict(record['product']))
+        elif op == 'upsert':
+            inventory.upsert_products([product_from_dict(record['product'])])
+        elif op == 'remove':
+            inventory.remove_product(record['id'])
+        elif op == 'sell':
+            inventory.sell_product(record['id'], record['qty'])
+        elif op == 'restock':
+            inventory.restock_product(record['id'], record['qty'])
+        elif op == 'reorder':
+            inventory.set_reorder_point(record['id'], record['point'])
+        elif op == 'price':
+            inventory.set_prices([tuple(change) for change in record['prices']],
+                                 record.get('list_prices'))
+        elif op == 'batch':
+            result = inventory.apply_batch([tuple(line) for line in record['lines']])
+            if not result.applied:
+                raise JournalCorruptedError(f"Journaled batch no longer applies: {result.errors[0].error}")
+        else:
+            raise JournalCorruptedError(f"Unknown journal operation: {op}")
@@ -0,0 +1,221 @@
+import heapq
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from product import Product, Grocery
+from query import Query
+from search_index import match_key
+from shared_inventory import SharedInventory
+from journal import TransactionJournal
+from utils import product_from_dict
+
+T = TypeVar('T')
+
+# Location names double as file names for the per-location snapshot and journal
+_LOCATION_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]*$')
+
+class PartitionedInventory:
+    """Stock for several locations (stores, warehouses), one shard each.
+
+    Every location is its own SharedInventory with its own snapshot and
+    journal in the data directory (<location>.json, <location>.journal),
+    so a sale at one store appends to that store's journal and compacts
+    only that store's snapshot. The same product ID may be stocked at
+    several locations; each shard holds its own copy and stock count.
+
+    Cross-location queries run once per shard on a thread pool and the
+    partial results are merged. Shards lock independently, so queries on
+    different locations don't wait for each other or for sales elsewhere.
+    """
+
+    def __init__(self, directory: Optional[str] = None, workers: Optional[int] = None):
+        """
+        Args:
+            directory: Where shard snapshots and journals live, or None to keep
+                everything in memory
+            workers: Threads used to fan out cross-location queries (defaults
+                to one per location, up to 8)
+        """
+        self.directory = directory
+        self.workers = workers
+        self._shards: Dict[str, SharedInventory] = {}
+        self._journals: Dict[str, TransactionJournal] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def open(cls, directory: str, workers: Optional[int] = None) -> 'PartitionedInventory':
+        """Recover every location that has a journal in directory."""
+        inventory = cls(directory, workers)
+        for filename in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(filename)
+            if extension == '.journal' and _LOCATION_NAME.match(name):
+                inventory.add_location(name)
+        return inventory
+
+    @property
+    def locations(self) -> List[str]:
+        return list(self._shards)
+
+    def add_location(self, name: str) -> SharedInventory:
+        """Create a location, or recover it from its files if they exist.
+
+        Raises:
+            ValueError: If the name is invalid or the location already exists
+        """
+        if not _LOCATION_NAME.match(name):
+            raise ValueError(f"Invalid location name '{name}': use letters, digits, '-' and '_'")
+        if name in self._shards:
+            raise ValueError(f"Location '{name}' already exists.")
+        shard = SharedInventory()
+        if self.directory is not None:
+            journal = TransactionJournal(os.path.join(self.directory, f"{name}.journal"),
+                                         os.path.join(self.directory, f"{name}.json"))
+            journal.recover(shard)
+            self._journals[name] = journal
+        self._shards[name] = shard
+        self._close_executor()
+        return shard
+
+    def location(self, name: str) -> SharedInventory:
+        """The inventory of one location; sell, restock and add products through it."""
+        if name not in self._shards:
+            raise ValueError(f"Location '{name}' not found.")
+        return self._shards[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._shards
+
+    def __len__(self) -> int:
+        return len(self._shards)
+
+    def compact(self) -> None:
+        """Write a fresh snapshot of every location; a no-op without a data directory."""
+        if self.directory is not None:
+            self._fan_out(lambda shard: shard.compact())
+
+    def close(self) -> None:
+        """Shut down the query threads and close every journal."""
+        self._close_executor()
+        for journal in self._journals.values():
+            journal.close()
+
+    def _close_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _fan_out(self, function: Callable[[SharedInventory], T]) -> Dict[str, T]:
+        """Run function on every shard concurrently and return results by location."""
+        if len(self._shards) <= 1:
+            return {name: function(shard) for name, shard in self._shards.items()}
+        if self._executor is None:
+            workers = self.workers or min(len(self._shards), 8)
+            self._executor = ThreadPoolExecutor(workers, thread_name_prefix='location-query')
+        futures = {name: self._executor.submit(function, shard) for name, shard in self._shards.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def transfer(self, product_id: str, source: str, destination: str, quantity: int) -> None:
+        """Move stock of a product from one location to another.
+
+        The source is debited first, which fails without changing anything
+        if it has too little stock. The destination is then credited: under
+        its write lock, it either restocks its copy of the product or adds
+        a copy holding the transferred units, so concurrent transfers to a
+        location that doesn't carry the product yet can't both add it. If
+        crediting fails the source is restocked. Each side is its own
+        journal record, so a crash between the two can lose the units in
+        transit but never duplicate them.
+
+        Raises:
+            ValueError: If a location or the product is unknown, the
+                quantity isn't positive, or the source has too little stock
+        """
+        if source == destination:
+            raise ValueError("Source and destination must be different locations")
+        if quantity <= 0:
+            raise ValueError("Transfer quantity must be positive")
+        source_shard = self.location(source)
+        destination_shard = self.location(destination)
+        product = source_shard.get_product(product_id)
+        data = product.to_dict()
+        try:
+            source_shard.sell_product(product_id, quantity)
+        except ValueError as e:
+            raise ValueError(f"Error transferring product {product_id} from {source}: {e}") from None
+        try:
+            with destination_shard.exclusive():
+                if product_id in destination_shard:
+                    destination_shard.restock_product(product_id, quantity)
+                else:
+                    data['quantity_in_stock'] = quantity
+                    destination_shard.add_product(product_from_dict(data))
+        except Exception:
+            source_shard.restock_product(product_id, quantity)
+            raise
+
+    def stock_by_location(self, product_id: str) -> Dict[str, int]:
+        """Units of a product at each location that carries it."""
+        return {name: shard.get_product(product_id).quantity_in_stock
+                for name, shard in self._shards.items() if product_id in shard}
+
+    def total_inventory_value(self) -> float:
+        return sum(self.value_by_location().values())
+
+    def value_by_location(self) -> Dict[str, float]:
+        return self._fan_out(lambda shard: shard.total_inventory_value())
+
+    def total_units(self) -> int:
+        return sum(self._fan_out(lambda shard: shard.total_units()).values())
+
+    def value_by_type(self) -> Dict[str, Dict[str, float]]:
+        """Stock value, units and product count by type, summed over locations."""
+        merged: Dict[str, Dict[str, float]] = {}
+        for by_type in self._fan_out(lambda shard: shard.value_by_type()).values():
+            for product_type, totals in by_type.items():
+                row = merged.setdefault(product_type, dict.fromkeys(totals, 0))
+                for key, value in totals.items():
+                    row[key] += value
+        return merged
+
+    def get_low_stock_products(self, threshold: Optional[int] = None) -> List[Tuple[str, Product]]:
+        """(location, product) pairs at or below the threshold, lowest stock first."""
+        results = self._fan_out(lambda shard: shard.get_low_stock_products(threshold))
+        if threshold is not None:
+            key = lambda pair: pair[1].quantity_in_stock
+        else:
+            # Each shard orders by stock minus reorder point
+            key = lambda pair: pair[1].quantity_in_stock - pair[1].reorder_point
+        return list(heapq.merge(*([(name, product) for product in products]
+                                  for name, products in results.items()), key=key))
+
+    def get_expiring_products(self, days: int, today: Optional[date] = None) -> List[Tuple[str, Grocery]]:
+        """(location, product) pairs expiring within the next N days, soonest first."""
+        results = self._fan_out(lambda shard: shard.get_expiring_products(days, today))
+        return list(heapq.merge(*([(name, product) for product in products]
+                                  for name, products in results.items()),
+                                key=lambda pair: pair[1].expiry))
+
+    def remove_expired_products(self) -> Dict[str, List[str]]:
+        """Remove expired groceries everywhere; returns the removed IDs by location."""
+        return self._fan_out(lambda shard: shard.remove_expired_products())
+
+    def search_by_name(self, name: str, limit: Optional[int] = None) -> List[Tuple[str, Product]]:
+        """(location, product) pairs whose name contains name, best matches first."""
+        results = self._fan_out(lambda shard: shard.search_by_name(name, limit))
+        merged = heapq.merge(*([(name_key, location, product) for product in products
+                                for name_key in [match_key(product.name, name)]]
+                               for location, products in results.items()),
+                             key=lambda entry: entry[0])
+        return [(location, product) for _, location, product in merged][:limit]
+
+    def query(self, query: Optional[Query] = None, limit: Optional[int] = None,
+              **filters) -> List[Tuple[str, Product]]:
+        """(location, product) pairs matching the filters, grouped by location."""
+        results = self._fan_out(lambda shard: shard.query(query, limit, **filters))
+        pairs = [(name, product) for name, products in results.items() for product in products]
+        return pairs if limit is None else pairs[:limit]
@@ -0,0 +1,272 @@
+import functools
+import io
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pstats
+
+# Upper bounds in seconds, 1 microsecond to 10 seconds in 1-2.5-5 steps
+BUCKETS = tuple(float(f"{m}e{e}") for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+
+class Histogram:
+    """Fixed-bucket latency histogram.
+
+    Observing is one bisect over a short tuple plus a few increments under an
+    uncontended lock, so it is cheap enough for per-sale hot paths. Quantiles
+    are estimated as the upper bound of the bucket that contains them.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if error:
+                self.errors += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.errors = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile (0..1) in seconds."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """(upper bound, cumulative count) pairs, ending with +Inf."""
+        with self._lock:
+            counts = list(self._counts)
+        result = []
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            result.append((bound, seen))
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            'calls': self.count,
+            'errors': self.errors,
+            'total_ms': self.total * 1e3,
+            'mean_us': mean * 1e6,
+            'p50_us': self.quantile(0.5) * 1e6,
+            'p95_us': self.quantile(0.95) * 1e6,
+            'p99_us': self.quantile(0.99) * 1e6,
+            'max_us': self.max * 1e6,
+        }
+
+class MetricsRegistry:
+    """Named histograms plus the switch that turns collection on and off.
+
+    Two kinds of hooks feed it. Module functions such as the utils save and
+    load helpers are decorated with timed() once and check the switch on
+    every call. Methods of registered classes are wrapped only while
+    metrics are enabled, so the hot Inventory methods cost nothing when
+    collection is off.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.RLock()
+        self._classes: List[type] = []
+        self._originals: Dict[Tuple[type, str], Callable] = {}
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        self.histogram(name).observe(seconds, error)
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        """Time a block under name when metrics are enabled."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, error)
+
+    def _wrap(self, name: str, function: Callable) -> Callable:
+        histogram = self.histogram(name)
+        clock = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                histogram.observe(clock() - start, True)
+                raise
+            histogram.observe(clock() - start)
+            return result
+
+        return wrapper
+
+    def timed(self, name: Optional[str] = None) -> Callable[[Callable], Callable]:
+        """Decorator recording calls to a function while metrics are enabled."""
+        def decorator(function: Callable) -> Callable:
+            metric = name or f"{function.__module__}.{function.__qualname__}"
+            timed_function = self._wrap(metric, function)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    return timed_function(*args, **kwargs)
+                return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_class(self, cls: type) -> None:
+        """Have enable() wrap the public methods defined directly on cls."""
+        if cls not in self._classes:
+            self._classes.append(cls)
+            if self.enabled:
+                self._instrument(cls)
+
+    def _instrument(self, cls: type) -> None:
+        for attribute, value in list(vars(cls).items()):
+            if attribute.startswith('_') and attribute not in ('__contains__', '__len__'):
+                continue
+            if not callable(value) or isinstance(value, (staticmethod, classmethod, type)):
+                continue
+            if (cls, attribute) in self._originals:
+                continue
+            self._originals[(cls, attribute)] = value
+            setattr(cls, attribute, self._wrap(f"{cls.__name__}.{attribute}", value))
+
+    def enable(self) -> None:
+        """Start collecting; wraps the methods of every registered class."""
+        with self._lock:
+            if self.enabled:
+                return
+            for cls in self._classes:
+                self._instrument(cls)
+            self.enabled = True
+
+    def disable(self) -> None:
+        """Stop collecting and restore the original methods. Recorded data is kept."""
+        with self._lock:
+            if not self.enabled:
+                return
+            for (cls, attribute), original in self._originals.items():
+                setattr(cls, attribute, original)
+            self._originals.clear()
+            self.enabled = False
+
+    def reset(self) -> None:
+        """Drop all recorded measurements."""
+        # Cleared in place: wrappers hold on to their histogram objects
+        for histogram in list(self._histograms.values()):
+            histogram.clear()
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        """Histograms that have recorded at least one call, by name."""
+        return {name: histogram for name, histogram in sorted(self._histograms.items())
+                if histogram.count}
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per metric, for tables."""
+        return [dict(name=name, **histogram.summary()) for name, histogram in self.snapshot().items()]
+
+    def to_prometheus(self, prefix: str = 'inventory') -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_call_duration_seconds Time spent in instrumented calls.",
+            f"# TYPE {prefix}_call_duration_seconds histogram",
+        ]
+        errors = [
+            f"# HELP {prefix}_call_errors_total Instrumented calls that raised.",
+            f"# TYPE {prefix}_call_errors_total counter",
+        ]
+        for name, histogram in self.snapshot().items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, count in histogram.cumulative_counts():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_call_duration_seconds_bucket{{name="{label}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_call_duration_seconds_sum{{name="{label}"}} {histogram.total!r}')
+            lines.append(f'{prefix}_call_duration_seconds_count{{name="{label}"}} {histogram.count}')
+            errors.append(f'{prefix}_call_errors_total{{name="{label}"}} {histogram.errors}')
+        return '\n'.join(lines + errors) + '\n'
+
+    def write_prometheus(self, filename: str, prefix: str = 'inventory') -> None:
+        """Write to_prometheus() to a file, e.g. for the node_exporter textfile collector."""
+        from utils import atomic_write
+        with atomic_write(filename, 'w') as f:
+            f.write(self.to_prometheus(prefix))
+
+# Process-wide registry used by the app and the decorated utils functions
+REGISTRY = MetricsRegistry()
+timed = REGISTRY.timed
+
+def profile(function: Callable[[], Any], sort: str = 'cumulative',
+            limit: int = 40) -> Tuple[Any, str, 'pstats.Stats']:
+    """Run function under cProfile.
+
+    Returns:
+        The function's result, a printable report of the top entries, and the raw stats
+    """
+    # Imported here: the profiler modules are only needed when someone profiles
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(function)
+    finally:
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats(sort).print_stats(limit)
+    return result, output.getvalue(), stats
+
+def enable_from_environment(classes: Iterable[type] = ()) -> bool:
+    """Register classes and enable metrics if INVENTORY_METRICS is set to a true value."""
+    for cls in classes:
+        REGISTRY.register_class(cls)
+    if os.environ.get('INVENTORY_METRICS', '').lower() in ('1', 'true', 'yes', 'on'):
+        REGISTRY.enable()
+    return REGISTRY.enabled
@@ -0,0 +1,146 @@
+import threading
+import time
+from typing import Callable, Optional
+
+class BackgroundWriter:
+    """Daemon thread that persists an inventory off the request path.
+
+    Callers only mark the inventory dirty with request(); the thread waits
+    for a quiet debounce window and then runs one save for the whole burst,
+    so a stream of sales costs one write per window instead of one per sale.
+    The version is read before each save: if it moved while the save ran,
+    another write is scheduled, so the newest state is always persisted
+    eventually. The save callable is expected to be atomic (see
+    utils.atomic_write); a failed save keeps the writer dirty and is retried.
+    """
+
+    def __init__(self, save: Callable[[], None], version: Callable[[], int],
+                 debounce: float = 1.0, max_delay: Optional[float] = None):
+        """
+        Args:
+            save: Writes the current state, e.g. SharedInventory.compact
+            version: Returns the current inventory version
+            debounce: Seconds without new requests before writing
+            max_delay: Longest a request may wait under a constant stream
+                of mutations (defaults to 5 * debounce)
+        """
+        if debounce < 0:
+            raise ValueError("Debounce must not be negative")
+        self._save = save
+        self._version = version
+        self.debounce = debounce
+        self.max_delay = 5 * debounce if max_delay is None else max_delay
+        self._cond = threading.Condition()
+        self._dirty_since: Optional[float] = None
+        self._last_request = 0.0
+        self._flush_requested = False
+        self._closed = False
+        self._persisted_version = version()
+        self._last_error: Optional[Exception] = None
+        self._attempts = 0
+        self._thread = threading.Thread(target=self._run, name="inventory-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def last_persisted_version(self) -> int:
+        """Inventory version contained in the most recent successful save."""
+        return self._persisted_version
+
+    @property
+    def pending(self) -> bool:
+        """Whether changes are waiting to be written."""
+        with self._cond:
+            return self._dirty_since is not None or self._version() != self._persisted_version
+
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Exception raised by the last save, or None if it succeeded."""
+        return self._last_error
+
+    def request(self) -> None:
+        """Mark the inventory dirty; the write happens after the debounce window."""
+        with self._cond:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_request = now
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write immediately and wait until the current version is persisted.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if the version current at the call has been persisted,
+                False on timeout or if a save failed in the meantime
+        """
+        target = self._version()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._persisted_version >= target:
+                return True
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._flush_requested = True
+            self._cond.notify_all()
+            attempts = self._attempts
+            while self._persisted_version < target:
+                if self._closed or (self._attempts > attempts and self._last_error is not None):
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, flush: bool = True) -> None:
+        """Stop the writer thread, writing any pending changes first."""
+        if flush and not self._closed:
+            self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _due_in(self, now: float) -> Optional[float]:
+        """Seconds until the pending write is due, or None if nothing is pending."""
+        if self._dirty_since is None:
+            return None
+        if self._flush_requested:
+            return 0.0
+        return max(0.0, min(self._last_request + self.debounce,
+                            self._dirty_since + self.max_delay) - now)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    wait = self._due_in(time.monotonic())
+                    if wait == 0.0:
+                        break
+                    self._cond.wait(wait)
+                if self._closed:
+                    return
+                self._dirty_since = None
+                self._flush_requested = False
+            version = self._version()
+            try:
+                self._save()
+            except Exception as e:
+                with self._cond:
+                    self._attempts += 1
+                    self._last_error = e
+                    if self._dirty_since is None:
+                        self._dirty_since = time.monotonic()
+                    self._last_request = time.monotonic()
+                    self._cond.notify_all()
+                continue
+            with self._cond:
+                self._attempts += 1
+                self._last_error = None
+                self._persisted_version = max(self._persisted_version, version)
+                if self._version() != version and self._dirty_since is None:
+                    self._dirty_since = self._last_request = time.monotonic()
+                self._cond.notify_all()
@@ -0,0 +1,370 @@
+import asyncio
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from batch import SELL, RESTOCK
+from query import Query
+
+# Longest request line or header we accept, and the largest JSON body
+_MAX_LINE = 8192
+_MAX_BODY = 1 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class StockBatcher:
+    """Coalesces concurrent sells and restocks into one apply_batch call.
+
+    The first request to arrive opens a window of batch_window seconds;
+    everything submitted before it closes (or until max_batch lines are
+    waiting) is validated and applied as a single batch, which the
+    inventory persists as one journal record. Lines that fail validation
+    are answered with their error and the rest of the batch is applied
+    without them, so one bad request never fails its neighbours.
+
+    Batches run in the loop's default executor, since apply_batch takes the
+    inventory's write lock and syncs the journal; the event loop keeps
+    serving terminals meanwhile. One batch is applied at a time, and lines
+    that arrive while it runs are collected into the next one.
+    """
+
+    def __init__(self, inventory, batch_window: float = 0.005, max_batch: int = 256):
+        self.inventory = inventory
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Tuple[str, str, int], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._applying = asyncio.Lock()
+        self.batches = 0
+        self.lines = 0
+
+    def submit(self, op: str, product_id: str, quantity: int) -> asyncio.Future:
+        """Queue a line; the future resolves to (error or None, stock after)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((op, product_id, quantity), future))
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._schedule_flush)
+        return future
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Apply every waiting line as one batch and resolve their futures."""
+        async with self._applying:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            self.batches += 1
+            self.lines += len(pending)
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(
+                    None, self._apply, [line for line, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _apply(self, lines: List[Tuple[str, str, int]]) -> List[Tuple[Optional[str], Optional[int]]]:
+        """Apply lines, dropping rejected ones until the rest applies; returns (error, stock after) per line."""
+        results: List[Tuple[Optional[str], Optional[int]]] = [(None, None)] * len(lines)
+        indexes = list(range(len(lines)))
+        while indexes:
+            result = self.inventory.apply_batch([lines[index] for index in indexes])
+            if result.applied:
+                for index, line in zip(indexes, result.lines):
+                    results[index] = (None, line.stock_after)
+                break
+            remaining = []
+            for index, line in zip(indexes, result.lines):
+                if line.ok:
+                    remaining.append(index)
+                else:
+                    results[index] = (line.error, None)
+            indexes = remaining
+        return results
+
+class InventoryAPI:
+    """Minimal asyncio HTTP/1.1 JSON service for checkout terminals.
+
+    Routes:
+        GET  /health
+        GET  /stats                        batching statistics
+        GET  /products/<id>                product lookup
+        GET  /search?name=..&limit=..      name search
+        GET  /search?type=..&brand=..&min_price=..&max_stock=..  attribute query
+        POST /sell     {"product_id": .., "quantity": ..}
+        POST /restock  {"product_id": .., "quantity": ..}
+
+    Connections are kept alive between requests. Stock changes and lookups
+    run in the event loop's default executor so a held inventory lock
+    never stalls other terminals; the inventory must therefore be
+    thread-safe, i.e. a SharedInventory, which also lets the service run
+    next to the Streamlit app in the same process.
+    """
+
+    def __init__(self, inventory, batch_window: float = 0.005, max_batch: int = 256,
+                 search_limit: int = 100):
+        self.inventory = inventory
+        self.batcher = StockBatcher(inventory, batch_window, max_batch)
+        self.search_limit = search_limit
+        self.requests = 0
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if len(line) > _MAX_LINE:
+            raise HTTPError(400, "Request line too long")
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(line) > _MAX_LINE:
+                raise HTTPError(400, "Header line too long")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        # Plain ASCII digits only: int() would also take signs, spaces and underscores
+        content_length = headers.get('content-length') or '0'
+        if not (content_length.isascii() and content_length.isdigit()):
+            raise HTTPError(400, "Invalid Content-Length")
+        length = int(content_length)
+        if length > _MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any,
+                       keep_alive: bool) -> None:
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        """Route one request and return (status, JSON payload)."""
+        self.requests += 1
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if path in ('/sell', '/restock'):
+            if method != 'POST':
+                raise HTTPError(405, f"{path} requires POST")
+            return await self._stock_change(SELL if path == '/sell' else RESTOCK, body)
+        if method != 'GET':
+            raise HTTPError(405, f"{path} requires GET")
+        if path == '/stats':
+            batches = self.batcher.batches
+            return 200, {'requests': self.requests, 'batches': batches, 'lines': self.batcher.lines,
+                         'mean_batch_size': self.batcher.lines / batches if batches else 0.0}
+        # Every inventory call, even len(), may take the backend's locks or query
+        # its database, so it runs in the executor rather than on the event loop
+        loop = asyncio.get_running_loop()
+        if path == '/health':
+            return 200, {'status': 'ok', 'products': await loop.run_in_executor(None, len, self.inventory)}
+        if path.startswith('/products/'):
+            product_id = unquote(path[len('/products/'):])
+            return 200, await loop.run_in_executor(None, self._product, product_id)
+        if path == '/search':
+            products = await loop.run_in_executor(None, self._search, params)
+            return 200, [product.to_dict() for product in products]
+        raise HTTPError(404, f"No route for {path}")
+
+    def _product(self, product_id: str) -> Dict[str, Any]:
+        try:
+            return self.inventory.get_product(product_id).to_dict()
+        except ValueError as e:
+            raise HTTPError(404, str(e))
+
+    def _search(self, params: Dict[str, str]):
+        try:
+            limit = min(int(params.pop('limit', self.search_limit)), self.search_limit)
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        name = params.pop('name', None)
+        if name is not None:
+            if params:
+                raise HTTPError(400, "name can't be combined with other filters")
+            return self.inventory.search_by_name(name, limit)
+        filters: Dict[str, Any] = {}
+        converters = {'min_price': float, 'max_price': float, 'min_stock': int, 'max_stock': int}
+        for key, value in params.items():
+            if key == 'type':
+                filters['product_type'] = value
+            elif key in ('brand', 'size', 'material'):
+                filters[key] = value
+            elif key in converters:
+                try:
+                    filters[key] = converters[key](value)
+                except ValueError:
+                    raise HTTPError(400, f"Invalid value for {key}: {value}")
+            else:
+                raise HTTPError(400, f"Unknown search parameter: {key}")
+        return self.inventory.query(Query(**filters), limit=limit)
+
+    async def _stock_change(self, op: str, body: bytes) -> Tuple[int, Any]:
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        product_id = data.get('product_id')
+        quantity = data.get('quantity', 1)
+        if not isinstance(product_id, str):
+            raise HTTPError(400, "product_id is required")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise HTTPError(400, "quantity must be a positive integer")
+        error, stock = await self.batcher.submit(op, product_id, quantity)
+        if error is not None:
+            exists = await asyncio.get_running_loop().run_in_executor(
+                None, self.inventory.__contains__, product_id)
+            raise HTTPError(409 if exists else 404, error)
+        return 200, {'product_id': product_id, op: quantity, 'quantity_in_stock': stock}
+
+async def serve(api: InventoryAPI, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+    """Start listening; the returned server runs until closed."""
+    return await asyncio.start_server(api.handle_connection, host, port)
+
+class BackgroundServer:
+    """Runs an InventoryAPI on its own event loop in a daemon thread."""
+
+    def __init__(self, api: InventoryAPI, host: str = '127.0.0.1', port: int = 8765):
+        self.api = api
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._server: Optional[asyncio.AbstractServer] = None
+        started = threading.Event()
+        failure: List[BaseException] = []
+
+        def run() -> None:
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(serve(api, host, port))
+                self.port = self._server.sockets[0].getsockname()[1]
+            except BaseException as e:
+                failure.append(e)
+                return
+            finally:
+                started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='inventory-api', daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            raise failure[0]
+
+    def stop(self) -> None:
+        """Apply pending lines, drop open connections and end the thread."""
+        async def shutdown() -> None:
+            await self.api.batcher.flush()
+            self._server.close()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+def main(argv=None) -> int:
+    import argparse
+    import sys
+    from shared_inventory import SharedInventory
+    from journal import TransactionJournal
+    from exceptions import JournalLockedError
+
+    parser = argparse.ArgumentParser(description="Serve the inventory to POS terminals over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--snapshot', default='inventory.json')
+    parser.add_argument('--journal', default='inventory.journal')
+    parser.add_argument('--batch-window', type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    inventory = SharedInventory()
+    journal = TransactionJournal(args.journal, args.snapshot)
+    try:
+        journal.recover(inventory)
+    except JournalLockedError as e:
+        # The app (or another server) owns these files; serve from it with INVENTORY_API_PORT
+        print(f"{e}; set INVENTORY_API_PORT on the app instead", file=sys.stderr)
+        return 1
+    api = InventoryAPI(inventory, args.batch_window)
+
+    async def run() -> None:
+        server = await serve(api, args.host, args.port)
+        print(f"Serving {len(inventory)} products on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        journal.close()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
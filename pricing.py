@@ -0,0 +1,230 @@
+import math
+import operator
+from array import array
+from bisect import bisect_left
+from datetime import date
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from product import Product, Grocery
+
+class PriceRule:
+    """Percentage and/or absolute price change for the products matching some filters.
+
+    The percentage is applied first, then the amount is added, so
+    PriceRule(percent=-10, amount=-1) takes 10% off and then another dollar.
+    A marked-down grocery's list price changes the same way, so its
+    markdown keeps applying to the new regular price.
+    Filters are combined with AND; brand and material match
+    case-insensitively and product_type matches subclasses, as in Query.
+
+    Args:
+        percent: Change in percent of the current price (-15 is 15% off)
+        amount: Absolute change added after the percentage
+        product_type: Product class or type name such as 'Electronics'
+        brand: Only products of this brand
+        material: Only products of this material
+    """
+
+    def __init__(self, percent: float = 0.0, amount: float = 0.0,
+                 product_type: Union[Type[Product], str, None] = None,
+                 brand: Optional[str] = None, material: Optional[str] = None):
+        if not percent and not amount:
+            raise ValueError("A price rule needs a percent or an amount")
+        self.percent = percent
+        self.amount = amount
+        self.product_type = product_type
+        self.brand = brand
+        self.material = material
+
+    def apply(self, columns: 'PriceColumns', prices: array, list_prices: array) -> Tuple[array, array]:
+        mask = columns.mask(self.product_type, brand=self.brand, material=self.material)
+        factor = 1 + self.percent / 100
+        amount = self.amount
+        # NaN list prices (no markdown in effect) stay NaN
+        return (array('d', [price * factor + amount if match else price
+                            for price, match in zip(prices, mask)]),
+                array('d', [price * factor + amount if match else price
+                            for price, match in zip(list_prices, mask)]))
+
+    def __repr__(self) -> str:
+        filters = ''.join(f", {name}={getattr(self, name)!r}"
+                          for name in ('product_type', 'brand', 'material')
+                          if getattr(self, name) is not None)
+        return f"PriceRule(percent={self.percent!r}, amount={self.amount!r}{filters})"
+
+class ExpiryMarkdown:
+    """Tiered markdown for groceries close to their expiry date.
+
+    A grocery expiring within a tier's number of days (0 meaning today)
+    gets that tier's percentage off; when several tiers cover it, the
+    tightest one wins. Expired groceries are left alone for
+    remove_expired_products().
+
+    The percentage is taken off the grocery's list price, which is set to
+    the current price the first time it is marked down, so running the
+    same markdown again changes nothing and moving into a tighter tier
+    replaces the earlier markdown instead of compounding it.
+
+    Args:
+        tiers: (days, percent off) pairs, e.g. [(3, 25), (1, 50)]
+    """
+
+    def __init__(self, tiers: Iterable[Tuple[int, float]]):
+        tiers = sorted(tiers)
+        if not tiers:
+            raise ValueError("A markdown needs at least one tier")
+        days = [day for day, _ in tiers]
+        if days[0] < 0 or len(set(days)) != len(days):
+            raise ValueError("Markdown tier days must be distinct and not negative")
+        if any(not 0 <= percent <= 100 for _, percent in tiers):
+            raise ValueError("Markdown percentages must be between 0 and 100")
+        self.tiers = tiers
+        # Price factor by days left, 0 through the widest tier
+        self._factors = [1 - tiers[bisect_left(days, day)][1] / 100 for day in range(days[-1] + 1)]
+
+    def apply(self, columns: 'PriceColumns', prices: array, list_prices: array) -> Tuple[array, array]:
+        factors = self._factors
+        horizon = len(factors)
+        # Base is the list price if one is stored (not NaN), else the current price
+        bases = array('d', [price if list_price != list_price or not 0 <= days < horizon else list_price
+                            for price, list_price, days in zip(prices, list_prices, columns.days_left)])
+        return (array('d', [base * factors[days] if 0 <= days < horizon else price
+                            for price, base, days in zip(prices, bases, columns.days_left)]),
+                array('d', [base if 0 <= days < horizon else list_price
+                            for list_price, base, days in zip(list_prices, bases, columns.days_left)]))
+
+    def __repr__(self) -> str:
+        return f"ExpiryMarkdown({self.tiers!r})"
+
+class PriceColumns:
+    """The product attributes repricing rules read, copied once into columns.
+
+    Non-groceries have days_left -1, like expired groceries, so no markdown
+    ever reaches them. list_prices is NaN where no list price is stored.
+    """
+
+    def __init__(self, products: Iterable[Product], today: date):
+        products = list(products)
+        today_ordinal = today.toordinal()
+        self.ids = [product.product_id for product in products]
+        self.types: List[type] = list(map(type, products))
+        self.type_names = [product.product_type for product in products]
+        self.prices = array('d', [product.price for product in products])
+        self.list_prices = array('d', [math.nan if getattr(product, 'list_price', None) is None
+                                       else product.list_price for product in products])
+        self.quantities = array('q', [product.quantity_in_stock for product in products])
+        self.days_left = array('q', [product.expiry.toordinal() - today_ordinal
+                                     if isinstance(product, Grocery) else -1
+                                     for product in products])
+        self.brands = self._categorical(products, 'brand')
+        self.materials = self._categorical(products, 'material')
+
+    @staticmethod
+    def _categorical(products: List[Product], field: str) -> List[Optional[str]]:
+        # Casefolded once per distinct value
+        folded: Dict[Optional[str], Optional[str]] = {None: None}
+        values = [getattr(product, field, None) for product in products]
+        for value in set(values):
+            if value is not None:
+                folded[value] = value.casefold()
+        return list(map(folded.__getitem__, values))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def value(self, prices: Sequence[float]) -> float:
+        return math.fsum(map(operator.mul, prices, self.quantities))
+
+    def mask(self, product_type: Union[Type[Product], str, None] = None,
+             **categorical: Optional[str]) -> List[bool]:
+        """Per-row flags for products matching every given filter."""
+        mask = [True] * len(self.ids)
+        if product_type is not None:
+            if isinstance(product_type, str):
+                mask = list(map(operator.eq, self.type_names, repeat(product_type)))
+            else:
+                matches = {cls: issubclass(cls, product_type) for cls in set(self.types)}
+                mask = list(map(matches.__getitem__, self.types))
+        for field, value in categorical.items():
+            if value is not None:
+                column = getattr(self, field + 's')
+                mask = list(map(operator.and_, mask, map(operator.eq, column, repeat(value.casefold()))))
+        return mask
+
+class RepricePlan:
+    """Price changes computed by Inventory.reprice and their effect on stock value.
+
+    Attributes:
+        changes: (product_id, old_price, new_price) for every product whose price changes
+        list_prices: product_id -> new list price for every grocery whose list price changes
+        value_before: Stock value at the current prices
+        value_after: Stock value at the new prices
+        applied: Whether the changes were made, False for a dry run
+    """
+
+    def __init__(self, changes: List[Tuple[str, float, float]], value_before: float,
+                 value_after: float, applied: bool = False,
+                 list_prices: Optional[Dict[str, float]] = None):
+        self.changes = changes
+        self.list_prices = list_prices if list_prices is not None else {}
+        self.value_before = value_before
+        self.value_after = value_after
+        self.applied = applied
+
+    @property
+    def value_delta(self) -> float:
+        return self.value_after - self.value_before
+
+    def to_dict(self, changes: bool = True) -> Dict[str, Any]:
+        summary = {
+            'repriced': len(self.changes),
+            'value_before': round(self.value_before, 2),
+            'value_after': round(self.value_after, 2),
+            'value_delta': round(self.value_delta, 2),
+            'applied': self.applied,
+        }
+        if changes:
+            summary['changes'] = [{'product_id': product_id, 'old_price': old, 'new_price': new}
+                                  for product_id, old, new in self.changes]
+        return summary
+
+def plan_repricing(products: Iterable[Product], rules: Sequence[Union[PriceRule, ExpiryMarkdown]],
+                   today: Optional[date] = None) -> RepricePlan:
+    """Work out new prices without changing anything.
+
+    The products are turned into columns once and every rule then rewrites
+    the whole price and list price columns in a single pass, in the order
+    given, so later rules apply on top of earlier ones. Changed prices are
+    rounded to cents.
+
+    Args:
+        products: The products to reprice, e.g. inventory.snapshot()
+        rules: PriceRule and ExpiryMarkdown instances
+        today: Reference date for markdowns (defaults to today)
+
+    Returns:
+        RepricePlan: The changes and the stock value before and after
+
+    Raises:
+        ValueError: If a rule would make any price negative
+    """
+    columns = PriceColumns(products, today if today is not None else date.today())
+    prices, list_prices = columns.prices, columns.list_prices
+    for rule in rules:
+        prices, list_prices = rule.apply(columns, prices, list_prices)
+    # Prices no rule touched keep their exact value
+    prices = array('d', [old if new == old else round(new, 2)
+                         for old, new in zip(columns.prices, prices)])
+    list_changes = {product_id: round(new, 2)
+                    for product_id, old, new in zip(columns.ids, columns.list_prices, list_prices)
+                    if new == new and round(new, 2) != old}
+    negative = [product_id for product_id, price in zip(columns.ids, prices) if price < 0]
+    negative += [product_id for product_id, price in list_changes.items() if price < 0]
+    if negative:
+        raise ValueError(f"Repricing would make {len(negative)} prices negative, "
+                         f"e.g. product {negative[0]}")
+    changes = [(product_id, old, new)
+               for product_id, old, new in zip(columns.ids, columns.prices, prices) if new != old]
+    return RepricePlan(changes, columns.value(columns.prices), columns.value(prices),
+                       list_prices=list_changes)
@@ -1,8 +1,25 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import datetime, date
+from typing import Optional
+from schema import Field, register_product_type
+
+# Stock level at or below which a product should be reordered, unless set per product
+DEFAULT_REORDER_POINT = 5
 
 class Product(ABC):
-    def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int):
+    # Serialized fields shared by every type; subclasses declare their own
+    # FIELDS and are registered with @register_product_type
+    FIELDS = (
+        Field('product_id', 'str', "Product ID", column="ID"),
+        Field('name', 'str', "Product Name", column="Name"),
+        Field('price', 'float', "Price", minimum=0, format="$%.2f"),
+        Field('quantity_in_stock', 'int', "Quantity", column="Stock", minimum=0),
+        Field('reorder_point', 'int', "Reorder Point", required=False,
+              default=DEFAULT_REORDER_POINT, minimum=0),
+    )
+
+    def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int,
+                 reorder_point: int = DEFAULT_REORDER_POINT):
         self._product_id = product_id
         self._name = name
         if price < 0:
@@ -11,6 +28,11 @@ class Product(ABC):
         if quantity_in_stock < 0:
             raise ValueError("Quantity cannot be negative")
         self._quantity_in_stock = quantity_in_stock
+        if reorder_point < 0:
+            raise ValueError("Reorder point cannot be negative")
+        self._reorder_point = reorder_point
+        # Called as listener(product, old_quantity, old_reorder_point) after every stock change
+        self._stock_listener = None
 
     @property
     def product_id(self):
@@ -28,17 +50,53 @@ class Product(ABC):
     def quantity_in_stock(self):
         return self._quantity_in_stock
 
+    @property
+    def reorder_point(self):
+        return self._reorder_point
+
+    @property
+    def product_type(self) -> str:
+        return self.__class__.__name__
+
+    def needs_reorder(self) -> bool:
+        return self._quantity_in_stock <= self._reorder_point
+
+    def set_stock_listener(self, listener) -> None:
+        self._stock_listener = listener
+
+    def set_reorder_point(self, reorder_point: int) -> None:
+        if reorder_point < 0:
+            raise ValueError("Reorder point cannot be negative")
+        old_reorder_point = self._reorder_point
+        self._reorder_point = reorder_point
+        self._notify_stock_change(self._quantity_in_stock, old_reorder_point)
+
+    def set_price(self, price: float) -> None:
+        # Products held by an inventory are repriced through Inventory.set_prices,
+        # which keeps its price index and stock value in step
+        if price < 0:
+            raise ValueError("Price cannot be negative")
+        self._price = price
+
     def restock(self, amount: int) -> None:
         if amount <= 0:
             raise ValueError("Restock amount must be positive")
+        old_quantity = self._quantity_in_stock
         self._quantity_in_stock += amount
+        self._notify_stock_change(old_quantity, self._reorder_point)
 
     def sell(self, quantity: int) -> None:
         if quantity <= 0:
             raise ValueError("Sell quantity must be positive")
         if quantity > self._quantity_in_stock:
             raise ValueError(f"Not enough stock available. Current stock: {self._quantity_in_stock}")
+        old_quantity = self._quantity_in_stock
         self._quantity_in_stock -= quantity
+        self._notify_stock_change(old_quantity, self._reorder_point)
+
+    def _notify_stock_change(self, old_quantity: int, old_reorder_point: int) -> None:
+        if self._stock_listener is not None:
+            self._stock_listener(self, old_quantity, old_reorder_point)
 
     def get_total_value(self) -> float:
         return self._price * self._quantity_in_stock
@@ -47,20 +105,20 @@ class Product(ABC):
     def __str__(self) -> str:
         pass
 
-    @abstractmethod
     def to_dict(self) -> dict:
-        return {
-            'product_id': self._product_id,
-            'name': self._name,
-            'price': self._price,
-            'quantity_in_stock': self._quantity_in_stock,
-            'type': self.__class__.__name__
-        }
+        return self.schema.encode(self)
 
+@register_product_type
 class Electronics(Product):
+    FIELDS = (
+        Field('brand', 'str', "Brand"),
+        Field('warranty_years', 'int', "Warranty (years)", column="Warranty", minimum=0,
+              format="%d years"),
+    )
+
     def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int, 
-                 brand: str, warranty_years: int):
-        super().__init__(product_id, name, price, quantity_in_stock)
+                 brand: str, warranty_years: int, reorder_point: int = DEFAULT_REORDER_POINT):
+        super().__init__(product_id, name, price, quantity_in_stock, reorder_point)
         self._brand = brand
         if warranty_years < 0:
             raise ValueError("Warranty years cannot be negative")
@@ -74,47 +132,66 @@ class Electronics(Product):
     def warranty_years(self):
         return self._warranty_years
 
-    def to_dict(self) -> dict:
-        data = super().to_dict()
-        data.update({
-            'brand': self._brand,
-            'warranty_years': self._warranty_years
-        })
-        return data
-
     def __str__(self) -> str:
         return f"Electronics: {self._name} (ID: {self._product_id}) - ${self._price:.2f}\n" \
                f"Brand: {self._brand} | Warranty: {self._warranty_years} years | Stock: {self._quantity_in_stock}"
 
+@register_product_type
 class Grocery(Product):
+    FIELDS = (
+        Field('expiry_date', 'date', "Expiry Date", column="Expiry"),
+        # Regular price while an expiry markdown is in effect, otherwise None
+        Field('list_price', 'float', "List Price", required=False, minimum=0, format="$%.2f"),
+    )
+
     def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int, 
-                 expiry_date: str):
-        super().__init__(product_id, name, price, quantity_in_stock)
+                 expiry_date: str, reorder_point: int = DEFAULT_REORDER_POINT,
+                 list_price: Optional[float] = None):
+        super().__init__(product_id, name, price, quantity_in_stock, reorder_point)
         self._expiry_date = expiry_date
+        # Parsed once here so expiry checks never re-parse the string
+        self._expiry = datetime.strptime(expiry_date, "%Y-%m-%d").date()
+        if list_price is not None and list_price < 0:
+            raise ValueError("List price cannot be negative")
+        self._list_price = list_price
 
     @property
     def expiry_date(self):
         return self._expiry_date
 
-    def is_expired(self) -> bool:
-        current_date = datetime.now().date()
-        expiry_date = datetime.strptime(self._expiry_date, "%Y-%m-%d").date()
-        return current_date > expiry_date
+    @property
+    def expiry(self) -> date:
+        return self._expiry
 
-    def to_dict(self) -> dict:
-        data = super().to_dict()
-        data['expiry_date'] = self._expiry_date
-        return data
+    @property
+    def list_price(self) -> Optional[float]:
+        return self._list_price
+
+    def set_list_price(self, list_price: Optional[float]) -> None:
+        # Like set_price, changed through Inventory.set_prices for held products
+        if list_price is not None and list_price < 0:
+            raise ValueError("List price cannot be negative")
+        self._list_price = list_price
+
+    def is_expired(self, today: Optional[date] = None) -> bool:
+        current_date = today if today is not None else date.today()
+        return current_date > self._expiry
 
     def __str__(self) -> str:
         status = "EXPIRED" if self.is_expired() else "Valid"
         return f"Grocery: {self._name} (ID: {self._product_id}) - ${self._price:.2f}\n" \
                f"Expiry Date: {self._expiry_date} | Status: {status} | Stock: {self._quantity_in_stock}"
 
+@register_product_type
 class Clothing(Product):
+    FIELDS = (
+        Field('size', 'str', "Size"),
+        Field('material', 'str', "Material"),
+    )
+
     def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int, 
-                 size: str, material: str):
-        super().__init__(product_id, name, price, quantity_in_stock)
+                 size: str, material: str, reorder_point: int = DEFAULT_REORDER_POINT):
+        super().__init__(product_id, name, price, quantity_in_stock, reorder_point)
         self._size = size
         self._material = material
 
@@ -126,14 +203,6 @@ class Clothing(Product):
     def material(self):
         return self._material
 
-    def to_dict(self) -> dict:
-        data = super().to_dict()
-        data.update({
-            'size': self._size,
-            'material': self._material
-        })
-        return data
-
     def __str__(self) -> str:
         return f"Clothing: {self._name} (ID: {self._product_id}) - ${self._price:.2f}\n" \
                f"Size: {self._size} | Material: {self._material} | Stock: {self._quantity_in_stock}"
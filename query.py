@@ -0,0 +1,229 @@
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from product import Product, Grocery
+from sorted_index import SortedIndex
+
+# Categorical attributes with a hash index
+CATEGORICAL_FIELDS = ('brand', 'size', 'material')
+
+def _normalize(value: str) -> str:
+    return value.casefold()
+
+class Query:
+    """Immutable set of product filters, combined with AND.
+
+    Filters can be given to the constructor or added one at a time, each
+    call returning a new query::
+
+        Query(product_type=Electronics, brand='Apple').price(maximum=500).stock(minimum=11)
+
+    Ranges are inclusive and either bound may be left open. Brand, size
+    and material match case-insensitively; product_type matches subclasses
+    like isinstance and also accepts a type name such as 'Grocery'.
+    """
+
+    _FIELDS = ('product_type', 'brand', 'size', 'material', 'min_price', 'max_price',
+               'min_stock', 'max_stock', 'expires_from', 'expires_to')
+
+    def __init__(self, product_type: Union[Type[Product], str, None] = None,
+                 brand: Optional[str] = None, size: Optional[str] = None,
+                 material: Optional[str] = None,
+                 min_price: Optional[float] = None, max_price: Optional[float] = None,
+                 min_stock: Optional[int] = None, max_stock: Optional[int] = None,
+                 expires_from: Optional[date] = None, expires_to: Optional[date] = None):
+        self.product_type = product_type
+        self.brand = brand
+        self.size = size
+        self.material = material
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_stock = min_stock
+        self.max_stock = max_stock
+        self.expires_from = expires_from
+        self.expires_to = expires_to
+
+    def where(self, **filters: Any) -> 'Query':
+        """Return a copy with the given constructor filters set."""
+        unknown = set(filters) - set(self._FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown query filters: {', '.join(sorted(unknown))}")
+        values = {field: getattr(self, field) for field in self._FIELDS}
+        values.update(filters)
+        return Query(**values)
+
+    def of_type(self, product_type: Union[Type[Product], str]) -> 'Query':
+        return self.where(product_type=product_type)
+
+    def price(self, minimum: Optional[float] = None, maximum: Optional[float] = None) -> 'Query':
+        return self.where(min_price=minimum, max_price=maximum)
+
+    def stock(self, minimum: Optional[int] = None, maximum: Optional[int] = None) -> 'Query':
+        return self.where(min_stock=minimum, max_stock=maximum)
+
+    def expires(self, start: Optional[date] = None, end: Optional[date] = None) -> 'Query':
+        return self.where(expires_from=start, expires_to=end)
+
+    def __repr__(self) -> str:
+        filters = ', '.join(f"{field}={getattr(self, field)!r}" for field in self._FIELDS
+                            if getattr(self, field) is not None)
+        return f"Query({filters})"
+
+class _Predicate:
+    """One filter of a query: its estimated result size, how to enumerate
+    matching IDs from its index, and how to check a single product."""
+
+    def __init__(self, name: str, estimate: int, ids: Callable[[], Iterable[str]],
+                 test: Callable[[Product], bool], lookup: Optional[Callable[[], Dict[str, None]]] = None):
+        self.name = name
+        self.estimate = estimate
+        self.ids = ids
+        self.test = test
+        # Hash-backed predicates can be intersected without scanning
+        self.lookup = lookup
+
+class AttributeIndex:
+    """Secondary indexes for multi-attribute queries.
+
+    Keeps per-type buckets, hash indexes on brand, size and material, and
+    sorted indexes on price and expiry date. Stock ranges use the owner's
+    stock index, which it already maintains for low-stock queries. Buckets
+    are insertion-ordered dicts so results come out in a stable order.
+    """
+
+    def __init__(self, stock_index: SortedIndex):
+        self._stock_index = stock_index
+        self._by_type: Dict[type, Dict[str, None]] = {}
+        self._categorical: Dict[str, Dict[str, Dict[str, None]]] = {
+            field: {} for field in CATEGORICAL_FIELDS}
+        self._price_index = SortedIndex()
+        self._expiry_index = SortedIndex()
+
+    def add(self, product: Product) -> None:
+        product_id = product.product_id
+        self._by_type.setdefault(type(product), {})[product_id] = None
+        for field in CATEGORICAL_FIELDS:
+            value = getattr(product, field, None)
+            if value is not None:
+                self._categorical[field].setdefault(_normalize(value), {})[product_id] = None
+        self._price_index.add(product.price, product_id)
+        if isinstance(product, Grocery):
+            self._expiry_index.add(product.expiry.toordinal(), product_id)
+
+    def remove(self, product: Product) -> None:
+        product_id = product.product_id
+        bucket = self._by_type[type(product)]
+        del bucket[product_id]
+        if not bucket:
+            del self._by_type[type(product)]
+        for field in CATEGORICAL_FIELDS:
+            value = getattr(product, field, None)
+            if value is not None:
+                index = self._categorical[field]
+                key = _normalize(value)
+                del index[key][product_id]
+                if not index[key]:
+                    del index[key]
+        self._price_index.remove(product.price, product_id)
+        if isinstance(product, Grocery):
+            self._expiry_index.remove(product.expiry.toordinal(), product_id)
+
+    def update_price(self, product_id: str, old_price: float, new_price: float) -> None:
+        self._price_index.remove(old_price, product_id)
+        self._price_index.add(new_price, product_id)
+
+    def _type_buckets(self, product_type: Union[Type[Product], str]) -> List[Dict[str, None]]:
+        if isinstance(product_type, str):
+            return [bucket for cls, bucket in self._by_type.items() if cls.__name__ == product_type]
+        return [bucket for cls, bucket in self._by_type.items() if issubclass(cls, product_type)]
+
+    def _predicates(self, query: Query) -> List[_Predicate]:
+        predicates = []
+        if query.product_type is not None:
+            buckets = self._type_buckets(query.product_type)
+            if isinstance(query.product_type, str):
+                test = lambda p, name=query.product_type: type(p).__name__ == name
+            else:
+                test = lambda p, cls=query.product_type: isinstance(p, cls)
+            # Several buckets (e.g. a base class) are checked per product rather than merged
+            lookup = (lambda: buckets[0]) if len(buckets) == 1 else None
+            predicates.append(_Predicate(
+                'type', sum(map(len, buckets)),
+                lambda: (product_id for bucket in buckets for product_id in bucket), test, lookup))
+
+        for field in CATEGORICAL_FIELDS:
+            value = getattr(query, field)
+            if value is None:
+                continue
+            key = _normalize(value)
+            bucket = self._categorical[field].get(key, {})
+            predicates.append(_Predicate(
+                field, len(bucket), lambda bucket=bucket: bucket,
+                lambda p, field=field, key=key: _normalize(getattr(p, field, None) or '') == key,
+                lambda bucket=bucket: bucket))
+
+        ranges = (
+            ('price', self._price_index, query.min_price, query.max_price, lambda p: p.price),
+            ('stock', self._stock_index, query.min_stock, query.max_stock,
+             lambda p: p.quantity_in_stock),
+            ('expiry', self._expiry_index,
+             None if query.expires_from is None else query.expires_from.toordinal(),
+             None if query.expires_to is None else query.expires_to.toordinal(),
+             lambda p: p.expiry.toordinal() if isinstance(p, Grocery) else None),
+        )
+        for name, index, minimum, maximum, key in ranges:
+            if minimum is None and maximum is None:
+                continue
+            def test(p, key=key, minimum=minimum, maximum=maximum):
+                value = key(p)
+                return (value is not None and (minimum is None or value >= minimum)
+                        and (maximum is None or value <= maximum))
+            predicates.append(_Predicate(
+                name, index.count(minimum, maximum),
+                lambda index=index, minimum=minimum, maximum=maximum: index.irange(minimum, maximum),
+                test))
+        return predicates
+
+    def plan(self, query: Query) -> List[_Predicate]:
+        """Predicates ordered most selective first; the first one drives the scan."""
+        return sorted(self._predicates(query), key=lambda predicate: predicate.estimate)
+
+    def explain(self, query: Query) -> List[Tuple[str, int]]:
+        """(filter, estimated matches) in the order the planner applies them."""
+        return [(predicate.name, predicate.estimate) for predicate in self.plan(query)]
+
+    def search(self, query: Query, products: Dict[str, Product],
+               limit: Optional[int] = None) -> Iterator[str]:
+        """Yield IDs of products matching the query.
+
+        The most selective predicate enumerates candidates from its index;
+        other hash-backed predicates are intersected by dict lookup and the
+        remaining range predicates are checked on each candidate. Results
+        come in the driving index's order (key order for ranges, insertion
+        order otherwise); with no filters every product matches.
+        """
+        if limit is not None and limit <= 0:
+            return
+        plan = self.plan(query)
+        if not plan:
+            candidates: Iterable[str] = products
+            lookups, tests = [], []
+        else:
+            driver, rest = plan[0], plan[1:]
+            if not driver.estimate:
+                return
+            candidates = driver.ids()
+            lookups = [predicate.lookup() for predicate in rest if predicate.lookup is not None]
+            tests = [predicate.test for predicate in rest if predicate.lookup is None]
+        found = 0
+        for product_id in candidates:
+            if any(product_id not in lookup for lookup in lookups):
+                continue
+            if tests:
+                product = products[product_id]
+                if not all(test(product) for test in tests):
+                    continue
+            yield product_id
+            found += 1
+            if limit is not None and found >= limit:
+                return
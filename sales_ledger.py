@@ -0,0 +1,419 @@
+import os
+import struct
+import threading
+import time
+from array import array
+from itertools import compress
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from product import Product
+from sorted_index import SortedIndex
+from utils import atomic_write
+
+SELL, RESTOCK = 1, 2
+_KINDS = {'sell': SELL, 'restock': RESTOCK}
+
+# Written by compaction in place of the events it drops: a product's
+# lifetime units and revenue sold (quantity, price fields) and units restocked
+CARRIED_SALES, CARRIED_RESTOCKS = 3, 4
+
+HOUR = 3600
+DAY = 86400
+
+# On-disk event: timestamp, kind, quantity, unit price, then the product ID
+# and type name as length-prefixed UTF-8
+_EVENT = struct.Struct('<dBqdHB')
+
+class RollingWindow:
+    """Ring buffer of fixed-width time buckets holding units and revenue.
+
+    Each slot remembers which bucket number it holds, so slots left over from
+    an earlier lap of the ring are treated as empty without a sweep. Adding
+    and summing the whole ring are O(slots), independent of event count.
+    """
+
+    __slots__ = ('width', 'slots', '_stamps', '_units', '_revenue')
+
+    def __init__(self, width: int, slots: int):
+        self.width = width
+        self.slots = slots
+        self._stamps = array('q', [-1]) * slots
+        self._units = array('q', [0]) * slots
+        self._revenue = array('d', [0.0]) * slots
+
+    def add(self, timestamp: float, units: int, revenue: float) -> None:
+        bucket = int(timestamp // self.width)
+        slot = bucket % self.slots
+        if self._stamps[slot] != bucket:
+            if self._stamps[slot] > bucket:
+                # Older than anything the ring still covers
+                return
+            self._stamps[slot] = bucket
+            self._units[slot] = 0
+            self._revenue[slot] = 0.0
+        self._units[slot] += units
+        self._revenue[slot] += revenue
+
+    def series(self, now: float, buckets: Optional[int] = None) -> List[Tuple[int, int, float]]:
+        """(bucket start time, units, revenue) for the last N buckets, oldest first."""
+        buckets = self.slots if buckets is None else min(buckets, self.slots)
+        current = int(now // self.width)
+        result = []
+        for bucket in range(current - buckets + 1, current + 1):
+            slot = bucket % self.slots
+            if self._stamps[slot] == bucket:
+                result.append((bucket * self.width, self._units[slot], self._revenue[slot]))
+            else:
+                result.append((bucket * self.width, 0, 0.0))
+        return result
+
+    def totals(self, now: float, buckets: Optional[int] = None) -> Tuple[int, float]:
+        """(units, revenue) over the last N buckets including the current one."""
+        units = 0
+        revenue = 0.0
+        for _, bucket_units, bucket_revenue in self.series(now, buckets):
+            units += bucket_units
+            revenue += bucket_revenue
+        return units, revenue
+
+class Rollup:
+    """Hourly and daily rolling windows plus lifetime sales totals for one key."""
+
+    __slots__ = ('hourly', 'daily', 'units', 'revenue')
+
+    def __init__(self, hourly_slots: int, daily_slots: int):
+        self.hourly = RollingWindow(HOUR, hourly_slots)
+        self.daily = RollingWindow(DAY, daily_slots)
+        self.units = 0
+        self.revenue = 0.0
+
+    def add_sale(self, timestamp: float, units: int, revenue: float) -> None:
+        self.hourly.add(timestamp, units, revenue)
+        self.daily.add(timestamp, units, revenue)
+        self.units += units
+        self.revenue += revenue
+
+class TopSellers:
+    """Units sold per product within the current period, ranked.
+
+    Counts are kept in a SortedIndex keyed by negative units, so every sale
+    is an O(log n) update and reading the top N is O(N). The ranking starts
+    over when a sale falls into a new period; width None never resets.
+    """
+
+    def __init__(self, width: Optional[int] = None):
+        self.width = width
+        self._period = 0
+        self._units: Dict[str, int] = {}
+        self._ranking = SortedIndex()
+
+    def _period_of(self, timestamp: float) -> int:
+        return 0 if self.width is None else int(timestamp // self.width)
+
+    def add(self, timestamp: float, product_id: str, units: int) -> None:
+        period = self._period_of(timestamp)
+        if period < self._period:
+            return
+        if period > self._period:
+            self._period = period
+            self._units = {}
+            self._ranking = SortedIndex()
+        old = self._units.get(product_id)
+        if old is not None:
+            self._ranking.remove(-old, product_id)
+        new = (old or 0) + units
+        self._units[product_id] = new
+        self._ranking.add(-new, product_id)
+
+    def top(self, n: int, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        """The n best sellers of the period containing now, as (product_id, units)."""
+        if now is not None and self._period_of(now) != self._period:
+            return []
+        result = []
+        for product_id in self._ranking.irange():
+            if len(result) >= n:
+                break
+            result.append((product_id, self._units[product_id]))
+        return result
+
+class SalesLedger:
+    """Append-only record of sales and restocks with incremental rollups.
+
+    Events are stored column-wise in arrays (time, product code, kind,
+    quantity, unit price), with product IDs interned, so an event costs
+    about 30 bytes. Each sale updates hourly and daily ring buffers for its
+    product, its type and the whole store, plus today's and all-time top
+    seller rankings, so every analytics read is constant time with respect
+    to the number of events. Rollups are only allocated for products that
+    have sold something; restocks are just counted. Bucket boundaries are UTC.
+
+    With a filename, events are also appended to that file, each written
+    through to the OS like a journal record, and replayed when the ledger
+    is opened again. Events older than every window are compacted away, on
+    open and on flush(): their lifetime totals are kept as one carried
+    record per product and the file is rewritten, so the file and memory
+    hold at most the last daily_slots days of events.
+    """
+
+    def __init__(self, filename: Optional[str] = None, clock: Callable[[], float] = time.time,
+                 hourly_slots: int = 48, daily_slots: int = 90):
+        self.filename = filename
+        self._clock = clock
+        self._hourly_slots = hourly_slots
+        self._daily_slots = daily_slots
+        self._lock = threading.RLock()
+
+        self._times = array('d')
+        self._codes = array('I')
+        self._kinds = array('B')
+        self._quantities = array('q')
+        self._prices = array('d')
+        self._ids: List[str] = []
+        self._id_codes: Dict[str, int] = {}
+        self._product_types: Dict[str, str] = {}
+
+        self._by_product: Dict[str, Rollup] = {}
+        self._by_type: Dict[str, Rollup] = {}
+        self._restocked: Dict[str, int] = {}
+        self._total = self._new_rollup()
+        self._top_today = TopSellers(DAY)
+        self._top_all_time = TopSellers()
+        # product_id -> [type, units, revenue, units restocked] from compacted events
+        self._carried: Dict[str, list] = {}
+
+        self._file = None
+        if filename is not None:
+            if os.path.exists(filename):
+                self._replay(filename)
+            self._file = open(filename, 'ab')
+            self._compact_if_due()
+
+    def _new_rollup(self) -> Rollup:
+        return Rollup(self._hourly_slots, self._daily_slots)
+
+    def _replay(self, filename: str) -> None:
+        with open(filename, 'rb') as f:
+            data = f.read()
+        position = 0
+        while position + _EVENT.size <= len(data):
+            timestamp, kind, quantity, price, id_length, type_length = _EVENT.unpack_from(data, position)
+            end = position + _EVENT.size + id_length + type_length
+            if end > len(data):
+                break
+            start = position + _EVENT.size
+            product_id = data[start:start + id_length].decode('utf-8')
+            product_type = data[start + id_length:end].decode('utf-8')
+            if kind in (CARRIED_SALES, CARRIED_RESTOCKS):
+                self._apply_carried(kind, product_id, product_type, quantity, price)
+            else:
+                self._apply(timestamp, kind, product_id, product_type, quantity, price)
+            position = end
+        if position != len(data):
+            # Torn final event from a crash; drop it so appends stay aligned
+            with open(filename, 'rb+') as f:
+                f.truncate(position)
+
+    def _sale_rollups(self, product_id: str, product_type: str) -> Tuple[Rollup, Rollup]:
+        rollup = self._by_product.get(product_id)
+        if rollup is None:
+            rollup = self._by_product[product_id] = self._new_rollup()
+        type_rollup = self._by_type.get(product_type)
+        if type_rollup is None:
+            type_rollup = self._by_type[product_type] = self._new_rollup()
+        return rollup, type_rollup
+
+    def _apply(self, timestamp: float, kind: int, product_id: str, product_type: str,
+               quantity: int, price: float) -> None:
+        code = self._id_codes.get(product_id)
+        if code is None:
+            code = self._id_codes[product_id] = len(self._ids)
+            self._ids.append(product_id)
+        self._product_types[product_id] = product_type
+        self._times.append(timestamp)
+        self._codes.append(code)
+        self._kinds.append(kind)
+        self._quantities.append(quantity)
+        self._prices.append(price)
+
+        if kind == RESTOCK:
+            self._restocked[product_id] = self._restocked.get(product_id, 0) + quantity
+            return
+        rollup, type_rollup = self._sale_rollups(product_id, product_type)
+        revenue = quantity * price
+        rollup.add_sale(timestamp, quantity, revenue)
+        type_rollup.add_sale(timestamp, quantity, revenue)
+        self._total.add_sale(timestamp, quantity, revenue)
+        self._top_today.add(timestamp, product_id, quantity)
+        self._top_all_time.add(timestamp, product_id, quantity)
+
+    def _apply_carried(self, kind: int, product_id: str, product_type: str,
+                       quantity: int, value: float) -> None:
+        """Add lifetime totals of compacted events; they fall outside every window."""
+        carried = self._carried.setdefault(product_id, [product_type, 0, 0.0, 0])
+        self._product_types.setdefault(product_id, product_type)
+        if kind == CARRIED_RESTOCKS:
+            carried[3] += quantity
+            self._restocked[product_id] = self._restocked.get(product_id, 0) + quantity
+            return
+        carried[1] += quantity
+        carried[2] += value
+        for rollup in self._sale_rollups(product_id, product_type) + (self._total,):
+            rollup.units += quantity
+            rollup.revenue += value
+        self._top_all_time.add(0.0, product_id, quantity)
+
+    @staticmethod
+    def _pack(timestamp: float, kind: int, product_id: str, product_type: str,
+              quantity: int, price: float) -> bytes:
+        id_bytes = product_id.encode('utf-8')
+        type_bytes = product_type.encode('utf-8')
+        return _EVENT.pack(timestamp, kind, quantity, price,
+                           len(id_bytes), len(type_bytes)) + id_bytes + type_bytes
+
+    def record(self, kind: str, product: Product, quantity: int,
+               timestamp: Optional[float] = None) -> None:
+        """Append a 'sell' or 'restock' event for a product at its current price."""
+        kind_code = _KINDS[kind]
+        timestamp = self._clock() if timestamp is None else timestamp
+        product_id = product.product_id
+        product_type = product.product_type
+        with self._lock:
+            self._apply(timestamp, kind_code, product_id, product_type, quantity, product.price)
+            if self._file is not None:
+                # Flushed at once, like journal records, so a process crash loses neither
+                self._file.write(self._pack(timestamp, kind_code, product_id, product_type,
+                                            quantity, product.price))
+                self._file.flush()
+
+    def flush(self) -> None:
+        """Force written events to stable storage, compacting old events when due."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._compact_if_due()
+
+    def _cutoff(self) -> float:
+        """Start of the oldest bucket any window still covers."""
+        now = self._clock()
+        return min((int(now // DAY) - self._daily_slots + 1) * DAY,
+                   (int(now // HOUR) - self._hourly_slots + 1) * HOUR)
+
+    def _compact_if_due(self) -> None:
+        if self._times and self._times[0] < self._cutoff():
+            self.compact()
+
+    def compact(self) -> int:
+        """Fold events older than every window into carried totals and rewrite the file.
+
+        Lifetime totals, restock counts and the all-time ranking are
+        unchanged; events() no longer yields the dropped events.
+
+        Returns:
+            int: Number of events dropped
+        """
+        with self._lock:
+            cutoff = self._cutoff()
+            keep = [timestamp >= cutoff for timestamp in self._times]
+            dropped = [not kept for kept in keep]
+            for index in compress(range(len(keep)), dropped):
+                product_id = self._ids[self._codes[index]]
+                carried = self._carried.setdefault(
+                    product_id, [self._product_types[product_id], 0, 0.0, 0])
+                quantity = self._quantities[index]
+                if self._kinds[index] == RESTOCK:
+                    carried[3] += quantity
+                else:
+                    carried[1] += quantity
+                    carried[2] += quantity * self._prices[index]
+            count = sum(dropped)
+            if count:
+                for name in ('_times', '_codes', '_kinds', '_quantities', '_prices'):
+                    column = getattr(self, name)
+                    setattr(self, name, array(column.typecode, compress(column, keep)))
+                if self._file is not None:
+                    self._rewrite()
+            return count
+
+    def _rewrite(self) -> None:
+        self._file.close()
+        with atomic_write(self.filename, 'wb') as f:
+            for product_id, (product_type, units, revenue, restocked) in self._carried.items():
+                if units:
+                    f.write(self._pack(0.0, CARRIED_SALES, product_id, product_type, units, revenue))
+                if restocked:
+                    f.write(self._pack(0.0, CARRIED_RESTOCKS, product_id, product_type, restocked, 0.0))
+            for index in range(len(self._times)):
+                product_id = self._ids[self._codes[index]]
+                f.write(self._pack(self._times[index], self._kinds[index], product_id,
+                                   self._product_types[product_id], self._quantities[index],
+                                   self._prices[index]))
+        self._file = open(self.filename, 'ab')
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def events(self, product_id: Optional[str] = None) -> Iterator[Tuple[float, str, str, int, float]]:
+        """Yield retained (not yet compacted) events as (timestamp, kind, product_id, quantity, unit price)."""
+        kinds = {code: name for name, code in _KINDS.items()}
+        code = None if product_id is None else self._id_codes.get(product_id, -1)
+        for index in range(len(self._times)):
+            if code is not None and self._codes[index] != code:
+                continue
+            yield (self._times[index], kinds[self._kinds[index]], self._ids[self._codes[index]],
+                   self._quantities[index], self._prices[index])
+
+    def _rollup(self, product_id: Optional[str] = None, product_type: Optional[str] = None) -> Rollup:
+        if product_id is not None:
+            return self._by_product.get(product_id) or self._new_rollup()
+        if product_type is not None:
+            return self._by_type.get(product_type) or self._new_rollup()
+        return self._total
+
+    def hourly(self, hours: int = 24, product_id: Optional[str] = None,
+               product_type: Optional[str] = None) -> List[Tuple[int, int, float]]:
+        """(hour start, units, revenue) for the last N hours, oldest first."""
+        with self._lock:
+            return self._rollup(product_id, product_type).hourly.series(self._clock(), hours)
+
+    def daily(self, days: int = 30, product_id: Optional[str] = None,
+              product_type: Optional[str] = None) -> List[Tuple[int, int, float]]:
+        """(day start, units, revenue) for the last N days, oldest first."""
+        with self._lock:
+            return self._rollup(product_id, product_type).daily.series(self._clock(), days)
+
+    def sales(self, days: Optional[int] = None, product_id: Optional[str] = None,
+              product_type: Optional[str] = None) -> Tuple[int, float]:
+        """(units, revenue) over the last N days including today, or all time if days is None."""
+        with self._lock:
+            rollup = self._rollup(product_id, product_type)
+            if days is None:
+                return rollup.units, rollup.revenue
+            return rollup.daily.totals(self._clock(), days)
+
+    def velocity(self, product_id: str, days: int = 7) -> float:
+        """Average units sold per day over the last N days."""
+        return self.sales(days, product_id=product_id)[0] / days
+
+    def units_restocked(self, product_id: str) -> int:
+        with self._lock:
+            return self._restocked.get(product_id, 0)
+
+    def sales_by_type(self, days: Optional[int] = None) -> Dict[str, Tuple[int, float]]:
+        """(units, revenue) per product type over the last N days, or all time."""
+        with self._lock:
+            types = list(self._by_type)
+        return {product_type: self.sales(days, product_type=product_type) for product_type in types}
+
+    def top_sellers(self, n: int = 10, today: bool = True) -> List[Tuple[str, int]]:
+        """Best sellers by units, for the current UTC day or all time."""
+        with self._lock:
+            if today:
+                return self._top_today.top(n, self._clock())
+            return self._top_all_time.top(n)
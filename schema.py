@@ -0,0 +1,206 @@
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from exceptions import InvalidProductDataError
+
+# Field kinds and the Python types a serialized value of that kind may have
+_KIND_TYPES = {
+    'str': (str,),
+    'int': (int,),
+    'float': (int, float),
+    'date': (str,),
+}
+
+class Field:
+    """One serialized attribute of a product type.
+
+    Args:
+        name: Key in to_dict() output and constructor keyword
+        kind: 'str', 'int', 'float' or 'date' (an ISO YYYY-MM-DD string)
+        label: Form label
+        column: Table column heading (defaults to label)
+        required: Whether serialized data must contain the field
+        default: Value used when an optional field is absent
+        minimum: Smallest allowed value for numeric fields
+        format: printf-style display format for numeric table columns
+        attribute: Instance attribute holding the value (defaults to _<name>)
+    """
+
+    __slots__ = ('name', 'kind', 'label', 'column', 'required', 'default', 'minimum',
+                 'format', 'attribute')
+
+    def __init__(self, name: str, kind: str, label: str, column: Optional[str] = None,
+                 required: bool = True, default: Any = None, minimum: Optional[float] = None,
+                 format: Optional[str] = None, attribute: Optional[str] = None):
+        if kind not in _KIND_TYPES:
+            raise ValueError(f"Unknown field kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.label = label
+        self.column = column or label
+        self.required = required
+        self.default = default
+        self.minimum = minimum
+        self.format = format
+        self.attribute = attribute or f"_{name}"
+
+    def parse(self, value: Any) -> Any:
+        """Convert a raw text or spreadsheet value (CSV cell, form input) to this kind."""
+        if isinstance(value, str):
+            value = value.strip()
+        if self.kind == 'int':
+            if isinstance(value, float):
+                if not value.is_integer():
+                    raise ValueError(f"{self.name} must be a whole number: {value}")
+                return int(value)
+            return int(value)
+        if self.kind == 'float':
+            return float(value)
+        if self.kind == 'date' and isinstance(value, date):
+            return value.isoformat()
+        return value if isinstance(value, str) else str(value)
+
+    def __repr__(self) -> str:
+        return f"Field({self.name!r}, {self.kind!r})"
+
+class ProductSchema:
+    """Field list of one product type and the codecs compiled from it.
+
+    encode, decode and validate are generated as straight-line Python
+    source once per type, so converting a record is a fixed sequence of
+    attribute reads or dict lookups with no per-field loop or branching on
+    the type.
+
+    Attributes:
+        encode: product -> dict, the to_dict() form
+        validate: dict -> list of problems (missing fields, wrong types, values below minimum)
+        decode: dict -> product; runs validate first and raises
+            InvalidProductDataError listing every problem it finds
+    """
+
+    def __init__(self, cls: type, type_name: str, fields: Tuple[Field, ...], common: int):
+        """
+        Args:
+            cls: The product class
+            type_name: Value of the serialized 'type' key
+            fields: Every field, shared ones first
+            common: How many leading fields are shared by all types; 'type'
+                is serialized right after them
+        """
+        self.cls = cls
+        self.type_name = type_name
+        self.fields = fields
+        self.common_fields = fields[:common]
+        self.type_fields = fields[common:]
+        self._common = common
+        self.encode: Callable[[Any], Dict[str, Any]] = self._compile_encode()
+        self.validate: Callable[[Dict[str, Any]], List[str]] = self._compile_validate()
+        self.decode: Callable[[Dict[str, Any]], Any] = self._compile_decode()
+        self._parsers = tuple((field.name, field.parse) for field in fields)
+
+    def _compile(self, source: str, name: str, namespace: Dict[str, Any]) -> Callable:
+        namespace = dict(namespace, InvalidProductDataError=InvalidProductDataError)
+        exec(compile(source, f"<{self.type_name} {name}>", 'exec'), namespace)
+        return namespace[name]
+
+    def _compile_encode(self) -> Callable:
+        items = [f"{field.name!r}: product.{field.attribute}" for field in self.fields]
+        items.insert(self._common, f"'type': {self.type_name!r}")
+        source = "def encode(product):\n    return {" + ", ".join(items) + "}\n"
+        return self._compile(source, 'encode', {})
+
+    def _compile_decode(self) -> Callable:
+        namespace: Dict[str, Any] = {'cls': self.cls, 'validate': self.validate}
+        arguments = []
+        for field in self.fields:
+            if field.required:
+                arguments.append(f"{field.name}=data[{field.name!r}]")
+            else:
+                namespace[f"default_{field.name}"] = field.default
+                arguments.append(f"{field.name}=data.get({field.name!r}, default_{field.name})")
+        source = (
+            "def decode(data):\n"
+            "    errors = validate(data)\n"
+            "    if errors:\n"
+            f"        raise InvalidProductDataError(f\"Invalid {self.type_name} data ({{'; '.join(errors)}}): {{data}}\")\n"
+            f"    return cls({', '.join(arguments)})\n"
+        )
+        return self._compile(source, 'decode', namespace)
+
+    def _compile_validate(self) -> Callable:
+        namespace: Dict[str, Any] = {}
+        lines = ["def validate(data):", "    errors = []"]
+        for field in self.fields:
+            types = f"types_{field.name}"
+            namespace[types] = _KIND_TYPES[field.kind]
+            lines.append(f"    value = data.get({field.name!r})")
+            lines.append("    if value is None:")
+            if field.required:
+                lines.append(f"        errors.append({field.name + ' is required'!r})")
+            else:
+                lines.append("        pass")
+            lines.append(f"    elif not isinstance(value, {types}) or isinstance(value, bool):")
+            lines.append(f"        errors.append({f'{field.name} must be of kind {field.kind}'!r})")
+            if field.minimum is not None:
+                lines.append(f"    elif value < {field.minimum!r}:")
+                lines.append(f"        errors.append({f'{field.name} cannot be less than {field.minimum}'!r})")
+        lines.append("    return errors")
+        return self._compile("\n".join(lines) + "\n", 'validate', namespace)
+
+    def parse(self, row: Dict[str, Any], is_missing: Callable[[Any], bool] = lambda value: value is None) -> Dict[str, Any]:
+        """Convert a flat row of raw values (e.g. a CSV line) into decode() input.
+
+        Values for which is_missing returns true are left out, so optional
+        fields take their defaults and missing required fields are reported
+        by decode(). Keys that don't belong to this type are ignored.
+        """
+        data: Dict[str, Any] = {}
+        for name, parse in self._parsers:
+            value = row.get(name)
+            if not is_missing(value):
+                data[name] = parse(value)
+        return data
+
+    def __repr__(self) -> str:
+        return f"ProductSchema({self.type_name!r}, {[field.name for field in self.fields]!r})"
+
+# Serialized type name -> schema, in registration order
+PRODUCT_TYPES: Dict[str, ProductSchema] = {}
+
+def register_product_type(cls: type) -> type:
+    """Class decorator: compile the schema for a product class and register it.
+
+    The fields are the FIELDS tuples of cls and its bases, base classes
+    first. Fields of the topmost class that declares any are common to
+    every type. The schema is stored as cls.schema.
+    """
+    declared = [vars(klass)['FIELDS'] for klass in reversed(cls.__mro__) if 'FIELDS' in vars(klass)]
+    fields = tuple(field for group in declared for field in group)
+    names = [field.name for field in fields]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate field names in {cls.__name__}: {names}")
+    if cls.__name__ in PRODUCT_TYPES:
+        raise ValueError(f"Product type '{cls.__name__}' is already registered")
+    schema = ProductSchema(cls, cls.__name__, fields, len(declared[0]) if declared else 0)
+    cls.schema = schema
+    PRODUCT_TYPES[cls.__name__] = schema
+    return cls
+
+def schema_for(type_name: Any) -> ProductSchema:
+    """Look up a registered type by its serialized name.
+
+    Raises:
+        InvalidProductDataError: If no such type is registered
+    """
+    schema = PRODUCT_TYPES.get(type_name)
+    if schema is None:
+        raise InvalidProductDataError(f"Unknown product type: {type_name}")
+    return schema
+
+def all_fields() -> List[Field]:
+    """Every field of every registered type, common fields first, each name once."""
+    seen: Dict[str, Field] = {}
+    for schema in PRODUCT_TYPES.values():
+        for field in schema.fields:
+            seen.setdefault(field.name, field)
+    return list(seen.values())
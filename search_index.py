@@ -0,0 +1,116 @@
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+NGRAM_SIZE = 3
+
+def normalize_name(name: str) -> str:
+    """Normalize a product name or query for case-insensitive matching."""
+    return name.lower()
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+def match_key(name: str, query: str) -> Optional[Tuple[int, int, int, str]]:
+    """Sort key NameIndex.search ranks a name by, or None if it doesn't contain the query.
+
+    Lets results from several indexes be merged into the same order.
+    """
+    name = normalize_name(name)
+    needle = normalize_name(query)
+    position = name.find(needle)
+    if position < 0:
+        return None
+    return NameIndex._rank(name, needle, position), position, len(name), name
+
+class NameIndex:
+    """Inverted trigram index over pre-normalized product names.
+
+    Queries of at least three characters only look at the products that
+    contain every trigram of the query; shorter queries fall back to a scan
+    of the already-normalized names.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, str] = {}
+        self._postings: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, product_id: str, name: str) -> None:
+        """Index a product name, replacing any previous entry for the ID."""
+        if product_id in self._names:
+            self.remove(product_id)
+        normalized = normalize_name(name)
+        self._names[product_id] = normalized
+        for gram in _ngrams(normalized):
+            self._postings.setdefault(gram, set()).add(product_id)
+
+    def remove(self, product_id: str) -> None:
+        """Drop a product from the index; unknown IDs are ignored."""
+        normalized = self._names.pop(product_id, None)
+        if normalized is None:
+            return
+        for gram in _ngrams(normalized):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(product_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Return IDs of products whose name contains the query, best matches first.
+
+        Exact matches rank first, then prefix matches, then matches at the
+        start of a word, then any other substring; ties go to the earlier
+        match position and the shorter name.
+
+        Args:
+            query: Substring to look for (case-insensitive)
+            limit: Maximum number of IDs to return, or None for all
+
+        Returns:
+            List[str]: Matching product IDs ordered by match quality
+        """
+        needle = normalize_name(query)
+        if not needle:
+            ids = list(self._names)
+            return ids if limit is None else ids[:limit]
+
+        grams = _ngrams(needle)
+        if grams:
+            postings = [self._postings.get(gram) for gram in grams]
+            if any(posting is None for posting in postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return []
+        else:
+            candidates = self._names.keys()
+
+        scored: List[Tuple[int, int, int, str, str]] = []
+        for product_id in candidates:
+            name = self._names[product_id]
+            position = name.find(needle)
+            if position < 0:
+                continue
+            scored.append((self._rank(name, needle, position), position, len(name), name, product_id))
+
+        if limit is not None:
+            scored = heapq.nsmallest(limit, scored)
+        else:
+            scored.sort()
+        return [entry[-1] for entry in scored]
+
+    @staticmethod
+    def _rank(name: str, needle: str, position: int) -> int:
+        if name == needle:
+            return 0
+        if position == 0:
+            return 1
+        if not name[position - 1].isalnum():
+            return 2
+        return 3
@@ -0,0 +1,233 @@
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from inventory import Inventory
+from product import Product, Grocery
+from batch import BatchResult
+from query import Query
+from versioning import Change, ProductSnapshot
+from pricing import RepricePlan
+from concurrency import ReadWriteLock, StripedLock
+
+class SharedInventory(Inventory):
+    """Inventory that can be shared safely between threads.
+
+    Locking is layered from coarse to fine:
+
+    * a reader/writer lock: adding and removing products, batches,
+      repricing and compaction take it exclusively; everything else shares it;
+    * striped per-product locks, so concurrent sales of the same product are
+      serialized while sales of different products proceed in parallel;
+    * an index lock around the stock-keyed indexes and running totals that
+      every sale updates;
+    * a persistence lock, so all journal writes go through one path.
+
+    Journal compaction is deferred until the mutation that triggered it has
+    released its locks, then runs under the exclusive lock so the snapshot
+    never races with an in-flight sale. With a background writer attached,
+    mutations only request a save and the writer thread calls persist()
+    once per debounce window instead.
+    """
+
+    def __init__(self, stripes: int = 64):
+        super().__init__()
+        self._rw_lock = ReadWriteLock()
+        self._stripes = StripedLock(stripes)
+        self._index_lock = threading.RLock()
+        self._persist_lock = threading.Lock()
+        self._compaction_due = False
+        self._writer = None
+
+    def set_background_writer(self, writer) -> None:
+        """Hand snapshot writes to a persistence.BackgroundWriter, or None to compact inline."""
+        self._writer = writer
+
+    def exclusive(self):
+        """Hold the write lock across several calls, e.g. a membership check and the add it decides.
+
+        The lock is reentrant, so the inventory's own methods can be called
+        inside the block.
+        """
+        return self._rw_lock.write()
+
+    def _record(self, record: dict) -> None:
+        if self._journal is None:
+            return
+        with self._persist_lock:
+            self._journal.append(record)
+            if self._journal.should_compact():
+                self._compaction_due = True
+
+    def _on_stock_change(self, product: Product, old_quantity: int, old_reorder_point: int) -> None:
+        with self._index_lock:
+            super()._on_stock_change(product, old_quantity, old_reorder_point)
+
+    def _compact_if_due(self) -> None:
+        if self._writer is not None:
+            self._writer.request()
+        elif self._compaction_due:
+            self.compact()
+
+    def compact(self) -> None:
+        """Write a fresh snapshot through the attached journal.
+
+        Raises:
+            ValueError: If no journal is attached
+        """
+        with self._rw_lock.write():
+            if self._journal is None:
+                raise ValueError("No journal attached to the inventory")
+            with self._persist_lock:
+                self._journal.compact(self)
+                self._compaction_due = False
+
+    def persist(self) -> None:
+        """Make every journaled change durable, writing a snapshot only when one is due.
+
+        Meant as the background writer's save: most windows just fsync the
+        journal, and the snapshot is rewritten once the journal has grown
+        past its compaction threshold.
+
+        Raises:
+            ValueError: If no journal is attached
+        """
+        with self._persist_lock:
+            if self._journal is None:
+                raise ValueError("No journal attached to the inventory")
+            if not self._journal.should_compact():
+                self._journal.sync()
+                return
+        self.compact()
+
+    def add_product(self, product: Product) -> None:
+        with self._rw_lock.write():
+            super().add_product(product)
+        self._compact_if_due()
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        with self._rw_lock.write():
+            super().add_products(products)
+        self._compact_if_due()
+
+    def upsert_products(self, products: Iterable[Product]) -> int:
+        with self._rw_lock.write():
+            replaced = super().upsert_products(products)
+        self._compact_if_due()
+        return replaced
+
+    def remove_product(self, product_id: str) -> None:
+        with self._rw_lock.write():
+            super().remove_product(product_id)
+        self._compact_if_due()
+
+    def remove_expired_products(self) -> List[str]:
+        with self._rw_lock.write():
+            expired = super().remove_expired_products()
+        self._compact_if_due()
+        return expired
+
+    def apply_batch(self, transactions: Iterable[Tuple[str, str, int]]) -> BatchResult:
+        with self._rw_lock.write():
+            result = super().apply_batch(transactions)
+        self._compact_if_due()
+        return result
+
+    def set_prices(self, prices: Iterable[Tuple[str, float]],
+                   list_prices: Optional[Dict[str, float]] = None) -> int:
+        with self._rw_lock.write():
+            count = super().set_prices(prices, list_prices)
+        self._compact_if_due()
+        return count
+
+    def reprice(self, rules: Iterable, today: Optional[date] = None,
+                dry_run: bool = False) -> RepricePlan:
+        # Exclusive even for a dry run, so the plan sees one consistent set of stock levels
+        with self._rw_lock.write():
+            plan = super().reprice(rules, today, dry_run)
+        self._compact_if_due()
+        return plan
+
+    def sell_product(self, product_id: str, quantity: int) -> None:
+        with self._rw_lock.read(), self._stripes.for_key(product_id):
+            super().sell_product(product_id, quantity)
+        self._compact_if_due()
+
+    def restock_product(self, product_id: str, quantity: int) -> None:
+        with self._rw_lock.read(), self._stripes.for_key(product_id):
+            super().restock_product(product_id, quantity)
+        self._compact_if_due()
+
+    def set_reorder_point(self, product_id: str, reorder_point: int) -> None:
+        with self._rw_lock.read(), self._stripes.for_key(product_id):
+            super().set_reorder_point(product_id, reorder_point)
+        self._compact_if_due()
+
+    def __contains__(self, product_id: str) -> bool:
+        with self._rw_lock.read():
+            return super().__contains__(product_id)
+
+    def __len__(self) -> int:
+        with self._rw_lock.read():
+            return super().__len__()
+
+    def get_product(self, product_id: str) -> Product:
+        with self._rw_lock.read():
+            return super().get_product(product_id)
+
+    def list_all_products(self) -> List[Product]:
+        with self._rw_lock.read():
+            return super().list_all_products()
+
+    def search_by_name(self, name: str, limit: Optional[int] = None) -> List[Product]:
+        with self._rw_lock.read():
+            return super().search_by_name(name, limit)
+
+    def search_by_type(self, product_type: Type[Product]) -> List[Product]:
+        with self._rw_lock.read():
+            return super().search_by_type(product_type)
+
+    def query(self, query: Optional[Query] = None, limit: Optional[int] = None,
+              **filters) -> List[Product]:
+        with self._rw_lock.read(), self._index_lock:
+            return super().query(query, limit, **filters)
+
+    def explain_query(self, query: Optional[Query] = None, **filters) -> List[Tuple[str, int]]:
+        with self._rw_lock.read(), self._index_lock:
+            return super().explain_query(query, **filters)
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        with self._rw_lock.read(), self._index_lock:
+            return super().changes_since(version)
+
+    def snapshot(self) -> ProductSnapshot:
+        with self._rw_lock.read(), self._index_lock:
+            return super().snapshot()
+
+    def get_expiring_products(self, days: int, today: Optional[date] = None) -> List[Grocery]:
+        with self._rw_lock.read():
+            return super().get_expiring_products(days, today)
+
+    def to_dict_list(self) -> List[dict]:
+        with self._rw_lock.read():
+            return super().to_dict_list()
+
+    def total_inventory_value(self) -> float:
+        with self._rw_lock.read(), self._index_lock:
+            return super().total_inventory_value()
+
+    def total_units(self) -> int:
+        with self._rw_lock.read(), self._index_lock:
+            return super().total_units()
+
+    def value_by_type(self) -> Dict[str, Dict[str, float]]:
+        with self._rw_lock.read(), self._index_lock:
+            return super().value_by_type()
+
+    def check_aggregates(self) -> bool:
+        with self._rw_lock.read(), self._index_lock:
+            return super().check_aggregates()
+
+    def get_low_stock_products(self, threshold: Optional[int] = None) -> List[Product]:
+        with self._rw_lock.read(), self._index_lock:
+            return super().get_low_stock_products(threshold)
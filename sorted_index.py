@@ -0,0 +1,110 @@
+from bisect import bisect_left, insort
+from typing import Any, Iterator, List, Optional, Tuple
+
+class _Top:
+    """Sorts after every item, so (key, _TOP) follows all entries with that key."""
+
+    def __lt__(self, other: Any) -> bool:
+        return False
+
+    def __gt__(self, other: Any) -> bool:
+        return True
+
+_TOP = _Top()
+
+class SortedIndex:
+    """Sorted multimap of (key, item) entries for ordered range queries.
+
+    Entries are kept in a list of bounded-size sorted buckets, so inserts and
+    removals move at most one bucket's worth of entries while lookups and
+    range starts are found by binary search in O(log n).
+    """
+
+    _LOAD = 512
+
+    def __init__(self):
+        self._buckets: List[List[Tuple[Any, Any]]] = []
+        self._maxes: List[Tuple[Any, Any]] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Any, item: Any) -> None:
+        """Insert an entry; an item may appear under several keys."""
+        entry = (key, item)
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            return
+        index = bisect_left(self._maxes, entry)
+        if index == len(self._maxes):
+            index -= 1
+            self._buckets[index].append(entry)
+        else:
+            insort(self._buckets[index], entry)
+        bucket = self._buckets[index]
+        self._maxes[index] = bucket[-1]
+        if len(bucket) > 2 * self._LOAD:
+            self._buckets[index:index + 1] = [bucket[:self._LOAD], bucket[self._LOAD:]]
+            self._maxes[index:index + 1] = [bucket[self._LOAD - 1], bucket[-1]]
+
+    def remove(self, key: Any, item: Any) -> None:
+        """Remove an entry.
+
+        Raises:
+            KeyError: If the entry isn't in the index
+        """
+        entry = (key, item)
+        index = bisect_left(self._maxes, entry)
+        if index == len(self._maxes):
+            raise KeyError(entry)
+        bucket = self._buckets[index]
+        position = bisect_left(bucket, entry)
+        if position == len(bucket) or bucket[position] != entry:
+            raise KeyError(entry)
+        del bucket[position]
+        self._len -= 1
+        if bucket:
+            self._maxes[index] = bucket[-1]
+        else:
+            del self._buckets[index]
+            del self._maxes[index]
+
+    def irange(self, minimum: Optional[Any] = None, maximum: Optional[Any] = None) -> Iterator[Any]:
+        """Yield items whose key lies in [minimum, maximum], in key order.
+
+        Either bound may be None to leave that side open.
+        """
+        if minimum is None:
+            index, position = 0, 0
+        else:
+            start = (minimum,)
+            index = bisect_left(self._maxes, start)
+            if index == len(self._maxes):
+                return
+            position = bisect_left(self._buckets[index], start)
+        for bucket in self._buckets[index:]:
+            for key, item in bucket[position:] if position else bucket:
+                if maximum is not None and key > maximum:
+                    return
+                yield item
+            position = 0
+
+    def rank(self, key: Any) -> int:
+        """Return the number of entries whose key is strictly less than key."""
+        return self._position((key,))
+
+    def count(self, minimum: Optional[Any] = None, maximum: Optional[Any] = None) -> int:
+        """Return the number of entries whose key lies in [minimum, maximum]."""
+        high = self._len if maximum is None else self._position((maximum, _TOP))
+        low = 0 if minimum is None else self.rank(minimum)
+        return max(0, high - low)
+
+    def _position(self, entry: Tuple[Any, Any]) -> int:
+        index = bisect_left(self._maxes, entry)
+        if index == len(self._maxes):
+            return self._len
+        return (sum(len(bucket) for bucket in self._buckets[:index])
+                + bisect_left(self._buckets[index], entry))
@@ -0,0 +1,691 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from product import Product, Grocery
+from schema import PRODUCT_TYPES, Field, all_fields, schema_for
+from search_index import normalize_name
+from batch import BatchResult, plan_batch
+from query import Query, CATEGORICAL_FIELDS
+from pricing import RepricePlan, plan_repricing
+from utils import LoadReport, stream_inventory_from_file
+from versioning import Change, ChangeFeed, ProductSnapshot
+
+# Every registered field is stored in a column of the same name. Fields
+# shared by all types are NOT NULL; the others are NULL in rows of other
+# types. Field minimums become CHECK constraints.
+_FIELDS = all_fields()
+_SHARED_FIELDS = {field.name for field in next(iter(PRODUCT_TYPES.values())).common_fields}
+_SQL_TYPES = {'str': 'TEXT', 'int': 'INTEGER', 'float': 'REAL', 'date': 'TEXT'}
+
+def _column_definition(field: Field) -> str:
+    definition = f"{field.name} {_SQL_TYPES[field.kind]}"
+    if field.name in _SHARED_FIELDS:
+        definition += " NOT NULL"
+    if field.minimum is not None:
+        definition += f" CHECK ({field.name} >= {field.minimum!r})"
+    return definition
+
+# Column order of the rows _to_product reads; _product_row appends name_lower
+_ROW_NAMES = ('product_id', 'type') + tuple(field.name for field in _FIELDS[1:])
+
+_COLUMNS = ', '.join(_ROW_NAMES)
+
+_INSERT = (f"INSERT INTO products ({_COLUMNS}, name_lower) "
+           f"VALUES ({', '.join('?' * (len(_ROW_NAMES) + 1))})")
+
+_FIELD_COLUMNS = ',\n    '.join(_column_definition(field) for field in _FIELDS[1:])
+
+_CATEGORICAL_INDEXES = ''.join(
+    f"CREATE INDEX IF NOT EXISTS idx_products_{field} ON products ({field} COLLATE NOCASE) "
+    f"WHERE {field} IS NOT NULL;\n" for field in CATEGORICAL_FIELDS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    {_FIELD_COLUMNS}
+);
+CREATE INDEX IF NOT EXISTS idx_products_type ON products (type);
+CREATE INDEX IF NOT EXISTS idx_products_stock ON products (quantity_in_stock);
+CREATE INDEX IF NOT EXISTS idx_products_reorder ON products (quantity_in_stock - reorder_point);
+CREATE INDEX IF NOT EXISTS idx_products_expiry ON products (expiry_date) WHERE expiry_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+{_CATEGORICAL_INDEXES}
+
+CREATE TABLE IF NOT EXISTS type_totals (
+    type TEXT PRIMARY KEY,
+    value REAL NOT NULL,
+    units INTEGER NOT NULL,
+    products INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS products_totals_insert AFTER INSERT ON products BEGIN
+    INSERT OR IGNORE INTO type_totals VALUES (new.type, 0.0, 0, 0);
+    UPDATE type_totals SET value = value + new.price * new.quantity_in_stock,
+        units = units + new.quantity_in_stock, products = products + 1
+        WHERE type = new.type;
+END;
+CREATE TRIGGER IF NOT EXISTS products_totals_delete AFTER DELETE ON products BEGIN
+    UPDATE type_totals SET value = value - old.price * old.quantity_in_stock,
+        units = units - old.quantity_in_stock, products = products - 1
+        WHERE type = old.type;
+    DELETE FROM type_totals WHERE type = old.type AND products = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS products_totals_update
+AFTER UPDATE OF price, quantity_in_stock ON products BEGIN
+    UPDATE type_totals SET
+        value = value + new.price * new.quantity_in_stock - old.price * old.quantity_in_stock,
+        units = units + new.quantity_in_stock - old.quantity_in_stock
+        WHERE type = new.type;
+END;
+"""
+
+# Trigram full-text index over normalized names, kept in sync by triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name_lower, content='products', content_rowid='rowid', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, name_lower) VALUES (new.rowid, new.name_lower);
+END;
+CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name_lower)
+        VALUES ('delete', old.rowid, old.name_lower);
+END;
+"""
+
+# Same ordering as NameIndex: exact, prefix, word start, then any substring
+_NAME_RANK = """
+    ORDER BY CASE
+        WHEN name_lower = :q THEN 0
+        WHEN instr(name_lower, :q) = 1 THEN 1
+        WHEN instr(' ' || name_lower, ' ' || :q) > 0 THEN 2
+        ELSE 3 END,
+    instr(name_lower, :q), length(name_lower), name_lower, product_id
+"""
+
+def _iso_date(value: str) -> str:
+    """Zero-padded form of a date field, so dates compare correctly as text."""
+    return value if len(value) == 10 else datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+
+# Per field kind, conversion of a serialized value to its column value
+_TO_COLUMN = {'date': _iso_date}
+
+_ROW_CONVERTERS = tuple((name, _TO_COLUMN.get(field.kind))
+                        for name, field in zip(_ROW_NAMES[2:], _FIELDS[1:]))
+
+def _product_row(product: Product) -> Tuple:
+    """Column values for inserting a product into the products table, in _INSERT order."""
+    data = product.to_dict()
+    values = [data['product_id'], data['type']]
+    for name, convert in _ROW_CONVERTERS:
+        value = data.get(name)
+        values.append(value if convert is None or value is None else convert(value))
+    values.append(normalize_name(data['name']))
+    return tuple(values)
+
+class SQLiteInventory:
+    """Inventory stored in an SQLite database in WAL mode.
+
+    Implements the Inventory API on top of indexed SQL: name searches use an
+    FTS5 trigram index, type, stock and expiry queries use B-tree indexes,
+    and stock value totals are maintained by triggers. Sells and restocks
+    are single-row conditional UPDATEs, so each is its own transaction and
+    can never drive stock negative. Products are only built when a method
+    returns them; products handed out write stock changes back to the
+    database.
+
+    Changes made through this instance are versioned and fed to
+    changes_since() and an attached journal once their transaction
+    commits, like Inventory's. The database stays the source of truth; a
+    journal here is a log of changes, e.g. for a replica. Commits are not
+    fsynced one by one (WAL with synchronous=NORMAL); persist() checkpoints
+    the WAL into the database file.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._conn = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        self._version = 0
+        self._reorder_subscribers: List[Callable[[Product], None]] = []
+        self._ledger = None
+        self._journal = None
+        self._writer = None
+        self._changes = ChangeFeed()
+        self._snapshot: Optional[ProductSnapshot] = None
+        # Changes and journal records of the open transaction, published on commit
+        self._pending_changes: List[Tuple[str, str]] = []
+        self._pending_records: List[dict] = []
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(products)")}
+        for field in _FIELDS:
+            if field.name not in existing:
+                # Databases created before the field was registered, e.g. grocery list prices
+                self._conn.execute(f"ALTER TABLE products ADD COLUMN {_column_definition(field)}")
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self._has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 or older than 3.34: fall back to scanning names
+            self._has_fts = False
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @property
+    def version(self) -> int:
+        """Counter incremented by every change made through this instance."""
+        return self._version
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        """Return the (version, op, product_id) changes made after a version; see Inventory.changes_since."""
+        with self._lock:
+            return self._changes.since(version)
+
+    def snapshot(self) -> ProductSnapshot:
+        """Return the current products in insertion order, read once per version.
+
+        Unlike Inventory.snapshot this reads every row; the products are
+        detached copies that write stock changes back, as from list_all_products().
+        """
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self._version:
+                products = self.list_all_products()
+                self._snapshot = ProductSnapshot(self._version, (products,), len(products))
+            return self._snapshot
+
+    def attach_journal(self, journal) -> None:
+        """Log every subsequent committed change to a TransactionJournal (or None to stop)."""
+        self._journal = journal
+
+    def set_background_writer(self, writer) -> None:
+        """Request a persistence.BackgroundWriter save after every commit (or None to stop)."""
+        self._writer = writer
+
+    def persist(self) -> None:
+        """Checkpoint committed changes from the WAL into the database file, syncing it."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def compact(self) -> None:
+        """Checkpoint every committed change and truncate the WAL file."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _changed(self, op: str, product_id: str, record: Optional[dict] = None) -> None:
+        """Note a change (and its journal record) made in the open transaction."""
+        self._pending_changes.append((op, product_id))
+        if record is not None:
+            self._pending_records.append(record)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the enclosed statements in one IMMEDIATE transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._pending_changes.clear()
+                self._pending_records.clear()
+                raise
+            self._conn.execute("COMMIT")
+            self._publish()
+
+    def _publish(self) -> None:
+        """Bump the version per committed change and journal the transaction's records."""
+        for op, product_id in self._pending_changes:
+            self._version += 1
+            self._changes.append(self._version, op, product_id)
+        records, self._pending_records = self._pending_records, []
+        changed = bool(self._pending_changes)
+        self._pending_changes.clear()
+        if self._journal is not None and records:
+            for record in records:
+                self._journal.append(record)
+            if self._journal.should_compact():
+                self._journal.compact(self)
+        if changed and self._writer is not None:
+            self._writer.request()
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _to_product(self, row: tuple) -> Product:
+        data = dict(zip(_ROW_NAMES, row))
+        product = schema_for(data['type']).decode(data)
+        product.set_stock_listener(self._on_product_change)
+        return product
+
+    def _products(self, sql: str, params=()) -> List[Product]:
+        return [self._to_product(row) for row in self._query(sql, params)]
+
+    def _on_product_change(self, product: Product, old_quantity: int, old_reorder_point: int) -> None:
+        """Write a stock change made directly on a handed-out product back to the database."""
+        delta = product.quantity_in_stock - old_quantity
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE products SET quantity_in_stock = quantity_in_stock + ?, reorder_point = ? "
+                "WHERE product_id = ? AND quantity_in_stock + ? >= 0",
+                (delta, product.reorder_point, product.product_id, delta))
+            if not cursor.rowcount:
+                raise ValueError(f"Product {product.product_id} changed in the database; reload it")
+            product_id = product.product_id
+            if delta:
+                self._changed('stock', product_id, {'op': 'sell' if delta < 0 else 'restock',
+                                                    'id': product_id, 'qty': abs(delta)})
+            if product.reorder_point != old_reorder_point:
+                self._changed('reorder', product_id,
+                              {'op': 'reorder', 'id': product_id, 'point': product.reorder_point})
+        self._check_reorder(product.product_id, old_quantity, old_reorder_point,
+                            product.quantity_in_stock, product.reorder_point)
+
+    def _check_reorder(self, product_id: str, old_quantity: int, old_reorder_point: int,
+                       new_quantity: int, new_reorder_point: int) -> None:
+        if self._reorder_subscribers and old_quantity > old_reorder_point and new_quantity <= new_reorder_point:
+            product = self.get_product(product_id)
+            for callback in list(self._reorder_subscribers):
+                callback(product)
+
+    def attach_ledger(self, ledger) -> None:
+        """Record every subsequent sale and restock in a SalesLedger (or None to stop)."""
+        self._ledger = ledger
+
+    def _record_sale(self, op: str, product_id: str, quantity: int) -> None:
+        if self._ledger is not None:
+            self._ledger.record(op, self.get_product(product_id), quantity)
+
+    def subscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None:
+        """Call callback(product) whenever a product's stock drops to or below its reorder point."""
+        self._reorder_subscribers.append(callback)
+
+    def unsubscribe_reorder_alerts(self, callback: Callable[[Product], None]) -> None:
+        """Stop delivering reorder alerts to a callback registered with subscribe_reorder_alerts."""
+        self._reorder_subscribers.remove(callback)
+
+    def add_product(self, product: Product) -> None:
+        """Add a product to the inventory."""
+        self.add_products([product])
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """Add a batch of products in a single transaction."""
+        rows = []
+        records = []
+        seen = set()
+        for product in products:
+            if not isinstance(product, Product):
+                raise TypeError("Product must be an instance of Product class")
+            if product.product_id in seen:
+                raise ValueError(f"Product with ID '{product.product_id}' already exists.")
+            seen.add(product.product_id)
+            rows.append(_product_row(product))
+            records.append({'op': 'add', 'product': product.to_dict()})
+        try:
+            with self._transaction() as conn:
+                conn.executemany(_INSERT, rows)
+                for row, record in zip(rows, records):
+                    self._changed('add', row[0], record)
+        except sqlite3.IntegrityError as e:
+            duplicate = next((row[0] for row in rows if row[0] in self), None)
+            if duplicate is None:
+                raise ValueError(f"Error adding products: {e}") from None
+            raise ValueError(f"Product with ID '{duplicate}' already exists.") from None
+
+    def upsert_products(self, products: Iterable[Product]) -> int:
+        """Add products, replacing existing ones with the same ID, in a single transaction.
+
+        Returns:
+            int: Number of existing products replaced
+        """
+        rows = []
+        for product in products:
+            if not isinstance(product, Product):
+                raise TypeError("Product must be an instance of Product class")
+            rows.append((_product_row(product), product.to_dict()))
+        replaced = 0
+        with self._transaction() as conn:
+            for row, data in rows:
+                # Delete and insert rather than UPDATE so the totals and FTS triggers fire
+                if conn.execute("DELETE FROM products WHERE product_id = ?", (row[0],)).rowcount:
+                    replaced += 1
+                    self._changed('replace', row[0], {'op': 'upsert', 'product': data})
+                else:
+                    self._changed('add', row[0], {'op': 'add', 'product': data})
+                conn.execute(_INSERT, row)
+        return replaced
+
+    def __contains__(self, product_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM products WHERE product_id = ?", (product_id,)))
+
+    def __len__(self) -> int:
+        return self._query("SELECT count(*) FROM products")[0][0]
+
+    def remove_product(self, product_id: str) -> None:
+        """Remove a product from the inventory."""
+        with self._transaction() as conn:
+            if not conn.execute("DELETE FROM products WHERE product_id = ?", (product_id,)).rowcount:
+                raise ValueError(f"Product with ID '{product_id}' not found.")
+            self._changed('remove', product_id, {'op': 'remove', 'id': product_id})
+
+    def get_product(self, product_id: str) -> Product:
+        """Get a product by its ID."""
+        rows = self._query(f"SELECT {_COLUMNS} FROM products WHERE product_id = ?", (product_id,))
+        if not rows:
+            raise ValueError(f"Product with ID '{product_id}' not found.")
+        return self._to_product(rows[0])
+
+    def iter_products(self, batch_size: int = 1000) -> Iterator[Product]:
+        """Yield every product, fetching rows in batches instead of all at once."""
+        last_id = None
+        while True:
+            if last_id is None:
+                rows = self._query(f"SELECT {_COLUMNS} FROM products ORDER BY product_id LIMIT ?",
+                                   (batch_size,))
+            else:
+                rows = self._query(f"SELECT {_COLUMNS} FROM products WHERE product_id > ? "
+                                   "ORDER BY product_id LIMIT ?", (last_id, batch_size))
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_product(row)
+            last_id = rows[-1][0]
+
+    def list_all_products(self) -> List[Product]:
+        """List all products in the inventory."""
+        return self._products(f"SELECT {_COLUMNS} FROM products ORDER BY rowid")
+
+    def search_by_name(self, name: str, limit: Optional[int] = None) -> List[Product]:
+        """Search products by name (case-insensitive partial match), best matches first."""
+        needle = normalize_name(name)
+        params = {'q': needle, 'limit': -1 if limit is None else limit}
+        if not needle:
+            return self._products(f"SELECT {_COLUMNS} FROM products ORDER BY rowid LIMIT :limit", params)
+        if self._has_fts and len(needle) >= 3:
+            params['match'] = '"' + needle.replace('"', '""') + '"'
+            where = "rowid IN (SELECT rowid FROM products_fts WHERE products_fts MATCH :match)"
+        else:
+            where = "instr(name_lower, :q) > 0"
+        return self._products(
+            f"SELECT {_COLUMNS} FROM products WHERE {where} AND instr(name_lower, :q) > 0 "
+            f"{_NAME_RANK} LIMIT :limit", params)
+
+    def search_by_type(self, product_type: Type[Product]) -> List[Product]:
+        """Search products by their type (Electronics, Grocery, or Clothing)."""
+        type_names = [name for name, schema in PRODUCT_TYPES.items() if issubclass(schema.cls, product_type)]
+        placeholders = ', '.join('?' * len(type_names))
+        return self._products(
+            f"SELECT {_COLUMNS} FROM products WHERE type IN ({placeholders}) ORDER BY rowid",
+            type_names)
+
+    def _query_conditions(self, query: Query) -> List[Tuple[str, str, tuple]]:
+        """(filter name, SQL condition, parameters) for each filter of a query."""
+        conditions = []
+        if query.product_type is not None:
+            if isinstance(query.product_type, str):
+                type_names = [query.product_type]
+            else:
+                type_names = [name for name, schema in PRODUCT_TYPES.items()
+                              if issubclass(schema.cls, query.product_type)]
+            conditions.append(('type', f"type IN ({', '.join('?' * len(type_names)) or 'NULL'})",
+                               tuple(type_names)))
+        for field in CATEGORICAL_FIELDS:
+            value = getattr(query, field)
+            if value is not None:
+                conditions.append((field, f"{field} = ? COLLATE NOCASE", (value,)))
+        ranges = (
+            ('price', 'price', query.min_price, query.max_price),
+            ('stock', 'quantity_in_stock', query.min_stock, query.max_stock),
+            ('expiry', 'expiry_date',
+             None if query.expires_from is None else query.expires_from.isoformat(),
+             None if query.expires_to is None else query.expires_to.isoformat()),
+        )
+        for name, column, minimum, maximum in ranges:
+            if minimum is not None and maximum is not None:
+                conditions.append((name, f"{column} BETWEEN ? AND ?", (minimum, maximum)))
+            elif minimum is not None:
+                conditions.append((name, f"{column} >= ?", (minimum,)))
+            elif maximum is not None:
+                conditions.append((name, f"{column} <= ?", (maximum,)))
+        return conditions
+
+    def query(self, query: Optional[Query] = None, limit: Optional[int] = None,
+              **filters) -> List[Product]:
+        """Find products matching every filter; SQLite's planner picks the index."""
+        query = (query or Query()).where(**filters) if filters else (query or Query())
+        conditions = self._query_conditions(query)
+        where = ' AND '.join(condition for _, condition, _ in conditions) or '1'
+        params = tuple(value for _, _, values in conditions for value in values)
+        return self._products(f"SELECT {_COLUMNS} FROM products WHERE {where} ORDER BY rowid LIMIT ?",
+                              params + (-1 if limit is None else limit,))
+
+    def explain_query(self, query: Optional[Query] = None, **filters) -> List[Tuple[str, int]]:
+        """Return (filter, matching rows) pairs, most selective first."""
+        query = (query or Query()).where(**filters) if filters else (query or Query())
+        counts = [(name, self._query(f"SELECT COUNT(*) FROM products WHERE {condition}", params)[0][0])
+                  for name, condition, params in self._query_conditions(query)]
+        return sorted(counts, key=lambda item: item[1])
+
+    def _adjust_stock(self, product_id: str, delta: int) -> None:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE products SET quantity_in_stock = quantity_in_stock + ? "
+                "WHERE product_id = ? AND quantity_in_stock + ? >= 0",
+                (delta, product_id, delta))
+            row = conn.execute("SELECT quantity_in_stock, reorder_point FROM products "
+                               "WHERE product_id = ?", (product_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Product with ID '{product_id}' not found.")
+            if not cursor.rowcount:
+                raise ValueError(f"Not enough stock available. Current stock: {row[0]}")
+            self._changed('stock', product_id, {'op': 'sell' if delta < 0 else 'restock',
+                                                'id': product_id, 'qty': abs(delta)})
+        self._check_reorder(product_id, row[0] - delta, row[1], row[0], row[1])
+
+    def sell_product(self, product_id: str, quantity: int) -> None:
+        """Sell a quantity of a product."""
+        if quantity <= 0:
+            raise ValueError(f"Error selling product {product_id}: Sell quantity must be positive")
+        try:
+            self._adjust_stock(product_id, -quantity)
+        except ValueError as e:
+            if product_id not in self:
+                raise
+            raise ValueError(f"Error selling product {product_id}: {str(e)}")
+        self._record_sale('sell', product_id, quantity)
+
+    def restock_product(self, product_id: str, quantity: int) -> None:
+        """Restock a quantity of a product."""
+        if quantity <= 0:
+            raise ValueError(f"Error restocking product {product_id}: Restock amount must be positive")
+        self._adjust_stock(product_id, quantity)
+        self._record_sale('restock', product_id, quantity)
+
+    def apply_batch(self, transactions: Iterable[Tuple[str, str, int]]) -> BatchResult:
+        """Apply a batch of sells and restocks all-or-nothing in one transaction."""
+        with self._lock:
+            lines, net = plan_batch(self, transactions)
+            if any(not line.ok for line in lines):
+                return BatchResult(lines, applied=False)
+            changes = [(delta, product_id) for product_id, delta in net.items() if delta]
+            try:
+                with self._transaction() as conn:
+                    before = {product_id: conn.execute(
+                        "SELECT quantity_in_stock, reorder_point FROM products WHERE product_id = ?",
+                        (product_id,)).fetchone() for _, product_id in changes}
+                    conn.executemany(
+                        "UPDATE products SET quantity_in_stock = quantity_in_stock + ? WHERE product_id = ?",
+                        changes)
+                    for _, product_id in changes:
+                        self._changed('stock', product_id)
+                    if lines:
+                        self._pending_records.append(
+                            {'op': 'batch',
+                             'lines': [[line.op, line.product_id, line.quantity] for line in lines]})
+            except sqlite3.IntegrityError:
+                # Another connection changed stock between validation and the update
+                raise ValueError("Stock changed while applying the batch; nothing was applied")
+            if self._journal is not None:
+                self._journal.sync()
+            for delta, product_id in changes:
+                quantity, reorder_point = before[product_id]
+                self._check_reorder(product_id, quantity, reorder_point, quantity + delta, reorder_point)
+            for line in lines:
+                self._record_sale(line.op, line.product_id, line.quantity)
+        return BatchResult(lines, applied=True)
+
+    def set_reorder_point(self, product_id: str, reorder_point: int) -> None:
+        """Set the stock level at or below which a product should be reordered."""
+        if reorder_point < 0:
+            raise ValueError(f"Error setting reorder point for product {product_id}: "
+                             "Reorder point cannot be negative")
+        with self._transaction() as conn:
+            row = conn.execute("SELECT quantity_in_stock, reorder_point FROM products "
+                               "WHERE product_id = ?", (product_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Product with ID '{product_id}' not found.")
+            conn.execute("UPDATE products SET reorder_point = ? WHERE product_id = ?",
+                         (reorder_point, product_id))
+            self._changed('reorder', product_id,
+                          {'op': 'reorder', 'id': product_id, 'point': reorder_point})
+        self._check_reorder(product_id, row[0], row[1], row[0], reorder_point)
+
+    def set_prices(self, prices: Iterable[Tuple[str, float]],
+                   list_prices: Optional[Dict[str, float]] = None) -> int:
+        """Change prices and grocery list prices in one transaction; see Inventory.set_prices."""
+        changes = list(prices)
+        list_prices = list_prices or {}
+        with self._transaction() as conn:
+            types = {}
+            for product_id in [product_id for product_id, _ in changes] + list(list_prices):
+                row = conn.execute("SELECT type FROM products WHERE product_id = ?", (product_id,)).fetchone()
+                if row is None:
+                    raise ValueError(f"Product with ID '{product_id}' not found.")
+                types[product_id] = row[0]
+            for product_id, price in changes:
+                if price < 0:
+                    raise ValueError(f"Error repricing product {product_id}: Price cannot be negative")
+            for product_id, list_price in list_prices.items():
+                if types[product_id] != 'Grocery':
+                    raise ValueError(f"Error repricing product {product_id}: Only groceries have a list price")
+                if list_price is not None and list_price < 0:
+                    raise ValueError(f"Error repricing product {product_id}: List price cannot be negative")
+            conn.executemany("UPDATE products SET price = ? WHERE product_id = ?",
+                             [(price, product_id) for product_id, price in changes])
+            conn.executemany("UPDATE products SET list_price = ? WHERE product_id = ?",
+                             [(list_price, product_id) for product_id, list_price in list_prices.items()])
+            repriced = dict.fromkeys(product_id for product_id, _ in changes)
+            for product_id in list(repriced) + [product_id for product_id in list_prices
+                                                if product_id not in repriced]:
+                self._changed('price', product_id)
+            if changes or list_prices:
+                record = {'op': 'price', 'prices': [list(change) for change in changes]}
+                if list_prices:
+                    record['list_prices'] = dict(list_prices)
+                self._pending_records.append(record)
+        if self._journal is not None and (changes or list_prices):
+            self._journal.sync()
+        return len(changes)
+
+    def reprice(self, rules: Iterable, today: Optional[date] = None,
+                dry_run: bool = False) -> RepricePlan:
+        """Apply pricing rules to every product; see Inventory.reprice."""
+        with self._lock:
+            plan = plan_repricing(self.iter_products(), list(rules), today)
+            if not dry_run:
+                self.set_prices([(product_id, new) for product_id, _, new in plan.changes],
+                                plan.list_prices)
+                plan.applied = True
+        return plan
+
+    def total_inventory_value(self) -> float:
+        """Get the total value of all products in inventory."""
+        return self._query("SELECT total(value) FROM type_totals")[0][0]
+
+    def total_units(self) -> int:
+        """Get the total number of units in stock across all products."""
+        return self._query("SELECT coalesce(sum(units), 0) FROM type_totals")[0][0]
+
+    def value_by_type(self) -> Dict[str, Dict[str, float]]:
+        """Get stock value, units and product count broken down by product type."""
+        return {type_name: {'value': value, 'units': units, 'products': products}
+                for type_name, value, units, products
+                in self._query("SELECT type, value, units, products FROM type_totals")}
+
+    def check_aggregates(self) -> bool:
+        """Recompute the trigger-maintained totals from the products table and compare."""
+        fresh = {row[0]: row[1:] for row in self._query(
+            "SELECT type, total(price * quantity_in_stock), sum(quantity_in_stock), count(*) "
+            "FROM products GROUP BY type")}
+        stored = {type_name: (totals['value'], totals['units'], totals['products'])
+                  for type_name, totals in self.value_by_type().items()}
+        if fresh.keys() != stored.keys():
+            return False
+        return all(abs(fresh[t][0] - stored[t][0]) <= 1e-6 * max(1.0, abs(fresh[t][0]))
+                   and fresh[t][1:] == stored[t][1:] for t in fresh)
+
+    def remove_expired_products(self) -> List[str]:
+        """Remove expired grocery products and return their IDs."""
+        today = date.today().isoformat()
+        with self._transaction() as conn:
+            expired_products = [row[0] for row in conn.execute(
+                "SELECT product_id FROM products WHERE expiry_date < ? ORDER BY expiry_date", (today,))]
+            conn.execute("DELETE FROM products WHERE expiry_date < ?", (today,))
+            for product_id in expired_products:
+                self._changed('remove', product_id, {'op': 'remove', 'id': product_id})
+        return expired_products
+
+    def get_expiring_products(self, days: int, today: Optional[date] = None) -> List[Grocery]:
+        """Get grocery products that are not yet expired but expire within the next N days."""
+        if days < 0:
+            raise ValueError("Days cannot be negative")
+        current_date = today if today is not None else date.today()
+        return self._products(
+            f"SELECT {_COLUMNS} FROM products WHERE expiry_date BETWEEN ? AND ? "
+            "ORDER BY expiry_date, product_id",
+            (current_date.isoformat(), (current_date + timedelta(days=days)).isoformat()))
+
+    def get_low_stock_products(self, threshold: Optional[int] = None) -> List[Product]:
+        """Get products with stock at or below the threshold, lowest stock first.
+
+        Without a threshold each product is compared against its own reorder point.
+        """
+        if threshold is None:
+            return self._products(
+                f"SELECT {_COLUMNS} FROM products WHERE quantity_in_stock - reorder_point <= 0 "
+                "ORDER BY quantity_in_stock - reorder_point")
+        return self._products(
+            f"SELECT {_COLUMNS} FROM products WHERE quantity_in_stock <= ? ORDER BY quantity_in_stock",
+            (threshold,))
+
+    def to_dict_list(self) -> List[dict]:
+        """Convert all products to a list of dictionaries for serialization."""
+        return [product.to_dict() for product in self.list_all_products()]
+
+def migrate_json_to_sqlite(json_filename: str, db_filename: str, batch_size: int = 1000,
+                           progress: Optional[Callable[[int, int, int], None]] = None) -> LoadReport:
+    """One-shot migration of an inventory.json file into an SQLite database.
+
+    The JSON file is streamed, so it is never fully loaded into memory, and
+    products are inserted one transaction per batch.
+
+    Args:
+        json_filename: Path to the existing JSON inventory
+        db_filename: Path to the SQLite database to create or extend
+        batch_size: Number of products inserted per transaction
+        progress: Optional callback receiving (records read, bytes read, total bytes)
+
+    Returns:
+        LoadReport: Count of migrated products and the rejected records
+    """
+    inventory = SQLiteInventory(db_filename)
+    try:
+        return stream_inventory_from_file(inventory, json_filename, batch_size, progress)
+    finally:
+        inventory.close()
@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+import pytest
+
+from product import Clothing, Electronics, Grocery
+
+def make_products(count: int = 30):
+    """A mix of all three product types with varied prices and stock."""
+    expiry = (date.today() + timedelta(days=30)).isoformat()
+    products = []
+    for number in range(count):
+        product_id = f"P{number:03d}"
+        price = 1.25 + number * 0.5
+        quantity = 10 + number % 7
+        if number % 3 == 0:
+            products.append(Electronics(product_id, f"Phone {number}", price, quantity, "Acme", 2))
+        elif number % 3 == 1:
+            products.append(Grocery(product_id, f"Milk {number}", price, quantity, expiry))
+        else:
+            products.append(Clothing(product_id, f"Shirt {number}", price, quantity, "M", "Cotton"))
+    return products
+
+@pytest.fixture
+def products():
+    return make_products()
+
+@pytest.fixture
+def catalog():
+    return make_products(60)
+
+@pytest.fixture
+def journal_files(tmp_path):
+    """(journal, snapshot) paths in a fresh directory."""
+    return str(tmp_path / "inventory.journal"), str(tmp_path / "inventory.json")
@@ -0,0 +1,89 @@
+import math
+import random
+
+import pytest
+
+from aggregates import StockTotals
+from inventory import Inventory
+from product import Clothing, Electronics
+from shared_inventory import SharedInventory
+from sqlite_inventory import SQLiteInventory
+
+def recomputed(products):
+    """Value, units and per-type breakdown summed from scratch."""
+    by_type = {}
+    for product in products:
+        totals = by_type.setdefault(product.product_type, {'value': 0.0, 'units': 0, 'products': 0})
+        totals['value'] += product.get_total_value()
+        totals['units'] += product.quantity_in_stock
+        totals['products'] += 1
+    value = math.fsum(product.get_total_value() for product in products)
+    return value, sum(product.quantity_in_stock for product in products), by_type
+
+@pytest.mark.parametrize('factory', [Inventory, SharedInventory, lambda: SQLiteInventory(':memory:')],
+                         ids=['inventory', 'shared', 'sqlite'])
+def test_incremental_totals_match_full_recompute(factory, catalog):
+    inventory = factory()
+    inventory.add_products(catalog[:40])
+    spare = catalog[40:]
+    rng = random.Random(7)
+    for _ in range(2000):
+        product_ids = [product.product_id for product in inventory.list_all_products()]
+        product_id = rng.choice(product_ids)
+        action = rng.random()
+        if action < 0.35:
+            stock = inventory.get_product(product_id).quantity_in_stock
+            if stock:
+                inventory.sell_product(product_id, rng.randint(1, stock))
+        elif action < 0.65:
+            inventory.restock_product(product_id, rng.randint(1, 20))
+        elif action < 0.75:
+            inventory.set_prices([(product_id, round(rng.uniform(0.5, 200), 2))])
+        elif action < 0.85:
+            inventory.apply_batch([("restock", product_id, 3), ("sell", product_id, 1)])
+        elif action < 0.93 and spare:
+            inventory.add_product(spare.pop())
+        elif len(product_ids) > 5:
+            inventory.remove_product(product_id)
+
+    assert inventory.check_aggregates()
+    value, units, by_type = recomputed(inventory.list_all_products())
+    assert inventory.total_inventory_value() == pytest.approx(value)
+    assert inventory.total_units() == units
+    reported = inventory.value_by_type()
+    assert reported.keys() == by_type.keys()
+    for type_name, totals in by_type.items():
+        assert reported[type_name]['value'] == pytest.approx(totals['value'])
+        assert reported[type_name]['units'] == totals['units']
+        assert reported[type_name]['products'] == totals['products']
+
+def test_check_aggregates_detects_drift(products):
+    inventory = Inventory()
+    inventory.add_products(products)
+    assert inventory.check_aggregates()
+    # Bypass the inventory so its running totals go stale
+    inventory.get_product("P000")._quantity_in_stock += 5
+    assert not inventory.check_aggregates()
+
+def test_stock_totals_follow_deltas_and_reset_when_empty():
+    totals = StockTotals()
+    phone = Electronics("E1", "Phone", 0.1, 3, "Acme", 1)
+    shirt = Clothing("C1", "Shirt", 0.2, 7, "M", "Cotton")
+    totals.add(phone)
+    totals.add(shirt)
+    phone.restock(2)
+    totals.adjust(phone, 2)
+    old_price = shirt.price
+    shirt.set_price(0.7)
+    totals.adjust_price(shirt, old_price)
+    assert totals.total_units == 12
+    assert totals.total_value == pytest.approx(0.5 + 4.9)
+    assert totals.by_type()['Clothing'] == {'value': pytest.approx(4.9), 'units': 7, 'products': 1}
+    assert totals.matches([phone, shirt])
+    assert not totals.matches([phone])
+
+    totals.remove(phone)
+    totals.remove(shirt)
+    # Exactly zero, not the rounding residue of the adds and removes
+    assert (totals.total_value, totals.total_units, totals.product_count) == (0.0, 0, 0)
+    assert totals.by_type() == {}
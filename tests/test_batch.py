@@ -0,0 +1,73 @@
+import pytest
+
+from columnar import ColumnarInventory
+from inventory import Inventory
+from shared_inventory import SharedInventory
+from sqlite_inventory import SQLiteInventory
+
+BACKENDS = {
+    'inventory': Inventory,
+    'shared': SharedInventory,
+    'columnar': ColumnarInventory,
+    'sqlite': lambda: SQLiteInventory(':memory:'),
+}
+
+class RecordingJournal:
+    """Stands in for TransactionJournal, keeping appended records in memory."""
+
+    def __init__(self):
+        self.records = []
+
+    def append(self, record):
+        self.records.append(record)
+
+    def sync(self):
+        pass
+
+    def should_compact(self):
+        return False
+
+@pytest.fixture
+def journal():
+    return RecordingJournal()
+
+@pytest.fixture(params=list(BACKENDS))
+def inventory(request, products, journal):
+    inventory = BACKENDS[request.param]()
+    inventory.add_products(products)
+    inventory.attach_journal(journal)
+    return inventory
+
+def stock(inventory):
+    return {product.product_id: product.quantity_in_stock for product in inventory.list_all_products()}
+
+def test_rejected_line_leaves_everything_unchanged(inventory, journal):
+    before = stock(inventory)
+    version = inventory.version
+    result = inventory.apply_batch([("sell", "P000", 1), ("restock", "P001", 5),
+                                    ("sell", "P002", 10_000), ("sell", "missing", 1)])
+    assert not result.applied
+    assert [line.line for line in result.errors] == [2, 3]
+    assert stock(inventory) == before
+    assert inventory.version == version
+    assert journal.records == []
+
+def test_lines_for_one_product_are_aggregated(inventory):
+    available = stock(inventory)["P000"]
+    # Each line fits on its own, together they oversell
+    result = inventory.apply_batch([("sell", "P000", available - 1), ("sell", "P000", 2)])
+    assert not result.applied
+    assert stock(inventory)["P000"] == available
+
+def test_valid_batch_applies_net_changes_as_one_record(inventory, journal):
+    before = stock(inventory)
+    result = inventory.apply_batch([("sell", "P000", 2), ("restock", "P000", 5),
+                                    ("sell", "P001", 1), ("restock", "P002", 3)])
+    assert result.applied
+    after = stock(inventory)
+    assert after["P000"] == before["P000"] + 3
+    assert after["P001"] == before["P001"] - 1
+    assert after["P002"] == before["P002"] + 3
+    assert journal.records == [
+        {'op': 'batch', 'lines': [["sell", "P000", 2], ["restock", "P000", 5],
+                                  ["sell", "P001", 1], ["restock", "P002", 3]]}]
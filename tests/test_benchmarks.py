@@ -0,0 +1,31 @@
+from datetime import date
+
+import pytest
+
+from benchmarks import BACKENDS, generate_catalog, run_size, search_terms
+from benchmarks.__main__ import compare
+
+TODAY = date(2026, 1, 1)
+
+def test_catalogs_are_reproducible():
+    first = [product.to_dict() for product in generate_catalog(200, seed=4, today=TODAY)]
+    second = [product.to_dict() for product in generate_catalog(200, seed=4, today=TODAY)]
+    assert first == second
+    assert first != [product.to_dict() for product in generate_catalog(200, seed=5, today=TODAY)]
+    assert {data['type'] for data in first} == {'Electronics', 'Grocery', 'Clothing'}
+    assert search_terms(20, seed=4) == search_terms(20, seed=4)
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_every_backend_runs_every_scenario(backend):
+    results = run_size(50, backend, repeat=1, operations=20, track_memory=False, today=TODAY)
+    scenarios = [result['scenario'] for result in results]
+    assert len(scenarios) == len(set(scenarios))
+    assert {'generate_catalog', 'add_product', 'search_by_name'} <= set(scenarios)
+    assert all(result['size'] == 50 and result['seconds'] >= 0 for result in results)
+
+def test_compare_flags_slowdowns_over_the_threshold():
+    baseline = [{'backend': 'inventory', 'size': 10, 'scenario': 'a', 'seconds': 1.0},
+                {'backend': 'inventory', 'size': 10, 'scenario': 'b', 'seconds': 1.0}]
+    results = [dict(baseline[0], seconds=1.1), dict(baseline[1], seconds=1.5)]
+    [message] = compare(results, baseline, threshold=1.2)
+    assert message.startswith("inventory b @ 10")
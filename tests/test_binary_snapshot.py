@@ -0,0 +1,196 @@
+import json
+import math
+import struct
+from array import array
+
+import pytest
+
+import binary_snapshot
+from binary_snapshot import BinarySnapshot, write_binary_snapshot
+from exceptions import InvalidProductDataError
+from inventory import Inventory
+from product import Clothing, Grocery
+from schema import PRODUCT_TYPES, Field, register_product_type
+from utils import (convert_binary_to_json, convert_json_to_binary, load_inventory_from_binary,
+                   open_binary_snapshot, save_inventory_to_binary, save_inventory_to_file)
+
+def by_id(inventory):
+    return sorted(inventory.to_dict_list(), key=lambda data: data['product_id'])
+
+def test_list_price_survives_round_trip(tmp_path, products):
+    inventory = Inventory()
+    inventory.add_products(products)
+    inventory.add_product(Grocery("G1", "Yogurt", 3.0, 5, "2030-01-01", list_price=4.0))
+    filename = str(tmp_path / "inventory.bin")
+    save_inventory_to_binary(inventory, filename)
+
+    restored = Inventory()
+    load_inventory_from_binary(restored, filename)
+    assert restored.get_product("G1").list_price == 4.0
+    assert restored.get_product("P001").list_price is None
+    assert by_id(restored) == by_id(inventory)
+
+def test_convert_to_json_matches_json_save(tmp_path, products):
+    inventory = Inventory()
+    inventory.add_products(products)
+    inventory.add_product(Grocery("G1", "Yogurt", 3.0, 5, "2030-01-01", list_price=4.0))
+    binary, converted, saved = (str(tmp_path / name) for name in ("i.bin", "c.json", "s.json"))
+    save_inventory_to_binary(inventory, binary)
+    convert_binary_to_json(binary, converted)
+    save_inventory_to_file(inventory, saved)
+    with open(converted) as f, open(saved) as g:
+        assert json.load(f) == json.load(g)
+
+def test_lookups_and_totals_read_the_columns(tmp_path, products):
+    filename = tmp_path / "inventory.bin"
+    with open(filename, 'wb') as f:
+        write_binary_snapshot(reversed(products), f)
+    with BinarySnapshot(str(filename)) as snapshot:
+        assert len(snapshot) == len(products)
+        assert snapshot.get_product("P007").to_dict() == products[7].to_dict()
+        assert "P999" not in snapshot
+        assert snapshot.total_inventory_value() == pytest.approx(
+            sum(product.get_total_value() for product in products))
+
+def test_products_are_decoded_lazily_and_cached(tmp_path, products):
+    filename = tmp_path / "inventory.bin"
+    with open(filename, 'wb') as f:
+        assert write_binary_snapshot(products, f) == len(products)
+    with open_binary_snapshot(str(filename)) as snapshot:
+        assert snapshot._cache == {}
+        first = snapshot.get_product("P004")
+        assert list(snapshot._cache) == [4]
+        assert snapshot.get_product("P004") is first
+        assert snapshot.find("P004") == 4 and snapshot.find("P0045") is None
+        with pytest.raises(ValueError):
+            snapshot.get_product("missing")
+        assert [product.to_dict() for product in snapshot] == [product.to_dict() for product in products]
+
+def test_convert_json_to_binary_round_trip(tmp_path, products):
+    inventory = Inventory()
+    inventory.add_products(products)
+    source, binary, back = (str(tmp_path / name) for name in ("i.json", "i.bin", "back.json"))
+    save_inventory_to_file(inventory, source)
+    assert convert_json_to_binary(source, binary) == len(products)
+    assert convert_binary_to_json(binary, back) == len(products)
+    with open(source) as f, open(back) as g:
+        assert json.load(f) == json.load(g)
+
+def test_missing_file_loads_nothing(tmp_path):
+    inventory = Inventory()
+    load_inventory_from_binary(inventory, str(tmp_path / "missing.bin"))
+    assert len(inventory) == 0
+
+@pytest.mark.parametrize('content, message', [
+    (b'', "Empty"),
+    (b'INVSNAP', "Truncated"),
+    (b'NOTASNAPSHOT' + b'\x00' * 64, "Not a binary"),
+])
+def test_invalid_files_are_rejected(tmp_path, content, message):
+    filename = tmp_path / "inventory.bin"
+    filename.write_bytes(content)
+    with pytest.raises(InvalidProductDataError, match=message):
+        BinarySnapshot(str(filename))
+
+def test_truncated_column_is_rejected(tmp_path, products):
+    filename = tmp_path / "inventory.bin"
+    with open(filename, 'wb') as f:
+        write_binary_snapshot(products, f)
+    filename.write_bytes(filename.read_bytes()[:-400])
+    with pytest.raises(InvalidProductDataError, match="Truncated"):
+        BinarySnapshot(str(filename))
+
+def test_unknown_format_version_is_rejected(tmp_path, products):
+    inventory = Inventory()
+    inventory.add_products(products)
+    filename = tmp_path / "inventory.bin"
+    save_inventory_to_binary(inventory, str(filename))
+    data = bytearray(filename.read_bytes())
+    data[8:10] = (99).to_bytes(2, 'little')
+    filename.write_bytes(bytes(data))
+    with pytest.raises(InvalidProductDataError, match="format version 99"):
+        BinarySnapshot(str(filename))
+
+@pytest.fixture
+def furniture():
+    """A product type registered only for the test, with a field no built-in type has."""
+    @register_product_type
+    class Furniture(Clothing):
+        FIELDS = (Field('seats', 'int', "Seats", minimum=1),)
+
+        def __init__(self, *args, seats: int, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._seats = seats
+
+    yield Furniture
+    del PRODUCT_TYPES['Furniture']
+
+def test_registered_types_need_no_new_format_version(tmp_path, products, furniture):
+    sofa = furniture("F1", "Sofa", 300.0, 2, "L", "Leather", seats=3)
+    filename = tmp_path / "inventory.bin"
+    with open(filename, 'wb') as f:
+        write_binary_snapshot(products + [sofa], f)
+    with BinarySnapshot(str(filename)) as snapshot:
+        restored = snapshot.get_product("F1")
+        assert type(restored) is furniture
+        assert restored.to_dict() == sofa.to_dict()
+
+def write_legacy_snapshot(products, version: int) -> bytes:
+    """Serialize products in the fixed version 1 or 2 layout."""
+    layout = binary_snapshot._LEGACY_LAYOUTS[version]
+    strings, codes = [], {}
+
+    def intern(value):
+        if value is None:
+            return binary_snapshot._NO_STRING
+        if value not in codes:
+            codes[value] = len(strings)
+            strings.append(value.encode('utf-8'))
+        return codes[value]
+
+    columns = {name: array(typecode) for name, typecode in layout}
+    for product in products:
+        data = product.to_dict()
+        row = {
+            'type': binary_snapshot._LEGACY_TYPES.index(data['type']),
+            'price': data['price'], 'quantity': data['quantity_in_stock'],
+            'reorder_point': data['reorder_point'],
+            'warranty_years': data.get('warranty_years', 0),
+            'expiry': product.expiry.toordinal() if data['type'] == 'Grocery' else 0,
+            'list_price': math.nan if data.get('list_price') is None else data['list_price'],
+            'product_id': intern(data['product_id']), 'name': intern(data['name']),
+            'attr_a': intern(data.get('brand', data.get('size'))), 'attr_b': intern(data.get('material')),
+        }
+        for name, _ in layout[:-2]:
+            columns[name].append(row[name])
+    ids = [product.product_id for product in products]
+    columns['by_id'].extend(sorted(range(len(ids)), key=ids.__getitem__))
+    position = 0
+    for value in strings:
+        columns['string_offsets'].append(position)
+        position += len(value)
+    columns['string_offsets'].append(position)
+
+    header = struct.Struct('<8sHHIQQ' + 'Q' * (len(layout) + 1))
+    body, offsets = b'', []
+    for name, _ in layout:
+        body += b'\x00' * (-(header.size + len(body)) % 8)
+        offsets.append(header.size + len(body))
+        body += columns[name].tobytes()
+    offsets.append(header.size + len(body))
+    return (header.pack(binary_snapshot.MAGIC, version, 0, 0, len(ids), len(strings), *offsets)
+            + body + b''.join(strings))
+
+@pytest.mark.parametrize('version', [1, 2])
+def test_legacy_versions_still_load(tmp_path, products, version):
+    products = products + [Grocery("G1", "Yogurt", 3.0, 5, "2030-01-01", list_price=4.0)]
+    filename = tmp_path / "inventory.bin"
+    filename.write_bytes(write_legacy_snapshot(products, version))
+
+    restored = Inventory()
+    load_inventory_from_binary(restored, str(filename))
+    expected = {product.product_id: product.to_dict() for product in products}
+    if version == 1:
+        # Version 1 had no list price column
+        expected["G1"]['list_price'] = None
+    assert by_id(restored) == [expected[product_id] for product_id in sorted(expected)]
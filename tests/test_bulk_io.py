@@ -0,0 +1,106 @@
+import csv
+import json
+
+import pytest
+
+from bulk_io import EXPORT_COLUMNS, export_products, import_products
+from exceptions import InvalidProductDataError
+from inventory import Inventory
+from utils import save_inventory_to_file
+
+HEADER = "type,product_id,name,price,quantity_in_stock,brand,warranty_years,expiry_date,size,material\n"
+
+def by_id(inventory):
+    return sorted(inventory.to_dict_list(), key=lambda data: data['product_id'])
+
+@pytest.fixture
+def inventory(products):
+    inventory = Inventory()
+    inventory.add_products(products)
+    return inventory
+
+def test_csv_export_imports_back_unchanged(tmp_path, inventory):
+    filename = str(tmp_path / "products.csv")
+    assert export_products(inventory, filename) == len(inventory)
+    with open(filename, newline='') as f:
+        assert tuple(next(csv.reader(f))) == EXPORT_COLUMNS
+
+    restored = Inventory()
+    report = import_products(restored, filename, chunk_size=7, workers=1)
+    assert (report.inserted, report.updated, report.ok) == (len(inventory), 0, True)
+    assert by_id(restored) == by_id(inventory)
+
+def test_worker_processes_build_the_same_products(tmp_path, inventory):
+    filename = str(tmp_path / "products.csv")
+    export_products(inventory, filename)
+    restored = Inventory()
+    report = import_products(restored, filename, chunk_size=4, workers=2)
+    assert report.inserted == len(inventory)
+    assert by_id(restored) == by_id(inventory)
+
+def test_json_export_matches_json_save(tmp_path, inventory):
+    exported, saved = str(tmp_path / "exported.json"), str(tmp_path / "saved.json")
+    export_products(inventory, exported)
+    save_inventory_to_file(inventory, saved)
+    with open(exported) as f, open(saved) as g:
+        assert json.load(f) == json.load(g)
+
+def test_upsert_replaces_existing_and_repeated_ids(tmp_path, inventory):
+    filename = tmp_path / "products.csv"
+    filename.write_text(HEADER
+                        + "Electronics,P000,Phone X,99.0,4,Acme,3,,,\n"
+                        + "Clothing,N1,Hat,5.0,2,,,,L,Wool\n"
+                        + "Clothing,N1,Hat,6.0,2,,,,L,Wool\n")
+    report = import_products(inventory, str(filename), workers=1)
+    assert (report.inserted, report.updated) == (1, 1)
+    assert inventory.get_product("P000").name == "Phone X"
+    assert inventory.get_product("P000").warranty_years == 3
+    assert inventory.get_product("N1").price == 6.0
+
+def test_without_upsert_duplicates_are_rejected(tmp_path, inventory):
+    filename = tmp_path / "products.csv"
+    filename.write_text(HEADER
+                        + "Electronics,P000,Phone X,99.0,4,Acme,3,,,\n"
+                        + "Clothing,N1,Hat,5.0,2,,,,L,Wool\n"
+                        + "Clothing,N1,Hat,6.0,2,,,,L,Wool\n")
+    report = import_products(inventory, str(filename), workers=1, upsert=False)
+    assert report.inserted == 1
+    assert [row_number for row_number, _ in report.errors] == [1, 3]
+    assert inventory.get_product("P000").name == "Phone 0"
+    assert inventory.get_product("N1").price == 5.0
+
+def test_rejected_rows_are_written_with_their_errors(tmp_path):
+    filename, rejects = tmp_path / "products.csv", tmp_path / "rejects.csv"
+    filename.write_text(HEADER
+                        + "Grocery,G1,Milk,2.0,5,,,2030-01-01,,\n"
+                        + "Grocery,G2,Milk,abc,5,,,2030-01-01,,\n"
+                        + "Gadget,X1,Thing,1.0,1,,,,,\n"
+                        + "Clothing,C1,Hat,5.0,2,,,,L,Wool,extra\n")
+    progress = []
+    inventory = Inventory()
+    report = import_products(inventory, str(filename), chunk_size=2, workers=1,
+                             reject_filename=str(rejects),
+                             progress=lambda rows, report: progress.append((rows, report.loaded)))
+    assert report.inserted == 1 and not report.ok
+    assert progress == [(2, 1), (4, 1)]
+    with open(rejects, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['row'] for row in rows] == ['2', '3', '4']
+    assert rows[0]['product_id'] == "G2" and rows[0]['price'] == "abc"
+    assert all(row['error'] for row in rows)
+
+def test_unsupported_files_are_rejected(tmp_path, inventory):
+    with pytest.raises(InvalidProductDataError):
+        import_products(inventory, str(tmp_path / "products.json"))
+    with pytest.raises(InvalidProductDataError):
+        export_products(inventory, str(tmp_path / "products.xlsx"))
+    with pytest.raises(ValueError):
+        import_products(inventory, str(tmp_path / "products.csv"), chunk_size=0)
+
+def test_parquet_round_trip(tmp_path, inventory):
+    pytest.importorskip('pyarrow')
+    filename = str(tmp_path / "products.parquet")
+    export_products(inventory, filename, chunk_size=8)
+    restored = Inventory()
+    import_products(restored, filename, chunk_size=8, workers=1)
+    assert by_id(restored) == by_id(inventory)
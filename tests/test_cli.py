@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+import subprocess
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+import cli
+from inventory import Inventory
+from journal import TransactionJournal
+from product import Grocery
+from utils import save_inventory_to_file
+
+def run(journal_files, *argv):
+    """Run the CLI against the test files; returns (exit status, stdout)."""
+    journal, snapshot = journal_files
+    out = io.StringIO()
+    status = cli.main(['--snapshot', snapshot, '--journal', journal, *argv], out=out)
+    return status, out.getvalue()
+
+@pytest.fixture
+def inventory(journal_files, products):
+    """The catalog plus an expired and a soon-expiring grocery, saved as the snapshot."""
+    inventory = Inventory()
+    inventory.add_products(products)
+    inventory.add_product(Grocery("OLD", "Old Milk", 1.0, 2, (date.today() - timedelta(days=2)).isoformat()))
+    inventory.add_product(Grocery("SOON", "Cream", 3.0, 4, (date.today() + timedelta(days=3)).isoformat()))
+    inventory.sell_product("P000", 8)
+    save_inventory_to_file(inventory, journal_files[1])
+    return inventory
+
+def test_valuation(journal_files, inventory):
+    status, output = run(journal_files, 'valuation')
+    summary = json.loads(output)
+    assert status == 0
+    assert summary['products'] == len(inventory)
+    assert summary['units'] == inventory.total_units()
+    assert summary['value'] == round(inventory.total_inventory_value(), 2)
+    assert summary['by_type']['Grocery']['products'] == len(inventory.search_by_type(Grocery))
+
+def test_low_stock_matches_the_inventory(journal_files, inventory):
+    for extra in ([], ['--threshold', '11']):
+        status, output = run(journal_files, 'low-stock', *extra)
+        threshold = int(extra[1]) if extra else None
+        assert [row['product_id'] for row in json.loads(output)] == [
+            product.product_id for product in inventory.get_low_stock_products(threshold)]
+
+def test_expiring_as_json_lines_and_csv(journal_files, inventory):
+    today = date.today().isoformat()
+    status, output = run(journal_files, 'expiring', '--days', '5', '--today', today, '--format', 'jsonl')
+    assert [json.loads(line)['product_id'] for line in output.splitlines()] == ["SOON"]
+    status, output = run(journal_files, 'expiring', '--days', '40', '--today', today, '--format', 'csv')
+    rows = list(csv.DictReader(io.StringIO(output)))
+    assert [row['product_id'] for row in rows] == [
+        product.product_id for product in inventory.get_expiring_products(40)]
+    assert list(rows[0]) == cli.ROW_COLUMNS
+
+def test_pending_journal_records_are_included(journal_files, inventory):
+    owner = Inventory()
+    journal = TransactionJournal(*journal_files)
+    journal.recover(owner)
+    owner.attach_journal(journal)
+    owner.remove_product("P001")
+    journal.close()
+
+    status, output = run(journal_files, 'valuation')
+    assert json.loads(output)['products'] == len(inventory) - 1
+
+def test_sweep_expired(journal_files, inventory):
+    status, output = run(journal_files, 'sweep-expired', '--dry-run')
+    assert json.loads(output) == {'removed': 1, 'product_ids': ["OLD"], 'dry_run': True}
+    assert json.loads(run(journal_files, 'valuation')[1])['products'] == len(inventory)
+
+    status, output = run(journal_files, 'sweep-expired')
+    assert status == 0 and json.loads(output)['product_ids'] == ["OLD"]
+    assert json.loads(run(journal_files, 'valuation')[1])['products'] == len(inventory) - 1
+
+def test_mutating_commands_refuse_a_locked_journal(journal_files, inventory, capsys):
+    journal = TransactionJournal(*journal_files)
+    journal.recover(Inventory())
+    try:
+        status, output = run(journal_files, 'sweep-expired')
+    finally:
+        journal.close()
+    assert status == 1 and output == ""
+    assert "in use" in json.loads(capsys.readouterr().err)['error']
+
+def test_reprice_without_rules_is_an_error(journal_files, inventory, capsys):
+    status, _ = run(journal_files, 'reprice', '--dry-run')
+    assert status == 1
+    assert "Nothing to do" in json.loads(capsys.readouterr().err)['error']
+
+def test_export(journal_files, inventory, tmp_path):
+    filename = str(tmp_path / "nightly.csv")
+    status, output = run(journal_files, 'export', filename)
+    assert json.loads(output) == {'exported': len(inventory), 'file': filename}
+    with open(filename, newline='') as f:
+        assert len(list(csv.DictReader(f))) == len(inventory)
+
+def test_import_stays_light():
+    code = ("import sys, cli; "
+            "print(sorted(m for m in ('bulk_io',) + cli.HEAVY_MODULES if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,137 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from columnar import ColumnarInventory
+from inventory import Inventory
+from product import Clothing, Electronics, Grocery, Product
+
+def ids(products):
+    return sorted(product.product_id for product in products)
+
+@pytest.fixture
+def pair(catalog):
+    """An Inventory and a ColumnarInventory holding equal copies of the catalog."""
+    reference, columnar = Inventory(), ColumnarInventory()
+    reference.add_products(catalog)
+    columnar.add_products(catalog)
+    return reference, columnar
+
+def test_views_keep_the_product_api(pair):
+    _, columnar = pair
+    phone, milk, shirt = (columnar.get_product(product_id) for product_id in ("P000", "P001", "P002"))
+    assert isinstance(phone, Electronics) and isinstance(milk, Grocery) and isinstance(shirt, Clothing)
+    assert (phone.brand, phone.warranty_years) == ("Acme", 2)
+    assert (shirt.size, shirt.material) == ("M", "Cotton")
+    assert milk.expiry == date.today() + timedelta(days=30)
+    assert milk.list_price is None
+    assert phone.to_dict() == Electronics("P000", "Phone 0", 1.25, 10, "Acme", 2).to_dict()
+    assert vars(phone) == {}
+    with pytest.raises(TypeError):
+        phone.set_stock_listener(None)
+
+def test_view_changes_go_through_the_store(pair):
+    _, columnar = pair
+    version = columnar.version
+    product = columnar.get_product("P003")
+    product.sell(4)
+    product.set_price(9.5)
+    assert columnar.get_product("P003").quantity_in_stock == 9
+    assert columnar.get_product("P003").price == 9.5
+    assert columnar.version == version + 2
+    assert columnar.changes_since(version) == [(version + 1, 'stock', "P003"), (version + 2, 'price', "P003")]
+
+def test_repeated_strings_are_interned(catalog):
+    columnar = ColumnarInventory()
+    columnar.add_products(catalog)
+    assert len(columnar._strings) == 3
+    assert not any(isinstance(column[0], str) for column in columnar._fields.values())
+
+def test_removing_a_row_keeps_other_views_valid(pair):
+    _, columnar = pair
+    last = columnar.get_product("P059")
+    columnar.remove_product("P005")
+    assert "P005" not in columnar and len(columnar) == 59
+    assert last.name == "Shirt 59" and last.quantity_in_stock == 13
+    with pytest.raises(ValueError):
+        columnar.get_product("P005")
+    with pytest.raises(ValueError):
+        columnar.remove_product("P005")
+
+def test_random_operations_match_inventory(pair):
+    reference, columnar = pair
+    rng = random.Random(7)
+    spare = [Grocery(f"X{number:03d}", f"Bread {number}", 2.5, 3,
+                     (date.today() + timedelta(days=number - 5)).isoformat()) for number in range(20)]
+    for _ in range(600):
+        product_ids = [product.product_id for product in reference.list_all_products()]
+        product_id = rng.choice(product_ids)
+        quantity = rng.randint(1, 6)
+        action = rng.random()
+        if action < 0.3:
+            if reference.get_product(product_id).quantity_in_stock >= quantity:
+                reference.sell_product(product_id, quantity)
+                columnar.sell_product(product_id, quantity)
+        elif action < 0.55:
+            reference.restock_product(product_id, quantity)
+            columnar.restock_product(product_id, quantity)
+        elif action < 0.75:
+            price = round(rng.uniform(0.5, 40), 2)
+            reference.set_prices([(product_id, price)])
+            columnar.set_prices([(product_id, price)])
+        elif action < 0.9:
+            point = rng.randint(0, 15)
+            reference.set_reorder_point(product_id, point)
+            columnar.set_reorder_point(product_id, point)
+        elif action < 0.95 and spare:
+            product = spare.pop()
+            reference.add_product(product)
+            columnar.add_product(product)
+        else:
+            reference.remove_product(product_id)
+            columnar.remove_product(product_id)
+
+    assert ids(columnar.list_all_products()) == ids(reference.list_all_products())
+    expected = {product['product_id']: product for product in reference.to_dict_list()}
+    assert {product['product_id']: product for product in columnar.to_dict_list()} == expected
+    assert columnar.total_inventory_value() == pytest.approx(reference.total_inventory_value())
+    assert columnar.total_units() == reference.total_units()
+    breakdown = reference.value_by_type()
+    assert columnar.value_by_type().keys() == breakdown.keys()
+    for type_name, totals in columnar.value_by_type().items():
+        assert totals == pytest.approx(breakdown[type_name])
+    for threshold in (None, 3, 12):
+        assert ([product.product_id for product in columnar.get_low_stock_products(threshold)]
+                == [product.product_id for product in reference.get_low_stock_products(threshold)])
+    assert ([product.product_id for product in columnar.get_expiring_products(10)]
+            == [product.product_id for product in reference.get_expiring_products(10)])
+    assert ids(columnar.search_by_type(Grocery)) == ids(reference.search_by_type(Grocery))
+    assert ids(columnar.search_by_type(Product)) == ids(reference.list_all_products())
+
+@pytest.mark.parametrize('filters', [
+    {'brand': 'acme'},
+    {'product_type': 'Clothing', 'size': 'M', 'max_price': 20},
+    {'min_price': 5, 'max_price': 15, 'min_stock': 12},
+    {'expires_to': date.today() + timedelta(days=60)},
+    {'material': 'Silk'},
+])
+def test_queries_match_inventory(pair, filters):
+    reference, columnar = pair
+    assert ids(columnar.query(**filters)) == ids(reference.query(**filters))
+    assert len(columnar.query(limit=4, **filters)) == min(4, len(reference.query(**filters)))
+
+def test_expired_groceries_are_removed(pair):
+    reference, columnar = pair
+    expiry = (date.today() - timedelta(days=1)).isoformat()
+    for inventory in pair:
+        inventory.add_product(Grocery("OLD", "Old Milk", 1.0, 1, expiry))
+    assert columnar.remove_expired_products() == reference.remove_expired_products() == ["OLD"]
+    assert "OLD" not in columnar and len(columnar) == 60
+
+def test_list_price_only_for_groceries(pair):
+    _, columnar = pair
+    with pytest.raises(ValueError):
+        columnar.set_prices([], {"P000": 2.0})
+    columnar.get_product("P001").set_list_price(3.0)
+    assert columnar.get_product("P001").list_price == 3.0
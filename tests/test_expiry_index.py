@@ -0,0 +1,89 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from expiry_index import ExpiryIndex
+from inventory import Inventory
+from product import Grocery
+
+TODAY = date(2026, 3, 1)
+
+def grocery(product_id: str, days: int) -> Grocery:
+    """A grocery product expiring the given number of days after TODAY."""
+    expiry = (TODAY + timedelta(days=days)).isoformat()
+    return Grocery(product_id, f"Milk {product_id}", 2.0, 5, expiry)
+
+@pytest.fixture
+def expiries():
+    rng = random.Random(4)
+    return {f"G{number:03d}": TODAY + timedelta(days=rng.randint(-20, 40)) for number in range(300)}
+
+@pytest.fixture
+def index(expiries):
+    index = ExpiryIndex()
+    for product_id, expiry in expiries.items():
+        index.add(product_id, expiry)
+    return index
+
+def test_expiring_between_matches_a_full_scan(index, expiries):
+    for start, end in [(-5, 5), (0, 0), (10, 40), (-30, 100), (50, 60), (7, 3)]:
+        low, high = TODAY + timedelta(days=start), TODAY + timedelta(days=end)
+        expected = sorted((expiry, product_id) for product_id, expiry in expiries.items()
+                          if low <= expiry <= high)
+        assert index.expiring_between(low, high) == [product_id for _, product_id in expected]
+
+def test_pop_expired_returns_oldest_first_and_forgets_them(index, expiries):
+    expired = index.pop_expired(TODAY)
+    expected = sorted((expiry, product_id) for product_id, expiry in expiries.items() if expiry < TODAY)
+    assert expired == [product_id for _, product_id in expected]
+    assert len(index) == len(expiries) - len(expired)
+    assert index.pop_expired(TODAY) == []
+    assert index.expiring_between(TODAY - timedelta(days=100), TODAY - timedelta(days=1)) == []
+
+def test_removed_and_replaced_entries_are_skipped(index, expiries):
+    removed = [product_id for product_id, expiry in expiries.items() if expiry < TODAY][:10]
+    for product_id in removed:
+        index.remove(product_id)
+    index.remove("missing")
+    index.add("G000", TODAY + timedelta(days=90))
+
+    expired = index.pop_expired(TODAY)
+    assert not set(removed) & set(expired)
+    assert "G000" not in expired
+    assert index.expiring_within(0, TODAY + timedelta(days=90)) == ["G000"]
+
+def test_heap_is_rebuilt_after_many_removals():
+    index = ExpiryIndex()
+    for number in range(500):
+        index.add(f"G{number:03d}", TODAY + timedelta(days=number))
+    for number in range(450):
+        index.remove(f"G{number:03d}")
+    assert len(index) == 50
+    assert len(index._heap) <= 2 * len(index) + 64
+    assert index.expiring_within(1000, TODAY)[:2] == ["G450", "G451"]
+
+def test_inventory_expiring_products_window():
+    inventory = Inventory()
+    inventory.add_products([grocery("late", 10), grocery("soon", 2), grocery("today", 0),
+                            grocery("gone", -1), grocery("edge", 7)])
+    expiring = inventory.get_expiring_products(7, today=TODAY)
+    assert [product.product_id for product in expiring] == ["today", "soon", "edge"]
+    with pytest.raises(ValueError):
+        inventory.get_expiring_products(-1, today=TODAY)
+
+def test_inventory_removes_expired_products():
+    today = date.today()
+    inventory = Inventory()
+    for product_id, days in [("old", -3), ("yesterday", -1), ("today", 0), ("fresh", 5)]:
+        inventory.add_product(Grocery(product_id, product_id, 1.0, 1,
+                                      (today + timedelta(days=days)).isoformat()))
+    assert inventory.remove_expired_products() == ["old", "yesterday"]
+    assert sorted(product.product_id for product in inventory.list_all_products()) == ["fresh", "today"]
+    assert inventory.remove_expired_products() == []
+
+def test_removed_product_leaves_the_index():
+    inventory = Inventory()
+    inventory.add_products([grocery("a", 1), grocery("b", 2)])
+    inventory.remove_product("a")
+    assert [product.product_id for product in inventory.get_expiring_products(5, today=TODAY)] == ["b"]
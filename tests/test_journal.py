@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+from exceptions import JournalLockedError
+from inventory import Inventory
+from journal import TransactionJournal
+
+def recovered(journal_files, **options):
+    inventory = Inventory()
+    journal = TransactionJournal(*journal_files, **options)
+    replayed = journal.recover(inventory)
+    return inventory, journal, replayed
+
+def test_first_run_writes_snapshot(journal_files):
+    inventory, journal, replayed = recovered(journal_files)
+    journal.close()
+    assert replayed == 0
+    assert os.path.exists(journal_files[1])
+    assert len(inventory.list_all_products()) == 0
+
+def test_recover_replays_every_mutation(journal_files, products):
+    inventory, journal, _ = recovered(journal_files)
+    inventory.add_products(products)
+    inventory.sell_product("P000", 3)
+    inventory.restock_product("P001", 4)
+    inventory.set_reorder_point("P002", 1)
+    inventory.remove_product("P003")
+    inventory.set_prices([("P004", 9.99)])
+    inventory.apply_batch([("sell", "P005", 1), ("restock", "P006", 2)])
+    expected = inventory.to_dict_list()
+    journal.close()
+
+    restored, journal, replayed = recovered(journal_files)
+    journal.close()
+    assert replayed == len(products) + 6
+    assert sorted(restored.to_dict_list(), key=lambda data: data['product_id']) == \
+        sorted(expected, key=lambda data: data['product_id'])
+
+def test_torn_tail_is_discarded(journal_files, products):
+    inventory, journal, _ = recovered(journal_files)
+    inventory.add_products(products[:2])
+    inventory.sell_product("P000", 1)
+    stock = inventory.get_product("P000").quantity_in_stock
+    journal.close()
+    with open(journal_files[0], 'ab') as f:
+        f.write(b'{"op":"sell","id":"P000","q')
+
+    restored, journal, replayed = recovered(journal_files)
+    journal.close()
+    assert replayed == 3
+    assert restored.get_product("P000").quantity_in_stock == stock
+    with open(journal_files[0], 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+def test_compaction_resets_journal_and_keeps_state(journal_files, products):
+    inventory, journal, _ = recovered(journal_files, compact_every=5)
+    inventory.add_products(products[:12])
+    inventory.sell_product("P001", 2)
+    assert journal.record_count < 5
+    expected = inventory.to_dict_list()
+    journal.close()
+
+    with open(journal_files[0], 'rb') as f:
+        lines = f.read().splitlines()
+    assert json.loads(lines[0])['op'] == 'base'
+    assert len(lines) - 1 == journal.record_count
+
+    restored, journal, replayed = recovered(journal_files)
+    journal.close()
+    assert replayed == journal.record_count
+    assert restored.to_dict_list() == expected
+
+def test_journal_for_older_snapshot_is_not_replayed(journal_files, products):
+    inventory, journal, _ = recovered(journal_files)
+    inventory.add_products(products[:3])
+    stale = open(journal_files[0], 'rb').read()
+    journal.compact(inventory)
+    journal.close()
+    # A crash after the new snapshot was written but before the journal was reset
+    with open(journal_files[0], 'wb') as f:
+        f.write(stale)
+
+    restored, journal, replayed = recovered(journal_files)
+    journal.close()
+    assert replayed == 0
+    assert len(restored.list_all_products()) == 3
+
+def test_second_owner_is_refused(journal_files):
+    _, journal, _ = recovered(journal_files)
+    try:
+        with pytest.raises(JournalLockedError):
+            TransactionJournal(*journal_files).recover(Inventory())
+    finally:
+        journal.close()
+    _, journal, _ = recovered(journal_files)
+    journal.close()
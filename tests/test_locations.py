@@ -0,0 +1,105 @@
+import sys
+import threading
+
+import pytest
+
+from locations import PartitionedInventory
+from product import Clothing, Electronics
+from utils import product_from_dict
+
+def copies(products):
+    """Fresh product objects, since a product belongs to one inventory."""
+    return [product_from_dict(product.to_dict()) for product in products]
+
+@pytest.fixture
+def partitioned(products):
+    partitioned = PartitionedInventory()
+    partitioned.add_location("north").add_products(copies(products[:20]))
+    partitioned.add_location("south").add_products(copies(products[10:]))
+    yield partitioned
+    partitioned.close()
+
+def test_transfer_moves_units_and_adds_missing_products(partitioned):
+    north = partitioned.location("north").get_product("P001").quantity_in_stock
+    partitioned.transfer("P001", "north", "south", 3)
+    assert partitioned.stock_by_location("P001") == {'north': north - 3, 'south': 3}
+    assert partitioned.location("south").get_product("P001").price == \
+        partitioned.location("north").get_product("P001").price
+
+def test_failed_transfers_change_nothing(partitioned):
+    before = {name: partitioned.location(name).to_dict_list() for name in partitioned.locations}
+    with pytest.raises(ValueError, match="Not enough stock"):
+        partitioned.transfer("P001", "north", "south", 10 ** 6)
+    with pytest.raises(ValueError, match="not found"):
+        partitioned.transfer("P025", "north", "south", 1)
+    with pytest.raises(ValueError, match="different locations"):
+        partitioned.transfer("P001", "north", "north", 1)
+    assert {name: partitioned.location(name).to_dict_list() for name in partitioned.locations} == before
+
+def test_source_is_restocked_when_the_destination_rejects_the_units(partitioned, monkeypatch):
+    south = partitioned.location("south")
+    south.add_product(Clothing("X1", "Scarf", 5.0, 0, "M", "Wool"))
+    partitioned.location("north").add_product(Electronics("X1", "Radio", 5.0, 4, "Acme", 1))
+
+    def refuse(product_id, quantity):
+        raise ValueError("destination closed")
+
+    monkeypatch.setattr(south, 'restock_product', refuse)
+    with pytest.raises(ValueError, match="destination closed"):
+        partitioned.transfer("X1", "north", "south", 2)
+    assert partitioned.stock_by_location("X1") == {'north': 4, 'south': 0}
+
+def test_concurrent_transfers_to_a_new_location_keep_every_unit(partitioned):
+    north = partitioned.location("north")
+    partitioned.add_location("east")
+    rounds, workers = 20, 8
+    for number in range(rounds):
+        north.add_product(Electronics(f"NEW{number}", "Radio", 5.0, 2 * workers, "Acme", 1))
+    barrier = threading.Barrier(workers)
+    errors = []
+
+    def move():
+        for number in range(rounds):
+            # Every thread transfers the same product at once, while east lacks it
+            barrier.wait()
+            try:
+                partitioned.transfer(f"NEW{number}", "north", "east", 2)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=move) for _ in range(workers)]
+    # Switch threads as often as possible so the transfers interleave
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(previous)
+    assert errors == []
+    for number in range(rounds):
+        assert partitioned.stock_by_location(f"NEW{number}") == {'north': 0, 'east': 2 * workers}
+
+def test_cross_location_queries_merge_shards(partitioned, products):
+    assert partitioned.total_units() == sum(p.quantity_in_stock for p in products[:20] + products[10:])
+    assert partitioned.value_by_location()['north'] == pytest.approx(
+        sum(p.get_total_value() for p in products[:20]))
+    found = partitioned.search_by_name("shirt 14")
+    assert sorted(name for name, _ in found) == ["north", "south"]
+    low = partitioned.get_low_stock_products(11)
+    stock = [product.quantity_in_stock for _, product in low]
+    assert stock == sorted(stock) and all(units <= 11 for units in stock)
+
+def test_locations_recover_from_their_journals(tmp_path, products):
+    partitioned = PartitionedInventory(str(tmp_path))
+    partitioned.add_location("north").add_products(products[:5])
+    partitioned.add_location("south")
+    partitioned.transfer("P000", "north", "south", 4)
+    expected = {name: partitioned.location(name).to_dict_list() for name in partitioned.locations}
+    partitioned.close()
+
+    reopened = PartitionedInventory.open(str(tmp_path))
+    assert {name: reopened.location(name).to_dict_list() for name in reopened.locations} == expected
+    reopened.close()
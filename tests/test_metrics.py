@@ -0,0 +1,126 @@
+import pytest
+
+from inventory import Inventory
+from metrics import BUCKETS, REGISTRY, Histogram, MetricsRegistry, enable_from_environment, profile
+from utils import save_inventory_to_file
+
+class Counter:
+    """A small class to instrument instead of a shared inventory class."""
+
+    def __init__(self):
+        self.value = 0
+
+    def add(self, amount):
+        if amount < 0:
+            raise ValueError("negative")
+        self.value += amount
+
+    def __len__(self):
+        return self.value
+
+    def _helper(self):
+        return self.value
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    yield registry
+    registry.disable()
+
+@pytest.fixture
+def global_registry():
+    yield REGISTRY
+    REGISTRY.disable()
+    REGISTRY.reset()
+
+def test_histogram_counts_and_quantiles():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.observe(2e-6)
+    for _ in range(10):
+        histogram.observe(0.3, error=True)
+    assert (histogram.count, histogram.errors, histogram.max) == (100, 10, 0.3)
+    assert histogram.quantile(0.5) == 2.5e-6
+    assert histogram.quantile(0.95) == 0.3
+    assert histogram.cumulative_counts()[-1] == (float('inf'), 100)
+    assert histogram.summary()['calls'] == 100
+    histogram.clear()
+    assert histogram.count == 0 and histogram.quantile(0.5) == 0.0
+
+def test_values_beyond_the_last_bucket_are_counted():
+    histogram = Histogram()
+    histogram.observe(BUCKETS[-1] * 3)
+    assert histogram.cumulative_counts()[-2][1] == 0
+    assert histogram.quantile(0.99) == BUCKETS[-1] * 3
+
+def test_registered_methods_are_wrapped_only_while_enabled(registry):
+    original = Counter.add
+    registry.register_class(Counter)
+    assert Counter.add is original
+
+    registry.enable()
+    counter = Counter()
+    counter.add(2)
+    counter.add(3)
+    len(counter)
+    counter._helper()
+    with pytest.raises(ValueError):
+        counter.add(-1)
+    assert counter.value == 5
+    snapshot = registry.snapshot()
+    assert sorted(snapshot) == ["Counter.__len__", "Counter.add"]
+    assert (snapshot["Counter.add"].count, snapshot["Counter.add"].errors) == (3, 1)
+
+    registry.disable()
+    assert Counter.add is original
+    counter.add(1)
+    assert registry.snapshot()["Counter.add"].count == 3
+
+def test_timed_functions_check_the_switch(registry):
+    @registry.timed("work")
+    def work():
+        return 42
+
+    assert work() == 42
+    assert registry.snapshot() == {}
+    registry.enable()
+    assert work() == 42
+    with registry.time("block"):
+        pass
+    assert sorted(registry.snapshot()) == ["block", "work"]
+    registry.reset()
+    assert registry.snapshot() == {}
+
+def test_utils_save_is_recorded(tmp_path, global_registry, products):
+    inventory = Inventory()
+    inventory.add_products(products)
+    global_registry.enable()
+    save_inventory_to_file(inventory, str(tmp_path / "inventory.json"))
+    assert global_registry.snapshot()["utils.save_inventory_to_file"].count == 1
+
+def test_prometheus_dump(tmp_path, registry):
+    registry.enable()
+    registry.observe('Inventory.sell_product', 0.002)
+    registry.observe('say "hi"', 0.5, error=True)
+    text = registry.to_prometheus()
+    assert '# TYPE inventory_call_duration_seconds histogram' in text
+    assert 'inventory_call_duration_seconds_bucket{name="Inventory.sell_product",le="0.0025"} 1' in text
+    assert 'inventory_call_duration_seconds_bucket{name="Inventory.sell_product",le="+Inf"} 1' in text
+    assert 'inventory_call_duration_seconds_count{name="say \\"hi\\""} 1' in text
+    assert 'inventory_call_errors_total{name="say \\"hi\\""} 1' in text
+
+    filename = tmp_path / "metrics.prom"
+    registry.write_prometheus(str(filename), prefix='shop')
+    assert filename.read_text() == registry.to_prometheus('shop')
+
+def test_profile_returns_the_result_and_a_report():
+    result, report, stats = profile(lambda: sum(range(1000)), limit=5)
+    assert result == 499500
+    assert "function calls" in report
+    assert stats.total_calls > 0
+
+def test_enable_from_environment(monkeypatch, global_registry):
+    monkeypatch.delenv('INVENTORY_METRICS', raising=False)
+    assert not enable_from_environment()
+    monkeypatch.setenv('INVENTORY_METRICS', 'on')
+    assert enable_from_environment()
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from persistence import BackgroundWriter
+from utils import atomic_write
+
+class FakeStore:
+    """A version counter and a save that records the version it wrote."""
+
+    def __init__(self):
+        self.version = 0
+        self.saved = []
+        self.fail = False
+
+    def change(self):
+        self.version += 1
+
+    def save(self):
+        if self.fail:
+            raise IOError("disk full")
+        self.saved.append(self.version)
+
+@pytest.fixture
+def store():
+    return FakeStore()
+
+@pytest.fixture
+def make_writer(store):
+    writers = []
+
+    def make_writer(**kwargs):
+        writer = BackgroundWriter(store.save, lambda: store.version, **kwargs)
+        writers.append(writer)
+        return writer
+
+    yield make_writer
+    for writer in writers:
+        writer.close(flush=False)
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    filename = tmp_path / "inventory.json"
+    filename.write_text("old")
+    with atomic_write(str(filename)) as f:
+        f.write("new")
+        assert filename.read_text() == "old"
+    assert filename.read_text() == "new"
+    assert os.listdir(tmp_path) == ["inventory.json"]
+
+def test_failed_atomic_write_leaves_the_file_untouched(tmp_path):
+    filename = tmp_path / "inventory.bin"
+    filename.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(filename), 'wb') as f:
+            f.write(b"partial")
+            raise RuntimeError("crash")
+    assert filename.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["inventory.bin"]
+
+def test_burst_of_requests_is_written_once(store, make_writer):
+    writer = make_writer(debounce=0.2)
+    for _ in range(50):
+        store.change()
+        writer.request()
+    assert writer.pending
+    deadline = time.monotonic() + 5
+    while writer.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.saved == [50]
+    assert writer.last_persisted_version == 50
+    assert not writer.pending
+
+def test_flush_writes_without_waiting_for_the_window(store, make_writer):
+    writer = make_writer(debounce=60)
+    store.change()
+    writer.request()
+    started = time.monotonic()
+    assert writer.flush(timeout=5)
+    assert time.monotonic() - started < 5
+    assert store.saved == [1]
+    assert writer.flush(timeout=5)
+    assert store.saved == [1]
+
+def test_constant_stream_is_written_within_max_delay(store, make_writer):
+    writer = make_writer(debounce=0.1, max_delay=0.2)
+    stop = time.monotonic() + 1.0
+    while time.monotonic() < stop and not store.saved:
+        store.change()
+        writer.request()
+        time.sleep(0.01)
+    assert store.saved
+
+def test_failed_save_is_reported_and_retried(store, make_writer):
+    writer = make_writer(debounce=0.01)
+    store.fail = True
+    store.change()
+    writer.request()
+    assert not writer.flush(timeout=5)
+    assert isinstance(writer.last_error, IOError)
+    assert writer.pending
+
+    store.fail = False
+    assert writer.flush(timeout=5)
+    assert writer.last_error is None
+    assert writer.last_persisted_version == 1
+
+def test_close_writes_pending_changes(store):
+    writer = BackgroundWriter(store.save, lambda: store.version, debounce=60)
+    store.change()
+    writer.request()
+    writer.close()
+    assert store.saved == [1]
+
+def test_negative_debounce_is_rejected(store):
+    with pytest.raises(ValueError):
+        BackgroundWriter(store.save, lambda: store.version, debounce=-1)
@@ -0,0 +1,74 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from inventory import Inventory
+from pos_api import BackgroundServer, InventoryAPI
+
+class ThreadRecordingInventory(Inventory):
+    """Inventory noting the thread of every len() and membership test."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def __len__(self):
+        self.threads.add(threading.current_thread().name)
+        return super().__len__()
+
+    def __contains__(self, product_id):
+        self.threads.add(threading.current_thread().name)
+        return super().__contains__(product_id)
+
+@pytest.fixture
+def inventory(products):
+    inventory = ThreadRecordingInventory()
+    inventory.add_products(products)
+    return inventory
+
+@pytest.fixture
+def request_json(inventory):
+    server = BackgroundServer(InventoryAPI(inventory, batch_window=0.001), port=0)
+    connection = http.client.HTTPConnection(server.host, server.port, timeout=10)
+
+    def request(method, path, body=None):
+        connection.request(method, path, body=None if body is None else json.dumps(body))
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    yield request
+    connection.close()
+    server.stop()
+
+def test_sell_and_restock_change_stock(request_json, inventory):
+    stock = inventory.get_product("P001").quantity_in_stock
+    assert request_json('POST', '/sell', {'product_id': "P001", 'quantity': 2}) == \
+        (200, {'product_id': "P001", 'sell': 2, 'quantity_in_stock': stock - 2})
+    status, payload = request_json('POST', '/restock', {'product_id': "P001", 'quantity': 5})
+    assert status == 200 and payload['quantity_in_stock'] == stock + 3
+    assert inventory.get_product("P001").quantity_in_stock == stock + 3
+
+def test_errors_map_to_status_codes(request_json):
+    assert request_json('POST', '/sell', {'product_id': "nope", 'quantity': 1})[0] == 404
+    assert request_json('POST', '/sell', {'product_id': "P001", 'quantity': 10 ** 6})[0] == 409
+    assert request_json('POST', '/sell', {'product_id': "P001", 'quantity': -1})[0] == 400
+    assert request_json('GET', '/sell')[0] == 405
+    assert request_json('GET', '/products/nope')[0] == 404
+    assert request_json('GET', '/search?bogus=1')[0] == 400
+    assert request_json('GET', '/elsewhere')[0] == 404
+
+def test_reads_and_search(request_json, products):
+    assert request_json('GET', '/products/P002') == (200, products[2].to_dict())
+    status, found = request_json('GET', '/search?type=Clothing&max_price=5&limit=3')
+    assert status == 200
+    assert [data['product_id'] for data in found] == ["P002", "P005"]
+    status, found = request_json('GET', '/search?name=phone&limit=2')
+    assert status == 200 and len(found) == 2
+
+def test_inventory_is_only_touched_off_the_event_loop(request_json, inventory):
+    assert request_json('GET', '/health') == (200, {'status': 'ok', 'products': len(inventory)})
+    assert request_json('POST', '/sell', {'product_id': "nope", 'quantity': 1})[0] == 404
+    inventory.threads.discard(threading.current_thread().name)
+    assert inventory.threads and 'inventory-api' not in inventory.threads
@@ -0,0 +1,132 @@
+from datetime import date, timedelta
+
+import pytest
+
+from columnar import ColumnarInventory
+from inventory import Inventory
+from pricing import ExpiryMarkdown, PriceRule, plan_repricing
+from product import Clothing, Electronics, Grocery, Product
+from shared_inventory import SharedInventory
+from sqlite_inventory import SQLiteInventory
+
+BACKENDS = {
+    'inventory': Inventory,
+    'shared': SharedInventory,
+    'columnar': ColumnarInventory,
+    'sqlite': lambda: SQLiteInventory(':memory:'),
+}
+
+TODAY = date(2026, 5, 10)
+
+def grocery(product_id: str, price: float, days: int) -> Grocery:
+    """A grocery expiring the given number of days after TODAY."""
+    return Grocery(product_id, f"Food {product_id}", price, 10, (TODAY + timedelta(days=days)).isoformat())
+
+def make_products():
+    return [Electronics("E1", "Phone", 200.0, 2, "Acme", 1),
+            Electronics("E2", "Radio", 40.0, 5, "Globex", 1),
+            Clothing("C1", "Shirt", 20.0, 4, "M", "Cotton"),
+            Clothing("C2", "Scarf", 30.0, 1, "S", "Wool"),
+            grocery("G0", 4.0, 0), grocery("G1", 8.0, 1), grocery("G3", 10.0, 3),
+            grocery("G9", 6.0, 9), grocery("GX", 5.0, -1)]
+
+@pytest.fixture(params=sorted(BACKENDS))
+def inventory(request):
+    inventory = BACKENDS[request.param]()
+    inventory.add_products(make_products())
+    return inventory
+
+def prices(inventory):
+    return {product.product_id: product.price for product in inventory.list_all_products()}
+
+def test_price_rules_apply_percent_then_amount_to_matches():
+    products = make_products()
+    plan = plan_repricing(products, [PriceRule(percent=-10, amount=-1, product_type=Electronics),
+                                     PriceRule(amount=2.5, brand='GLOBEX'),
+                                     PriceRule(percent=50, product_type='Clothing', material='wool')],
+                          TODAY)
+    assert plan.changes == [("E1", 200.0, 179.0), ("E2", 40.0, 37.5), ("C2", 30.0, 45.0)]
+    assert plan.list_prices == {}
+    assert plan.value_before == sum(product.get_total_value() for product in products)
+    assert plan.value_delta == pytest.approx(2 * -21.0 + 5 * -2.5 + 15.0)
+
+def test_product_type_matches_subclasses():
+    plan = plan_repricing(make_products(), [PriceRule(percent=100, product_type=Product)], TODAY)
+    assert len(plan.changes) == len(make_products())
+
+def test_markdown_tiers_use_the_tightest_tier():
+    markdown = ExpiryMarkdown([(3, 25), (1, 50)])
+    plan = plan_repricing(make_products(), [markdown], TODAY)
+    assert plan.changes == [("G0", 4.0, 2.0), ("G1", 8.0, 4.0), ("G3", 10.0, 7.5)]
+    assert plan.list_prices == {"G0": 4.0, "G1": 8.0, "G3": 10.0}
+
+def test_markdowns_do_not_compound(inventory):
+    markdown = ExpiryMarkdown([(3, 25), (1, 50)])
+    inventory.reprice([markdown], TODAY)
+    assert inventory.reprice([markdown], TODAY).changes == []
+
+    later = inventory.reprice([markdown], TODAY + timedelta(days=2))
+    assert ("G3", 7.5, 5.0) in later.changes
+    assert inventory.get_product("G3").list_price == 10.0
+    assert inventory.get_product("GX").price == 5.0
+    assert inventory.get_product("GX").list_price is None
+
+def test_price_rules_move_list_prices_with_the_price(inventory):
+    inventory.reprice([ExpiryMarkdown([(3, 50)])], TODAY)
+    plan = inventory.reprice([PriceRule(percent=10, product_type=Grocery)], TODAY)
+    assert plan.list_prices["G3"] == 11.0
+    assert inventory.get_product("G3").price == 5.5
+    assert inventory.reprice([ExpiryMarkdown([(3, 50)])], TODAY).changes == []
+
+def test_dry_run_changes_nothing(inventory):
+    before, version = prices(inventory), inventory.version
+    plan = inventory.reprice([PriceRule(percent=-20)], TODAY, dry_run=True)
+    assert not plan.applied and len(plan.changes) == 9
+    assert prices(inventory) == before and inventory.version == version
+
+    plan = inventory.reprice([PriceRule(percent=-20)], TODAY)
+    assert plan.applied
+    assert inventory.total_inventory_value() == pytest.approx(plan.value_after)
+    assert prices(inventory)["E1"] == 160.0
+
+def test_negative_prices_are_rejected_before_any_change(inventory):
+    before = prices(inventory)
+    with pytest.raises(ValueError, match="negative"):
+        inventory.reprice([PriceRule(amount=-5)], TODAY)
+    assert prices(inventory) == before
+
+def test_set_prices_is_all_or_nothing(inventory):
+    before = prices(inventory)
+    with pytest.raises(ValueError):
+        inventory.set_prices([("E1", 1.0), ("missing", 2.0)])
+    with pytest.raises(ValueError):
+        inventory.set_prices([("E1", 1.0)], {"C1": 3.0})
+    assert prices(inventory) == before
+    assert inventory.set_prices([("E1", 1.0), ("C1", 2.0)]) == 2
+
+def test_backends_agree_on_a_reprice(inventory):
+    reference = Inventory()
+    reference.add_products(make_products())
+    rules = [PriceRule(percent=-15, product_type=Clothing), ExpiryMarkdown([(1, 40), (9, 10)])]
+    assert inventory.reprice(rules, TODAY).changes == reference.reprice(rules, TODAY).changes
+    assert (sorted(inventory.to_dict_list(), key=lambda data: data['product_id'])
+            == sorted(reference.to_dict_list(), key=lambda data: data['product_id']))
+
+@pytest.mark.parametrize('make_rule', [
+    lambda: PriceRule(),
+    lambda: ExpiryMarkdown([]),
+    lambda: ExpiryMarkdown([(-1, 10)]),
+    lambda: ExpiryMarkdown([(2, 10), (2, 20)]),
+    lambda: ExpiryMarkdown([(2, 120)]),
+])
+def test_invalid_rules_are_rejected(make_rule):
+    with pytest.raises(ValueError):
+        make_rule()
+
+def test_plan_summary():
+    plan = plan_repricing(make_products(), [PriceRule(percent=-50, brand='acme')], TODAY)
+    assert plan.to_dict() == {'repriced': 1, 'value_before': plan.value_before,
+                              'value_after': plan.value_before - 200.0, 'value_delta': -200.0,
+                              'applied': False,
+                              'changes': [{'product_id': "E1", 'old_price': 200.0, 'new_price': 100.0}]}
+    assert 'changes' not in plan.to_dict(changes=False)
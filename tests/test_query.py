@@ -0,0 +1,132 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from columnar import ColumnarInventory
+from inventory import Inventory
+from product import Clothing, Electronics, Grocery, Product
+from query import Query
+from shared_inventory import SharedInventory
+from sqlite_inventory import SQLiteInventory
+
+BACKENDS = {
+    'inventory': Inventory,
+    'shared': SharedInventory,
+    'columnar': ColumnarInventory,
+    'sqlite': lambda: SQLiteInventory(':memory:'),
+}
+
+TODAY = date.today()
+
+def make_catalog(count: int = 300):
+    """Products with a spread of brands, sizes, materials, prices, stock and expiry dates."""
+    rng = random.Random(17)
+    products = []
+    for number in range(count):
+        product_id = f"Q{number:03d}"
+        price = round(rng.uniform(1, 100), 2)
+        quantity = rng.randint(0, 40)
+        kind = number % 3
+        if kind == 0:
+            products.append(Electronics(product_id, f"Device {number}", price, quantity,
+                                        rng.choice(["Acme", "Globex", "Initech"]), rng.randint(0, 3)))
+        elif kind == 1:
+            expiry = (TODAY + timedelta(days=rng.randint(-10, 60))).isoformat()
+            products.append(Grocery(product_id, f"Food {number}", price, quantity, expiry))
+        else:
+            products.append(Clothing(product_id, f"Shirt {number}", price, quantity,
+                                     rng.choice(["S", "M", "L"]), rng.choice(["Cotton", "Wool", "Silk"])))
+    return products
+
+def matches(product, query: Query) -> bool:
+    """Whether a product satisfies every filter of a query, checked directly."""
+    if query.product_type is not None:
+        if isinstance(query.product_type, str):
+            if product.product_type != query.product_type:
+                return False
+        elif not isinstance(product, query.product_type):
+            return False
+    for field in ('brand', 'size', 'material'):
+        value = getattr(query, field)
+        if value is not None and (getattr(product, field, None) or '').casefold() != value.casefold():
+            return False
+    ranges = [(product.price, query.min_price, query.max_price),
+              (product.quantity_in_stock, query.min_stock, query.max_stock)]
+    if query.expires_from is not None or query.expires_to is not None:
+        if not isinstance(product, Grocery):
+            return False
+        ranges.append((product.expiry, query.expires_from, query.expires_to))
+    return all((minimum is None or value >= minimum) and (maximum is None or value <= maximum)
+               for value, minimum, maximum in ranges)
+
+QUERIES = [
+    Query(),
+    Query(brand='ACME'),
+    Query(product_type=Clothing, size='m', material='wool'),
+    Query(product_type='Grocery').price(maximum=30),
+    Query(product_type=Product).stock(minimum=5, maximum=10),
+    Query().price(20, 40).stock(maximum=20),
+    Query().expires(TODAY, TODAY + timedelta(days=14)),
+    Query(brand='Globex').expires(TODAY),
+    Query(material='Linen'),
+    Query().price(minimum=500),
+]
+
+@pytest.fixture(params=sorted(BACKENDS))
+def inventory(request):
+    inventory = BACKENDS[request.param]()
+    inventory.add_products(make_catalog())
+    return inventory
+
+@pytest.mark.parametrize('query', QUERIES, ids=repr)
+def test_query_matches_a_full_scan(inventory, query):
+    expected = sorted(product.product_id for product in inventory.list_all_products()
+                      if matches(product, query))
+    assert sorted(product.product_id for product in inventory.query(query)) == expected
+    limited = inventory.query(query, limit=3)
+    assert len(limited) == min(3, len(expected))
+    assert all(matches(product, query) for product in limited)
+
+def test_indexes_follow_changes(inventory):
+    query = Query(brand='acme').price(maximum=50).stock(minimum=10)
+    rng = random.Random(5)
+    for product in rng.sample(inventory.list_all_products(), 60):
+        product_id = product.product_id
+        inventory.set_prices([(product_id, round(rng.uniform(1, 100), 2))])
+        inventory.restock_product(product_id, rng.randint(1, 10))
+    for product in rng.sample(inventory.list_all_products(), 30):
+        inventory.remove_product(product.product_id)
+    expected = sorted(product.product_id for product in inventory.list_all_products()
+                      if matches(product, query))
+    assert sorted(product.product_id for product in inventory.query(query)) == expected
+
+def test_keyword_filters_extend_the_query(inventory):
+    base = Query(product_type=Electronics)
+    assert ([product.product_id for product in inventory.query(base, brand='Initech')]
+            == [product.product_id for product in inventory.query(base.where(brand='Initech'))])
+
+def test_explain_puts_the_most_selective_index_first():
+    inventory = Inventory()
+    inventory.add_products(make_catalog())
+    plan = inventory.explain_query(Query(product_type=Product, brand='Acme').price(maximum=5))
+    estimates = [estimate for _, estimate in plan]
+    assert estimates == sorted(estimates) and len(plan) == 3
+    assert dict(plan)['type'] == 300
+    assert dict(plan)['brand'] == len(inventory.query(brand='acme'))
+    assert inventory.explain_query() == []
+
+def test_range_results_come_in_key_order():
+    inventory = Inventory()
+    inventory.add_products(make_catalog())
+    prices = [product.price for product in inventory.query(Query().price(10, 20))]
+    assert prices == sorted(prices)
+
+def test_query_builder():
+    query = Query(brand='Acme').price(maximum=5).stock(minimum=1)
+    assert (query.brand, query.min_price, query.max_price, query.min_stock) == ('Acme', None, 5, 1)
+    assert query.of_type('Grocery').product_type == 'Grocery'
+    assert query.product_type is None
+    assert repr(query) == "Query(brand='Acme', max_price=5, min_stock=1)"
+    with pytest.raises(TypeError):
+        query.where(colour='red')
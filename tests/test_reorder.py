@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from columnar import ColumnarInventory
+from inventory import Inventory
+from product import DEFAULT_REORDER_POINT
+from shared_inventory import SharedInventory
+from sorted_index import SortedIndex
+from sqlite_inventory import SQLiteInventory
+
+BACKENDS = {
+    'inventory': Inventory,
+    'shared': SharedInventory,
+    'columnar': ColumnarInventory,
+    'sqlite': lambda: SQLiteInventory(':memory:'),
+}
+
+@pytest.fixture(params=sorted(BACKENDS))
+def inventory(request, products):
+    inventory = BACKENDS[request.param]()
+    inventory.add_products(products)
+    return inventory
+
+def low_stock_ids(inventory, threshold=None):
+    return [product.product_id for product in inventory.get_low_stock_products(threshold)]
+
+def expected_low_stock(inventory, threshold=None):
+    """IDs at or below the threshold (or their own reorder point), lowest stock first."""
+    products = inventory.list_all_products()
+    if threshold is None:
+        low = [(product.quantity_in_stock - product.reorder_point, product.product_id)
+               for product in products if product.needs_reorder()]
+    else:
+        low = [(product.quantity_in_stock, product.product_id)
+               for product in products if product.quantity_in_stock <= threshold]
+    return [product_id for _, product_id in sorted(low)]
+
+def test_sorted_index_matches_a_sorted_list():
+    rng = random.Random(6)
+    index = SortedIndex()
+    index._LOAD = 8
+    entries = []
+    for number in range(600):
+        entry = (rng.randint(0, 50), f"P{number:03d}")
+        index.add(*entry)
+        entries.append(entry)
+    for entry in rng.sample(entries, 250):
+        index.remove(*entry)
+        entries.remove(entry)
+    entries.sort()
+
+    assert len(index) == len(entries)
+    assert len(index._buckets) > 1
+    assert list(index.irange()) == [item for _, item in entries]
+    for low, high in [(None, 10), (20, None), (5, 5), (12, 30), (40, 3), (60, 70)]:
+        expected = [item for key, item in entries
+                    if (low is None or key >= low) and (high is None or key <= high)]
+        assert list(index.irange(low, high)) == expected
+        assert index.count(low, high) == len(expected)
+    assert index.rank(25) == sum(1 for key, _ in entries if key < 25)
+
+def test_sorted_index_remove_of_a_missing_entry_raises():
+    index = SortedIndex()
+    index.add(1, "a")
+    with pytest.raises(KeyError):
+        index.remove(1, "b")
+    with pytest.raises(KeyError):
+        index.remove(2, "a")
+    assert list(index.irange()) == ["a"]
+
+def test_low_stock_follows_sales_and_reorder_points(inventory):
+    assert low_stock_ids(inventory) == []
+    inventory.sell_product("P000", 8)
+    inventory.sell_product("P004", 12)
+    inventory.set_reorder_point("P010", 20)
+    inventory.restock_product("P004", 1)
+    assert low_stock_ids(inventory) == expected_low_stock(inventory)
+    assert set(low_stock_ids(inventory)) == {"P000", "P004", "P010"}
+    for threshold in (0, 5, 11, 14):
+        assert low_stock_ids(inventory, threshold) == expected_low_stock(inventory, threshold)
+
+    inventory.restock_product("P000", 20)
+    inventory.remove_product("P004")
+    assert low_stock_ids(inventory) == ["P010"]
+
+def test_reorder_alert_fires_once_when_stock_crosses_the_point(inventory):
+    alerts = []
+    inventory.subscribe_reorder_alerts(lambda product: alerts.append(product.product_id))
+    product = inventory.get_product("P000")
+    inventory.sell_product("P000", product.quantity_in_stock - DEFAULT_REORDER_POINT - 1)
+    assert alerts == []
+    inventory.sell_product("P000", 1)
+    inventory.sell_product("P000", 1)
+    assert alerts == ["P000"]
+
+    inventory.restock_product("P000", 10)
+    inventory.set_reorder_point("P000", 50)
+    assert alerts == ["P000", "P000"]
+
+def test_unsubscribed_callbacks_stop_receiving_alerts(inventory):
+    alerts = []
+    callback = alerts.append
+    inventory.subscribe_reorder_alerts(callback)
+    inventory.unsubscribe_reorder_alerts(callback)
+    inventory.sell_product("P001", inventory.get_product("P001").quantity_in_stock)
+    assert alerts == []
+
+def test_invalid_reorder_point_is_rejected(inventory):
+    with pytest.raises(ValueError):
+        inventory.set_reorder_point("P000", -1)
+    with pytest.raises(ValueError):
+        inventory.set_reorder_point("missing", 3)
+    assert inventory.get_product("P000").reorder_point == DEFAULT_REORDER_POINT
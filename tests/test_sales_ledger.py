@@ -0,0 +1,149 @@
+import random
+
+import pytest
+
+from inventory import Inventory
+from product import Clothing, Electronics, Grocery
+from sales_ledger import DAY, HOUR, RollingWindow, SalesLedger
+
+START = 1_800_000_000.0 - 1_800_000_000.0 % DAY
+
+class Clock:
+    """A settable time source for the ledger."""
+
+    def __init__(self, now: float = START):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+PRODUCTS = [Electronics("E1", "Phone", 100.0, 50, "Acme", 1),
+            Grocery("G1", "Milk", 2.0, 50, "2030-01-01"),
+            Clothing("C1", "Shirt", 15.0, 50, "M", "Cotton"),
+            Clothing("C2", "Hat", 8.0, 50, "L", "Wool")]
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def random_events(count: int = 500, days: int = 10):
+    """(timestamp, kind, product, quantity) events spread over the last N days, in time order."""
+    rng = random.Random(18)
+    events = [(START + DAY - rng.uniform(1, days * DAY), rng.choice(['sell', 'sell', 'restock']),
+               rng.choice(PRODUCTS), rng.randint(1, 5)) for _ in range(count)]
+    return sorted(events, key=lambda event: event[0])
+
+def fill(ledger, events):
+    for timestamp, kind, product, quantity in events:
+        ledger.record(kind, product, quantity, timestamp)
+
+def expected_sales(events, since=None, product_id=None, product_type=None):
+    units, revenue = 0, 0.0
+    for timestamp, kind, product, quantity in events:
+        if kind != 'sell' or (since is not None and timestamp < since):
+            continue
+        if product_id is not None and product.product_id != product_id:
+            continue
+        if product_type is not None and product.product_type != product_type:
+            continue
+        units += quantity
+        revenue += quantity * product.price
+    return units, revenue
+
+def test_rollups_match_the_events(clock):
+    clock.now = START + DAY - 1
+    events = random_events()
+    ledger = SalesLedger(clock=clock)
+    fill(ledger, events)
+    assert len(ledger) == len(events)
+
+    for days in (None, 1, 3, 7):
+        since = None if days is None else START - (days - 1) * DAY
+        units, revenue = ledger.sales(days)
+        assert (units, pytest.approx(revenue)) == expected_sales(events, since)
+        units, revenue = ledger.sales(days, product_id="C1")
+        assert (units, pytest.approx(revenue)) == expected_sales(events, since, product_id="C1")
+    units, revenue = ledger.sales_by_type()['Clothing']
+    assert (units, pytest.approx(revenue)) == expected_sales(events, product_type='Clothing')
+    assert ledger.units_restocked("G1") == sum(
+        quantity for _, kind, product, quantity in events if kind == 'restock' and product.product_id == "G1")
+    assert ledger.velocity("E1", 7) == expected_sales(events, START - 6 * DAY, product_id="E1")[0] / 7
+
+    hourly = ledger.hourly(24)
+    assert len(hourly) == 24 and hourly[-1][0] == START + 23 * HOUR
+    assert sum(units for _, units, _ in hourly) == expected_sales(events, START)[0]
+    daily = ledger.daily(10, product_type='Grocery')
+    assert [day for day, _, _ in daily] == [START - offset * DAY for offset in range(9, -1, -1)]
+
+def test_top_sellers_today_and_all_time(clock):
+    ledger = SalesLedger(clock=clock)
+    ledger.record('sell', PRODUCTS[0], 5, START - HOUR)
+    ledger.record('sell', PRODUCTS[1], 3, START + HOUR)
+    ledger.record('sell', PRODUCTS[2], 1, START + HOUR)
+    ledger.record('sell', PRODUCTS[2], 1, START + 2 * HOUR)
+    ledger.record('restock', PRODUCTS[3], 20, START + 2 * HOUR)
+    clock.now = START + 3 * HOUR
+    assert ledger.top_sellers(5) == [("G1", 3), ("C1", 2)]
+    assert ledger.top_sellers(2, today=False) == [("E1", 5), ("G1", 3)]
+    clock.now = START + DAY
+    assert ledger.top_sellers(5) == []
+
+def test_rolling_window_ignores_events_older_than_the_ring():
+    window = RollingWindow(HOUR, 3)
+    window.add(START + 5 * HOUR, 2, 4.0)
+    window.add(START + 2 * HOUR, 7, 14.0)
+    window.add(START + 4 * HOUR, 1, 2.0)
+    assert window.series(START + 5 * HOUR) == [
+        (START + 3 * HOUR, 0, 0.0), (START + 4 * HOUR, 1, 2.0), (START + 5 * HOUR, 2, 4.0)]
+    assert window.totals(START + 5 * HOUR, 2) == (3, 6.0)
+
+def test_inventory_records_sales_in_an_attached_ledger(clock):
+    inventory = Inventory()
+    inventory.add_products([Grocery("G1", "Milk", 2.0, 50, "2030-01-01")])
+    ledger = SalesLedger(clock=clock)
+    inventory.attach_ledger(ledger)
+    inventory.sell_product("G1", 4)
+    inventory.restock_product("G1", 10)
+    with pytest.raises(ValueError):
+        inventory.sell_product("G1", 1000)
+    assert [event[1:] for event in ledger.events()] == [("sell", "G1", 4, 2.0), ("restock", "G1", 10, 2.0)]
+    assert ledger.sales() == (4, 8.0)
+
+def test_events_are_replayed_from_the_file(tmp_path, clock):
+    clock.now = START + DAY - 1
+    filename = str(tmp_path / "sales.ledger")
+    events = random_events(200, days=5)
+    ledger = SalesLedger(filename, clock=clock)
+    fill(ledger, events)
+    ledger.close()
+    with open(filename, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    reopened = SalesLedger(filename, clock=clock)
+    assert list(reopened.events()) == list(ledger.events())
+    assert reopened.sales(3) == ledger.sales(3)
+    reopened.record('sell', PRODUCTS[0], 1, START + HOUR)
+    reopened.close()
+    assert len(SalesLedger(filename, clock=clock)) == len(events) + 1
+
+def test_compaction_keeps_lifetime_totals(tmp_path, clock):
+    clock.now = START + DAY - 1
+    filename = str(tmp_path / "sales.ledger")
+    ledger = SalesLedger(filename, clock=clock, hourly_slots=24, daily_slots=7)
+    events = random_events(300, days=14)
+    fill(ledger, events)
+    totals = ledger.sales(), ledger.top_sellers(4, today=False), ledger.units_restocked("C2")
+
+    ledger.flush()
+    assert len(ledger) == sum(1 for event in events if event[0] >= START - 6 * DAY)
+    assert ledger.compact() == 0
+    assert (ledger.sales(), ledger.top_sellers(4, today=False), ledger.units_restocked("C2")) == totals
+    ledger.close()
+
+    reopened = SalesLedger(filename, clock=clock, hourly_slots=24, daily_slots=7)
+    assert len(reopened) == len(ledger)
+    units, revenue = reopened.sales()
+    assert (units, pytest.approx(revenue)) == totals[0]
+    assert reopened.top_sellers(4, today=False) == totals[1]
+    assert reopened.units_restocked("C2") == totals[2]
+    assert reopened.sales(7) == ledger.sales(7)
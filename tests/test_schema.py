@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from bulk_io import import_products
+from exceptions import InvalidProductDataError
+from inventory import Inventory
+from product import Clothing, Electronics, Grocery
+from schema import PRODUCT_TYPES, all_fields, schema_for
+from utils import product_from_dict, stream_inventory_from_file
+
+def test_encode_and_decode_round_trip(products):
+    for product in products:
+        data = product.to_dict()
+        assert schema_for(data['type']).decode(data).to_dict() == data
+
+def test_optional_fields_take_their_defaults():
+    product = Grocery.schema.decode({'product_id': "G1", 'name': "Milk", 'price': 1.5,
+                                     'quantity_in_stock': 3, 'expiry_date': "2030-01-01"})
+    assert product.reorder_point == 5
+    assert product.list_price is None
+
+def test_validate_lists_every_problem():
+    errors = Electronics.schema.validate({'product_id': "E1", 'name': 7, 'price': -1.0,
+                                          'quantity_in_stock': True, 'warranty_years': 2})
+    assert errors == ["name must be of kind str", "price cannot be less than 0",
+                      "quantity_in_stock must be of kind int", "brand is required"]
+    assert Electronics.schema.validate(Electronics("E1", "TV", 1.0, 1, "Acme", 2).to_dict()) == []
+
+def test_decode_rejects_invalid_data():
+    with pytest.raises(InvalidProductDataError, match="quantity_in_stock must be of kind int"):
+        product_from_dict({'type': "Clothing", 'product_id': "C1", 'name': "Shirt", 'price': 5.0,
+                           'quantity_in_stock': "3", 'size': "M", 'material': "Cotton"})
+    with pytest.raises(InvalidProductDataError, match="Unknown product type"):
+        product_from_dict({'type': "Spaceship"})
+
+def test_streaming_load_reports_invalid_records(tmp_path, products):
+    records = [product.to_dict() for product in products[:3]]
+    records.append(dict(records[0], product_id="bad", price="free"))
+    filename = tmp_path / "inventory.json"
+    filename.write_text(json.dumps(records))
+    inventory = Inventory()
+    report = stream_inventory_from_file(inventory, str(filename))
+    assert report.loaded == 3
+    assert len(report.errors) == 1 and "price must be of kind float" in report.errors[0][1]
+
+def test_bulk_import_reports_values_below_minimum(tmp_path):
+    filename = tmp_path / "products.csv"
+    filename.write_text("type,product_id,name,price,quantity_in_stock,size,material\n"
+                        "Clothing,C1,Shirt,5.0,3,M,Cotton\n"
+                        "Clothing,C2,Shirt,5.0,-3,M,Cotton\n")
+    inventory = Inventory()
+    report = import_products(inventory, str(filename), workers=1)
+    assert report.inserted == 1
+    [(row_number, message)] = report.errors
+    assert row_number == 2
+    assert "quantity_in_stock cannot be less than 0" in message
+
+def test_registry_lists_built_in_types_and_fields():
+    assert list(PRODUCT_TYPES) == ["Electronics", "Grocery", "Clothing"]
+    assert PRODUCT_TYPES["Clothing"].cls is Clothing
+    names = [field.name for field in all_fields()]
+    assert names[:5] == ['product_id', 'name', 'price', 'quantity_in_stock', 'reorder_point']
+    assert len(names) == len(set(names))
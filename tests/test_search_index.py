@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from inventory import Inventory
+from product import Clothing
+from search_index import NameIndex, match_key
+
+def brute_force(names, query):
+    """IDs whose name contains query, ranked like NameIndex.search."""
+    keys = {product_id: match_key(name, query) for product_id, name in names.items()}
+    return [product_id for product_id, key in sorted(
+        ((product_id, key) for product_id, key in keys.items() if key is not None),
+        key=lambda item: item[1] + (item[0],))]
+
+@pytest.fixture
+def names():
+    rng = random.Random(3)
+    words = ["milk", "Milky", "silk", "oat", "Oat Milk", "shirt", "t-shirt", "Sweatshirt", "mil"]
+    return {f"P{number:03d}": " ".join(rng.sample(words, rng.randint(1, 3))) for number in range(200)}
+
+@pytest.fixture
+def index(names):
+    index = NameIndex()
+    for product_id, name in names.items():
+        index.add(product_id, name)
+    return index
+
+@pytest.mark.parametrize('query', ["milk", "MILK", "mi", "k", "shirt", "t-sh", "oat milk", "nothing", "lk s"])
+def test_search_matches_a_full_scan(index, names, query):
+    assert index.search(query) == brute_force(names, query)
+
+def test_limit_keeps_the_best_matches(index, names):
+    assert index.search("milk", limit=5) == brute_force(names, "milk")[:5]
+
+def test_exact_then_prefix_then_word_start_then_substring():
+    index = NameIndex()
+    for product_id, name in [("sub", "Sweatshirt"), ("word", "Blue Shirt"), ("prefix", "Shirts"),
+                             ("exact", "shirt"), ("none", "Shoes")]:
+        index.add(product_id, name)
+    assert index.search("Shirt") == ["exact", "prefix", "word", "sub"]
+
+def test_removed_and_renamed_products_leave_the_index(index, names):
+    index.remove("P000")
+    index.remove("missing")
+    index.add("P001", "Brand new name")
+    del names["P000"]
+    names["P001"] = "Brand new name"
+    for query in ["milk", "shirt", "new"]:
+        assert index.search(query) == brute_force(names, query)
+    assert len(index) == len(names)
+
+def test_inventory_search_uses_the_index():
+    inventory = Inventory()
+    inventory.add_products([Clothing("C1", "Sweatshirt", 5.0, 1, "M", "Cotton"),
+                            Clothing("C2", "Shirt", 5.0, 1, "M", "Cotton")])
+    assert [product.product_id for product in inventory.search_by_name("shirt")] == ["C2", "C1"]
+    inventory.remove_product("C2")
+    assert [product.product_id for product in inventory.search_by_name("shirt")] == ["C1"]
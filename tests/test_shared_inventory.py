@@ -0,0 +1,74 @@
+import threading
+
+from shared_inventory import SharedInventory
+
+THREADS = 8
+
+def run_threads(target, count=THREADS):
+    threads = [threading.Thread(target=target, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_concurrent_sales_never_oversell(products):
+    inventory = SharedInventory()
+    inventory.add_products(products)
+    available = inventory.get_product("P000").quantity_in_stock
+    sold = []
+
+    def sell(_):
+        for _ in range(available):
+            try:
+                inventory.sell_product("P000", 1)
+            except ValueError:
+                return
+            sold.append(1)
+
+    run_threads(sell)
+    assert len(sold) == available
+    assert inventory.get_product("P000").quantity_in_stock == 0
+    assert inventory.check_aggregates()
+
+def test_concurrent_mixed_writes_keep_totals_consistent(products):
+    inventory = SharedInventory()
+    inventory.add_products(products)
+    units = inventory.total_units()
+
+    def work(number):
+        product_ids = [product.product_id for product in products]
+        for step in range(200):
+            product_id = product_ids[(number * 7 + step) % len(product_ids)]
+            inventory.restock_product(product_id, 2)
+            inventory.sell_product(product_id, 1)
+            if step % 50 == 0:
+                inventory.apply_batch([("restock", product_id, 1), ("sell", product_id, 1)])
+            inventory.search_by_name("Milk")
+            inventory.total_inventory_value()
+
+    run_threads(work)
+    assert inventory.total_units() == units + THREADS * 200
+    assert inventory.check_aggregates()
+    assert sum(product.quantity_in_stock for product in inventory.snapshot()) == inventory.total_units()
+
+def test_listing_during_adds_and_removes_is_consistent(products):
+    inventory = SharedInventory()
+    inventory.add_products(products)
+    listings = []
+
+    def work(number):
+        if number % 2:
+            for product in products[:10]:
+                inventory.remove_product(product.product_id)
+                inventory.add_product(product)
+        else:
+            for _ in range(50):
+                listings.append([product.product_id for product in inventory.list_all_products()])
+
+    run_threads(work, 4)
+    # Each listing is taken under the shared lock: no duplicates, at most one product missing
+    for product_ids in listings:
+        assert len(set(product_ids)) == len(product_ids)
+        assert len(products) - 1 <= len(product_ids) <= len(products)
+    assert len(inventory.list_all_products()) == len(products)
+    assert inventory.check_aggregates()
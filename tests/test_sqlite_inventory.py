@@ -0,0 +1,161 @@
+import json
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from inventory import Inventory
+from journal import TransactionJournal
+from pricing import ExpiryMarkdown
+from product import Clothing, Electronics, Grocery
+from query import Query
+from sqlite_inventory import SQLiteInventory, migrate_json_to_sqlite
+
+@pytest.fixture
+def inventory(tmp_path, products):
+    inventory = SQLiteInventory(str(tmp_path / "inventory.db"))
+    inventory.add_products(products)
+    yield inventory
+    inventory.close()
+
+def ids(products):
+    return [product.product_id for product in products]
+
+def test_duplicate_ids_within_a_batch_raise_value_error(inventory):
+    count = len(inventory)
+    with pytest.raises(ValueError, match="'A' already exists"):
+        inventory.add_products([Electronics("A", "TV", 300.0, 2, "Acme", 1),
+                                Electronics("A", "TV", 300.0, 2, "Acme", 1)])
+    assert len(inventory) == count
+    assert "A" not in inventory
+
+def test_duplicate_of_a_stored_product_raises_value_error(inventory):
+    with pytest.raises(ValueError, match="'P000' already exists"):
+        inventory.add_products([Electronics("B", "TV", 300.0, 2, "Acme", 1),
+                                Electronics("P000", "TV", 300.0, 2, "Acme", 1)])
+    assert "B" not in inventory
+
+def test_products_persist_across_connections(tmp_path, products):
+    filename = str(tmp_path / "inventory.db")
+    first = SQLiteInventory(filename)
+    first.add_products(products)
+    first.sell_product("P000", 2)
+    expected = first.to_dict_list()
+    first.close()
+    second = SQLiteInventory(filename)
+    assert second.to_dict_list() == expected
+    second.close()
+
+def test_sell_never_drives_stock_negative(inventory):
+    stock = inventory.get_product("P000").quantity_in_stock
+    with pytest.raises(ValueError, match="Not enough stock"):
+        inventory.sell_product("P000", stock + 1)
+    inventory.sell_product("P000", stock)
+    assert inventory.get_product("P000").quantity_in_stock == 0
+    with pytest.raises(ValueError, match="not found"):
+        inventory.sell_product("missing", 1)
+
+def test_search_ranks_exact_and_prefix_matches_first(inventory):
+    inventory.add_products([Clothing("S1", "Shirt", 5.0, 1, "M", "Linen"),
+                            Clothing("S2", "Overshirt", 5.0, 1, "M", "Linen")])
+    results = ids(inventory.search_by_name("shirt"))
+    assert results[0] == "S1"
+    assert results.index("S2") > results.index("P002")
+    assert ids(inventory.search_by_name("shirt", limit=2)) == results[:2]
+    assert ids(inventory.search_by_name("sh")) == results
+
+def test_queries_match_the_in_memory_inventory(inventory, products):
+    reference = Inventory()
+    reference.add_products(products)
+    queries = [Query(product_type=Clothing), Query(brand="acme").price(maximum=5),
+               Query().stock(minimum=12, maximum=14), Query(product_type="Grocery").price(minimum=3)]
+    for query in queries:
+        assert sorted(ids(inventory.query(query))) == sorted(ids(reference.query(query)))
+    assert sorted(ids(inventory.get_low_stock_products(11))) == \
+        sorted(ids(reference.get_low_stock_products(11)))
+
+def test_trigger_totals_follow_every_change(inventory):
+    inventory.sell_product("P000", 1)
+    inventory.restock_product("P001", 4)
+    inventory.set_prices([("P002", 99.0)])
+    inventory.remove_product("P003")
+    inventory.upsert_products([Clothing("P005", "Shirt 5", 1.0, 50, "S", "Wool")])
+    product = inventory.get_product("P004")
+    product.sell(1)
+    assert inventory.check_aggregates()
+    assert inventory.total_units() == sum(p.quantity_in_stock for p in inventory.list_all_products())
+
+def test_expiring_and_expired_groceries(inventory):
+    today = date.today()
+    inventory.add_products([Grocery("OLD", "Old bread", 1.0, 3, (today - timedelta(days=1)).isoformat()),
+                            Grocery("SOON", "Soon milk", 1.0, 3, (today + timedelta(days=2)).isoformat())])
+    assert ids(inventory.get_expiring_products(3)) == ["SOON"]
+    assert inventory.remove_expired_products() == ["OLD"]
+    assert "OLD" not in inventory
+
+def test_change_feed_and_snapshot(inventory):
+    version = inventory.version
+    snapshot = inventory.snapshot()
+    inventory.sell_product("P000", 1)
+    inventory.set_reorder_point("P001", 0)
+    inventory.remove_product("P002")
+    assert [(op, product_id) for _, op, product_id in inventory.changes_since(version)] == \
+        [("stock", "P000"), ("reorder", "P001"), ("remove", "P002")]
+    assert snapshot.version == version and "P002" in snapshot.product_ids()
+    assert "P002" not in inventory.snapshot().product_ids()
+
+def test_failed_transaction_publishes_nothing(inventory):
+    version = inventory.version
+    with pytest.raises(ValueError):
+        inventory.set_prices([("P000", 5.0), ("missing", 1.0)])
+    assert inventory.version == version
+    assert inventory.get_product("P000").price != 5.0
+
+def test_markdown_is_idempotent_and_keeps_list_price(inventory):
+    today = date.today()
+    inventory.add_product(Grocery("G1", "Milk", 4.0, 10, (today + timedelta(days=1)).isoformat()))
+    markdown = ExpiryMarkdown([(3, 25)])
+    plan = inventory.reprice([markdown], today)
+    assert ("G1", 4.0, 3.0) in plan.changes
+    assert inventory.reprice([markdown], today).changes == []
+    assert inventory.get_product("G1").list_price == 4.0
+
+def test_attached_journal_replays_into_an_inventory(tmp_path, inventory):
+    journal = TransactionJournal(str(tmp_path / "replica.journal"), str(tmp_path / "replica.json"))
+    journal.compact(inventory)
+    inventory.attach_journal(journal)
+    inventory.sell_product("P000", 1)
+    inventory.apply_batch([("restock", "P001", 2)])
+    inventory.get_product("P002").sell(1)
+    inventory.set_prices([("P003", 7.5)])
+    journal.close()
+
+    restored = Inventory()
+    replayer = TransactionJournal(str(tmp_path / "replica.journal"), str(tmp_path / "replica.json"))
+    assert replayer.replay(restored) == 4
+    assert sorted(restored.to_dict_list(), key=lambda d: d['product_id']) == \
+        sorted(inventory.to_dict_list(), key=lambda d: d['product_id'])
+
+def test_old_databases_gain_the_list_price_column(tmp_path):
+    filename = str(tmp_path / "old.db")
+    conn = sqlite3.connect(filename)
+    conn.execute("CREATE TABLE products (product_id TEXT PRIMARY KEY, type TEXT NOT NULL, "
+                 "name TEXT NOT NULL, name_lower TEXT NOT NULL, price REAL NOT NULL, "
+                 "quantity_in_stock INTEGER NOT NULL, reorder_point INTEGER NOT NULL, brand TEXT, "
+                 "warranty_years INTEGER, expiry_date TEXT, size TEXT, material TEXT)")
+    conn.commit()
+    conn.close()
+    inventory = SQLiteInventory(filename)
+    inventory.add_product(Grocery("G1", "Milk", 3.0, 1, "2030-01-01", list_price=4.0))
+    assert inventory.get_product("G1").list_price == 4.0
+    inventory.close()
+
+def test_migrate_json_reports_bad_records(tmp_path, products):
+    source = tmp_path / "inventory.json"
+    records = [product.to_dict() for product in products[:5]]
+    records.append({"product_id": "bad", "type": "Grocery"})
+    records.append(records[0])
+    source.write_text(json.dumps(records))
+    report = migrate_json_to_sqlite(str(source), str(tmp_path / "inventory.db"), batch_size=2)
+    assert report.loaded == 5
+    assert [index for index, _ in report.errors] == [5, 6]
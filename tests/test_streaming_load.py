@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from exceptions import InvalidProductDataError
+from inventory import Inventory
+from utils import iter_product_records, save_inventory_to_file, stream_inventory_from_file
+
+@pytest.fixture
+def saved(tmp_path, catalog):
+    inventory = Inventory()
+    inventory.add_products(catalog)
+    filename = str(tmp_path / "inventory.json")
+    save_inventory_to_file(inventory, filename)
+    return filename, inventory
+
+@pytest.mark.parametrize('chunk_size', [7, 64, 1 << 16])
+def test_records_match_a_full_parse_for_any_chunk_size(saved, chunk_size):
+    filename, _ = saved
+    with open(filename) as f:
+        expected = json.load(f)
+    assert list(iter_product_records(filename, chunk_size)) == expected
+
+def test_non_ascii_text_split_across_chunks(tmp_path):
+    filename = tmp_path / "inventory.json"
+    records = [{'name': "Crème brûlée " * 5}, {'name': "日本茶"}]
+    filename.write_text(json.dumps(records, ensure_ascii=False), encoding='utf-8')
+    assert list(iter_product_records(str(filename), chunk_size=3)) == records
+
+@pytest.mark.parametrize('text, message', [('{"a": 1}', "expected a list"),
+                                           ('[{"a": 1}, {"b"', "Invalid JSON format"),
+                                           ('[{"a": 1}', "Unexpected end of file")])
+def test_malformed_files_are_rejected(tmp_path, text, message):
+    filename = tmp_path / "inventory.json"
+    filename.write_text(text)
+    with pytest.raises(InvalidProductDataError, match=message):
+        list(iter_product_records(str(filename)))
+
+def test_stream_load_matches_the_saved_inventory(saved):
+    filename, original = saved
+    inventory = Inventory()
+    report = stream_inventory_from_file(inventory, filename, batch_size=7, chunk_size=100)
+    assert report.ok and report.loaded == len(original)
+    assert inventory.to_dict_list() == original.to_dict_list()
+
+def test_bad_and_duplicate_records_are_reported_not_fatal(tmp_path, products):
+    records = [product.to_dict() for product in products[:4]]
+    records[1:1] = [[1, 2], {'type': "Grocery", 'product_id': "G"}]
+    records.append(records[0])
+    filename = tmp_path / "inventory.json"
+    filename.write_text(json.dumps(records))
+    inventory = Inventory()
+    report = stream_inventory_from_file(inventory, str(filename), batch_size=2)
+    assert report.loaded == 4 and len(inventory) == 4
+    assert [index for index, _ in report.errors] == [1, 2, 6]
+    assert "already exists" in report.errors[-1][1]
+
+def test_progress_reports_records_and_bytes(saved):
+    filename, _ = saved
+    calls = []
+    stream_inventory_from_file(Inventory(), filename, batch_size=25,
+                               progress=lambda *args: calls.append(args))
+    assert [records for records, _, _ in calls] == [25, 50, 60]
+    assert calls[-1][1] == calls[-1][2]
+
+def test_missing_file_loads_nothing(tmp_path):
+    report = stream_inventory_from_file(Inventory(), str(tmp_path / "missing.json"))
+    assert report.ok and report.loaded == 0
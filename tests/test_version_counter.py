@@ -0,0 +1,48 @@
+import pytest
+
+from columnar import ColumnarInventory
+from inventory import Inventory
+from shared_inventory import SharedInventory
+from sqlite_inventory import SQLiteInventory
+
+BACKENDS = {
+    'inventory': Inventory,
+    'shared': SharedInventory,
+    'columnar': ColumnarInventory,
+    'sqlite': lambda: SQLiteInventory(':memory:'),
+}
+
+@pytest.fixture(params=sorted(BACKENDS))
+def inventory(request, products):
+    inventory = BACKENDS[request.param]()
+    inventory.add_products(products)
+    return inventory
+
+def test_every_change_bumps_the_version(inventory, products):
+    assert inventory.version == len(products)
+    steps = [
+        lambda: inventory.sell_product("P000", 1),
+        lambda: inventory.restock_product("P000", 3),
+        lambda: inventory.set_prices([("P001", 4.0)]),
+        lambda: inventory.set_reorder_point("P002", 7),
+        lambda: inventory.remove_product("P003"),
+        lambda: inventory.add_product(products[3]),
+    ]
+    for step in steps:
+        version = inventory.version
+        step()
+        assert inventory.version == version + 1
+
+def test_reads_and_rejected_changes_keep_the_version(inventory):
+    version = inventory.version
+    inventory.list_all_products()
+    inventory.search_by_name("milk")
+    inventory.get_low_stock_products()
+    inventory.total_inventory_value()
+    inventory.to_dict_list()
+    for rejected in (lambda: inventory.sell_product("P000", 1000),
+                     lambda: inventory.remove_product("missing"),
+                     lambda: inventory.set_prices([("P000", -1.0)])):
+        with pytest.raises(ValueError):
+            rejected()
+    assert inventory.version == version
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from columnar import ColumnarInventory
+from inventory import Inventory
+from product import Clothing
+from shared_inventory import SharedInventory
+from sqlite_inventory import SQLiteInventory
+from versioning import ChangeFeed, CopyOnWriteProducts
+
+BACKENDS = {
+    'inventory': Inventory,
+    'shared': SharedInventory,
+    'columnar': ColumnarInventory,
+    'sqlite': lambda: SQLiteInventory(':memory:'),
+}
+
+def shirt(product_id: str, price: float = 5.0) -> Clothing:
+    return Clothing(product_id, f"Shirt {product_id}", price, 3, "M", "Cotton")
+
+@pytest.fixture(params=sorted(BACKENDS))
+def inventory(request, products):
+    inventory = BACKENDS[request.param]()
+    inventory.add_products(products)
+    return inventory
+
+def test_change_feed_returns_the_changes_after_a_version():
+    feed = ChangeFeed(capacity=5)
+    for version in range(1, 9):
+        feed.append(version, 'stock', f"P{version}")
+    assert feed.version == 8
+    assert feed.since(8) == []
+    assert feed.since(5) == [(6, 'stock', "P6"), (7, 'stock', "P7"), (8, 'stock', "P8")]
+    assert [version for version, _, _ in feed.since(3)] == [4, 5, 6, 7, 8]
+    assert feed.since(2) is None
+    assert feed.since(9) is None
+
+def test_snapshots_keep_their_products_and_order():
+    products = CopyOnWriteProducts(chunk_size=4)
+    for number in range(10):
+        products.append(shirt(f"S{number}"))
+    first = products.snapshot(1)
+    expected = first.product_ids()
+    assert expected == [f"S{number}" for number in range(10)]
+
+    products.remove("S2")
+    products.replace(shirt("S5", price=9.0))
+    products.append(shirt("S10"))
+    second = products.snapshot(2)
+    assert first.product_ids() == expected and len(first) == 10
+    assert [product.price for product in first][5] == 5.0
+    assert second.product_ids() == [f"S{number}" for number in range(11) if number != 2]
+    assert [product.price for product in second][4] == 9.0
+
+def test_holes_are_compacted_without_touching_snapshots():
+    products = CopyOnWriteProducts(chunk_size=4)
+    rng = random.Random(22)
+    live = []
+    snapshots = []
+    for number in range(200):
+        product_id = f"S{number:03d}"
+        products.append(shirt(product_id))
+        live.append(product_id)
+        if rng.random() < 0.6:
+            removed = live.pop(rng.randrange(len(live)))
+            products.remove(removed)
+        if number % 25 == 0:
+            snapshots.append((products.snapshot(number), list(live)))
+    assert len(products) == len(live)
+    assert products.snapshot(999).product_ids() == live
+    for snapshot, expected in snapshots:
+        assert snapshot.product_ids() == expected
+
+def test_changes_since_lists_each_change(inventory, products):
+    version = inventory.version
+    inventory.sell_product("P000", 1)
+    inventory.set_reorder_point("P001", 9)
+    inventory.set_prices([("P002", 7.0)])
+    inventory.remove_product("P003")
+    inventory.add_product(shirt("NEW"))
+    inventory.upsert_products([shirt("P004")])
+    assert inventory.changes_since(version) == [
+        (version + 1, 'stock', "P000"), (version + 2, 'reorder', "P001"),
+        (version + 3, 'price', "P002"), (version + 4, 'remove', "P003"),
+        (version + 5, 'add', "NEW"), (version + 6, 'replace', "P004")]
+    assert inventory.changes_since(inventory.version) == []
+    assert inventory.changes_since(inventory.version + 1) is None
+
+def test_snapshot_is_frozen_at_its_version(inventory, products):
+    snapshot = inventory.snapshot()
+    assert inventory.snapshot() is snapshot
+    assert snapshot.version == inventory.version
+    assert snapshot.product_ids() == [product.product_id for product in products]
+
+    inventory.add_product(shirt("NEW"))
+    inventory.sell_product("P000", 1)
+    later = inventory.snapshot()
+    assert later is not snapshot and later.version == inventory.version
+    assert snapshot.product_ids() == [product.product_id for product in products]
+    assert later.product_ids()[-1] == "NEW"
+
+def test_removed_products_stay_in_older_snapshots():
+    inventory = Inventory()
+    inventory.add_products([shirt(f"S{number}") for number in range(5)])
+    snapshot = inventory.snapshot()
+    inventory.remove_product("S1")
+    assert snapshot.product_ids() == ["S0", "S1", "S2", "S3", "S4"]
+    assert inventory.snapshot().product_ids() == ["S0", "S2", "S3", "S4"]
@@ -1,11 +1,63 @@
+import codecs
+import csv
 import json
-from typing import List, Dict, Any
+import os
+import tempfile
+import textwrap
+from contextlib import contextmanager
+from typing import List, Dict, Any, IO, Iterator, Iterable, Callable, Optional, Tuple
 from datetime import datetime
 
-from product import Product, Clothing, Electronics, Grocery
+from product import Product
 from inventory import Inventory
 from exceptions import InvalidProductDataError, DuplicateProductError
+from binary_snapshot import BinarySnapshot, write_binary_snapshot
+from metrics import timed
+from schema import PRODUCT_TYPES, schema_for
 
+@contextmanager
+def atomic_write(filename: str, mode: str = 'w') -> Iterator[IO]:
+    """Open a temporary file that atomically replaces filename when closed.
+    
+    The data is written next to the target, fsynced and renamed over it, so
+    readers and crash recovery only ever see the old or the new contents,
+    never a truncated file. If the block raises, the target is left untouched.
+    
+    Args:
+        filename: Path of the file to replace
+        mode: 'w' for text or 'wb' for binary
+    
+    Yields:
+        The temporary file to write to
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename) + '.',
+                                        suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_filename)
+        except FileNotFoundError:
+            pass
+        raise
+    try:
+        # Make the rename itself durable; not supported on every platform
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+@timed('utils.save_inventory_to_file')
 def save_inventory_to_file(inventory: Inventory, filename: str) -> None:
     """Save inventory data to a JSON file.
     
@@ -17,12 +69,28 @@ def save_inventory_to_file(inventory: Inventory, filename: str) -> None:
         IOError: If there's an error writing to the file
     """
     try:
-        with open(filename, 'w') as f:
-            inventory_data = inventory.to_dict_list()
+        inventory_data = inventory.to_dict_list()
+        with atomic_write(filename, 'w') as f:
             json.dump(inventory_data, f, indent=4)
     except IOError as e:
         raise IOError(f"Failed to save inventory to {filename}: {str(e)}")
 
+def product_from_dict(product_data: Dict[str, Any]) -> Product:
+    """Build a product instance from its serialized dictionary form.
+    
+    Args:
+        product_data: A dictionary as produced by Product.to_dict()
+    
+    Returns:
+        Product: An instance of the registered type named by product_data['type']
+    
+    Raises:
+        InvalidProductDataError: If the type is unknown or the data fails schema validation
+        ValueError: If a field value is rejected by the product constructor
+    """
+    return schema_for(product_data.get('type')).decode(product_data)
+
+@timed('utils.load_inventory_from_file')
 def load_inventory_from_file(inventory: Inventory, filename: str) -> None:
     """Load inventory data from a JSON file.
     
@@ -41,29 +109,7 @@ def load_inventory_from_file(inventory: Inventory, filename: str) -> None:
             
         for product_data in inventory_data:
             try:
-                # Validate required fields
-                required_fields = ['product_id', 'name', 'price', 'quantity_in_stock', 'type']
-                if not all(field in product_data for field in required_fields):
-                    raise InvalidProductDataError(
-                        f"Missing required fields in product data: {product_data}")
-                
-                # Create the appropriate product instance based on type
-                product_type = product_data.pop('type')  # Remove type field before creating instance
-                if product_type == "Electronics":
-                    if not all(field in product_data for field in ['brand', 'warranty_years']):
-                        raise InvalidProductDataError("Missing Electronics-specific fields")
-                    product = Electronics(**product_data)
-                elif product_type == "Grocery":
-                    if 'expiry_date' not in product_data:
-                        raise InvalidProductDataError("Missing Grocery-specific fields")
-                    product = Grocery(**product_data)
-                elif product_type == "Clothing":
-                    if not all(field in product_data for field in ['size', 'material']):
-                        raise InvalidProductDataError("Missing Clothing-specific fields")
-                    product = Clothing(**product_data)
-                else:
-                    raise InvalidProductDataError(f"Unknown product type: {product_type}")
-                
+                product = product_from_dict(product_data)
                 inventory.add_product(product)
                 
             except (ValueError, TypeError) as e:
@@ -80,6 +126,312 @@ def load_inventory_from_file(inventory: Inventory, filename: str) -> None:
     except Exception as e:
         raise InvalidProductDataError(f"Unexpected error loading inventory: {str(e)}")
 
+@timed('utils.save_inventory_to_binary')
+def save_inventory_to_binary(inventory: Inventory, filename: str) -> None:
+    """Save inventory data to a binary snapshot file.
+    
+    Args:
+        inventory: The Inventory instance to save
+        filename: Path to the snapshot file
+    
+    Raises:
+        IOError: If there's an error writing to the file
+    """
+    try:
+        with atomic_write(filename, 'wb') as f:
+            write_binary_snapshot(inventory.list_all_products(), f)
+    except IOError as e:
+        raise IOError(f"Failed to save inventory to {filename}: {str(e)}")
+
+def open_binary_snapshot(filename: str) -> BinarySnapshot:
+    """Memory-map a binary snapshot for lazy, read-only access.
+    
+    Only the header is parsed up front; products are decoded as they are
+    accessed, so opening takes the same time regardless of catalog size.
+    
+    Args:
+        filename: Path to the snapshot file
+    
+    Returns:
+        BinarySnapshot: The opened snapshot; close it when done
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        InvalidProductDataError: If the file isn't a valid snapshot
+    """
+    return BinarySnapshot(filename)
+
+@timed('utils.load_inventory_from_binary')
+def load_inventory_from_binary(inventory: Inventory, filename: str) -> None:
+    """Load inventory data from a binary snapshot file.
+    
+    Args:
+        inventory: The Inventory instance to load into
+        filename: Path to the snapshot file
+    
+    Raises:
+        InvalidProductDataError: If the snapshot is invalid
+        DuplicateProductError: If a product with same ID already exists
+    """
+    try:
+        with BinarySnapshot(filename) as snapshot:
+            inventory.add_products(iter(snapshot))
+    except FileNotFoundError:
+        # It's okay if the file doesn't exist on first run
+        pass
+    except (InvalidProductDataError, DuplicateProductError):
+        raise
+    except (ValueError, TypeError) as e:
+        raise InvalidProductDataError(f"Invalid product data: {str(e)}")
+
+def convert_json_to_binary(json_filename: str, binary_filename: str) -> int:
+    """Convert a JSON inventory file to a binary snapshot, streaming the input.
+    
+    Returns:
+        int: Number of products converted
+    
+    Raises:
+        InvalidProductDataError: If a record is invalid
+    """
+    def products() -> Iterator[Product]:
+        for product_data in iter_product_records(json_filename):
+            try:
+                yield product_from_dict(product_data)
+            except (ValueError, TypeError) as e:
+                raise InvalidProductDataError(f"Invalid product data: {str(e)}")
+
+    with atomic_write(binary_filename, 'wb') as f:
+        return write_binary_snapshot(products(), f)
+
+def convert_binary_to_json(binary_filename: str, json_filename: str) -> int:
+    """Convert a binary snapshot to a JSON inventory file, one product at a time.
+    
+    The output is identical to save_inventory_to_file for the same products.
+    
+    Returns:
+        int: Number of products converted
+    """
+    with BinarySnapshot(binary_filename) as snapshot, atomic_write(json_filename, 'w') as f:
+        return write_products_json(snapshot, f)
+
+def write_products_json(products: Iterable[Product], f: IO) -> int:
+    """Write products to an open text file one record at a time.
+    
+    The output is identical to save_inventory_to_file for the same products,
+    but no list of dictionaries is built, so memory stays flat.
+    
+    Returns:
+        int: Number of products written
+    """
+    count = 0
+    for product in products:
+        f.write(',\n' if count else '[\n')
+        f.write(textwrap.indent(json.dumps(product.to_dict(), indent=4), '    '))
+        count += 1
+    f.write('\n]' if count else '[]')
+    return count
+
+class LoadReport:
+    """Outcome of a streaming inventory load.
+    
+    Attributes:
+        loaded: Number of products added to the inventory
+        errors: (record index, message) pairs for records that were rejected
+    """
+    def __init__(self):
+        self.loaded = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+def iter_product_records(filename: str, chunk_size: int = 1 << 16,
+                         on_read: Optional[Callable[[int], None]] = None) -> Iterator[Dict[str, Any]]:
+    """Incrementally parse a JSON inventory file, yielding one record at a time.
+    
+    Only the current chunk and the record being decoded are held in memory,
+    so arbitrarily large files can be read with bounded memory.
+    
+    Args:
+        filename: Path to a JSON file containing a list of product dictionaries
+        chunk_size: Number of bytes to read per chunk
+        on_read: Optional callback receiving the total bytes read so far after each chunk
+    
+    Yields:
+        dict: Each product dictionary in file order
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        InvalidProductDataError: If the file isn't a well-formed JSON list
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(filename, 'rb') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        started = False
+        bytes_read = 0
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof, bytes_read
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            bytes_read += len(chunk)
+            if on_read is not None:
+                on_read(bytes_read)
+            # Drop the consumed prefix so the buffer never grows past one record plus a chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+            pos = 0
+            return True
+
+        while True:
+            separators = ' \t\r\n,' if started else ' \t\r\n'
+            while pos < len(buffer) and buffer[pos] in separators:
+                pos += 1
+            if pos >= len(buffer):
+                if fill():
+                    continue
+                raise InvalidProductDataError(f"Unexpected end of file in {filename}")
+
+            if not started:
+                if buffer[pos] != '[':
+                    raise InvalidProductDataError(
+                        f"Invalid JSON format in {filename}: expected a list of products")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if not eof and fill():
+                    continue
+                raise InvalidProductDataError(f"Invalid JSON format in {filename}: {str(e)}")
+            pos = end
+            yield record
+
+@timed('utils.stream_inventory_from_file')
+def stream_inventory_from_file(inventory: Inventory, filename: str, batch_size: int = 1000,
+                               progress: Optional[Callable[[int, int, int], None]] = None,
+                               chunk_size: int = 1 << 16) -> LoadReport:
+    """Load a JSON inventory file incrementally, collecting per-record errors.
+    
+    Records are parsed one at a time and added to the inventory in batches,
+    so peak memory stays bounded by the batch size rather than the file size.
+    Invalid or duplicate records are reported instead of aborting the load.
+    
+    Args:
+        inventory: The Inventory instance to load into
+        filename: Path to the JSON file
+        batch_size: Number of products to build before adding them to the inventory
+        progress: Optional callback receiving (records read, bytes read, total bytes)
+            after each batch
+        chunk_size: Number of bytes to read per chunk
+    
+    Returns:
+        LoadReport: Count of loaded products and the rejected records
+    
+    Raises:
+        InvalidProductDataError: If the file isn't a well-formed JSON list
+    """
+    report = LoadReport()
+    try:
+        total_bytes = os.path.getsize(filename)
+    except FileNotFoundError:
+        # It's okay if the file doesn't exist on first run
+        return report
+
+    batch: List[Product] = []
+    batch_ids = set()
+    records_read = 0
+    bytes_read = 0
+
+    def track(total: int) -> None:
+        nonlocal bytes_read
+        bytes_read = total
+
+    def flush() -> None:
+        inventory.add_products(batch)
+        report.loaded += len(batch)
+        batch.clear()
+        batch_ids.clear()
+        if progress is not None:
+            progress(records_read, bytes_read, total_bytes)
+
+    for index, product_data in enumerate(iter_product_records(filename, chunk_size, track)):
+        records_read = index + 1
+        try:
+            if not isinstance(product_data, dict):
+                raise InvalidProductDataError(f"Product data is not an object: {product_data}")
+            product = product_from_dict(product_data)
+            if product.product_id in inventory or product.product_id in batch_ids:
+                raise DuplicateProductError(
+                    f"Product with ID '{product.product_id}' already exists.")
+        except (InvalidProductDataError, DuplicateProductError, ValueError, TypeError) as e:
+            report.errors.append((index, str(e)))
+            continue
+        batch.append(product)
+        batch_ids.add(product.product_id)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return report
+
+def parse_transactions(lines: Iterable[str], default_op: str = 'restock') -> List[Tuple[str, str, int]]:
+    """Parse CSV transaction lines for Inventory.apply_batch.
+    
+    Each line is ``product_id,quantity`` or ``product_id,quantity,op``; blank
+    lines and a leading ``product_id`` header row are skipped.
+    
+    Args:
+        lines: CSV text lines, e.g. an open file
+        default_op: Operation used for lines without an op column
+    
+    Returns:
+        List[Tuple[str, str, int]]: (op, product_id, quantity) transactions
+    
+    Raises:
+        InvalidProductDataError: If a line can't be parsed
+    """
+    transactions = []
+    for line_number, row in enumerate(csv.reader(lines), start=1):
+        if not row or not any(field.strip() for field in row):
+            continue
+        if line_number == 1 and row[0].strip().lower() == 'product_id':
+            continue
+        if len(row) not in (2, 3):
+            raise InvalidProductDataError(f"Line {line_number}: expected product_id,quantity[,op]")
+        try:
+            quantity = int(row[1])
+        except ValueError:
+            raise InvalidProductDataError(f"Line {line_number}: invalid quantity '{row[1]}'")
+        op = row[2].strip().lower() if len(row) == 3 else default_op
+        transactions.append((op, row[0].strip(), quantity))
+    return transactions
+
+def load_transactions_from_file(filename: str, default_op: str = 'restock') -> List[Tuple[str, str, int]]:
+    """Read a CSV transaction file such as a receiving-dock restock list.
+    
+    Args:
+        filename: Path to the CSV file
+        default_op: Operation used for lines without an op column
+    
+    Returns:
+        List[Tuple[str, str, int]]: (op, product_id, quantity) transactions
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        InvalidProductDataError: If a line can't be parsed
+    """
+    with open(filename, 'r', newline='') as f:
+        return parse_transactions(f, default_op)
+
 def create_product_from_input() -> Product:
     """Helper function to create a product instance from user input.
     
@@ -89,42 +441,27 @@ def create_product_from_input() -> Product:
     Raises:
         ValueError: If invalid input is provided
     """
-    product_types = {
-        '1': ('Electronics', Electronics),
-        '2': ('Grocery', Grocery),
-        '3': ('Clothing', Clothing)
-    }
+    product_types = list(PRODUCT_TYPES.values())
     
     print("\nProduct Types:")
-    for key, (name, _) in product_types.items():
-        print(f"{key}. {name}")
+    for number, schema in enumerate(product_types, 1):
+        print(f"{number}. {schema.type_name}")
     
-    type_choice = input("Enter product type (1-3): ")
-    if type_choice not in product_types:
+    type_choice = input(f"Enter product type (1-{len(product_types)}): ")
+    if not type_choice.isdigit() or not 1 <= int(type_choice) <= len(product_types):
         raise ValueError("Invalid product type selected")
+    schema = product_types[int(type_choice) - 1]
     
-    product_type_name, product_class = product_types[type_choice]
-    
-    # Get common product attributes
-    product_id = input("Enter product ID: ")
-    name = input("Enter product name: ")
-    price = float(input("Enter price: "))
-    quantity = int(input("Enter quantity: "))
-    
-    # Get type-specific attributes
-    if product_type_name == 'Electronics':
-        brand = input("Enter brand: ")
-        warranty_years = int(input("Enter warranty years: "))
-        return Electronics(product_id, name, price, quantity, brand, warranty_years)
-    elif product_type_name == 'Grocery':
-        expiry_date = input("Enter expiry date (YYYY-MM-DD): ")
-        # Validate date format
-        try:
-            datetime.strptime(expiry_date, "%Y-%m-%d")
-        except ValueError:
-            raise ValueError("Invalid date format. Use YYYY-MM-DD")
-        return Grocery(product_id, name, price, quantity, expiry_date)
-    else:  # Clothing
-        size = input("Enter size: ")
-        material = input("Enter material: ")
-        return Clothing(product_id, name, price, quantity, size, material)
+    # Optional fields such as the reorder point keep their defaults
+    product_data = {}
+    for field in schema.fields:
+        if not field.required:
+            continue
+        prompt = f"Enter {field.label.lower()}" + (" (YYYY-MM-DD)" if field.kind == 'date' else "")
+        product_data[field.name] = field.parse(input(prompt + ": "))
+        if field.kind == 'date':
+            try:
+                datetime.strptime(product_data[field.name], "%Y-%m-%d")
+            except ValueError:
+                raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    return schema.decode(product_data)
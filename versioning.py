@@ -0,0 +1,138 @@
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from product import Product
+
+# (version, op, product_id); op is 'add', 'remove', 'replace', 'stock', 'reorder' or 'price'
+Change = Tuple[int, str, str]
+
+# Products per chunk of the copy-on-write product list
+CHUNK_SIZE = 1024
+
+class ChangeFeed:
+    """Bounded log of the changes behind each inventory version.
+
+    The inventory appends exactly one change per version bump, so the feed
+    is contiguous: the changes after version v are simply the newest
+    (current - v) entries. Once more than capacity changes have happened
+    the oldest are dropped, and readers further behind than that get None
+    and have to re-read everything.
+    """
+
+    def __init__(self, capacity: int = 50000):
+        self._changes: Deque[Change] = deque(maxlen=capacity)
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def append(self, version: int, op: str, product_id: str) -> None:
+        self._changes.append((version, op, product_id))
+        self._version = version
+
+    def since(self, version: int) -> Optional[List[Change]]:
+        """Changes after version, oldest first, or None if they are no longer all retained."""
+        count = self._version - version
+        if count < 0 or count > len(self._changes):
+            return None
+        changes = list(islice(reversed(self._changes), count))
+        changes.reverse()
+        return changes
+
+class ProductSnapshot:
+    """Products of an inventory as of one version, in insertion order.
+
+    Holds references to the chunks of a CopyOnWriteProducts list, so
+    taking a snapshot costs O(number of chunks) rather than a copy of the
+    catalog. Later additions, removals and replacements copy the affected
+    chunk first, so the set and order of products here never change. The Product
+    objects themselves are shared with the inventory: their stock,
+    reorder points and prices are live, as with list_all_products(). Use
+    Inventory.changes_since(snapshot.version) to see what moved.
+    """
+
+    __slots__ = ('version', '_chunks', '_length')
+
+    def __init__(self, version: int, chunks: Tuple[List[Optional[Product]], ...], length: int):
+        self.version = version
+        self._chunks = chunks
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Product]:
+        for chunk in self._chunks:
+            for product in chunk:
+                if product is not None:
+                    yield product
+
+    def product_ids(self) -> List[str]:
+        return [product.product_id for product in self]
+
+class CopyOnWriteProducts:
+    """Insertion-ordered products in fixed-size chunks shared with snapshots.
+
+    Removal leaves a hole (None) in its chunk instead of shifting later
+    products; once holes make up half of the slots the chunks are rebuilt.
+    A chunk referenced by a snapshot is copied before its first change.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._chunks: List[List[Optional[Product]]] = []
+        self._shared: List[bool] = []
+        self._slots: Dict[str, int] = {}
+        self._used = 0
+        # Latest snapshot, reused while no product is added or removed
+        self._last: Optional[ProductSnapshot] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _writable(self, index: int) -> List[Optional[Product]]:
+        if self._shared[index]:
+            self._chunks[index] = list(self._chunks[index])
+            self._shared[index] = False
+        return self._chunks[index]
+
+    def append(self, product: Product) -> None:
+        self._last = None
+        index = self._used // self.chunk_size
+        if index == len(self._chunks):
+            self._chunks.append([])
+            self._shared.append(False)
+        self._writable(index).append(product)
+        self._slots[product.product_id] = self._used
+        self._used += 1
+
+    def remove(self, product_id: str) -> None:
+        slot = self._slots.pop(product_id)
+        self._last = None
+        self._writable(slot // self.chunk_size)[slot % self.chunk_size] = None
+        if self._used - len(self._slots) > max(self.chunk_size, self._used // 2):
+            self._rebuild()
+
+    def replace(self, product: Product) -> None:
+        """Put a product in the slot of the one with the same ID."""
+        slot = self._slots[product.product_id]
+        self._last = None
+        self._writable(slot // self.chunk_size)[slot % self.chunk_size] = product
+
+    def _rebuild(self) -> None:
+        products = [product for chunk in self._chunks for product in chunk if product is not None]
+        size = self.chunk_size
+        self._chunks = [products[start:start + size] for start in range(0, len(products), size)]
+        self._shared = [False] * len(self._chunks)
+        self._slots = {product.product_id: slot for slot, product in enumerate(products)}
+        self._used = len(products)
+
+    def snapshot(self, version: int) -> ProductSnapshot:
+        if self._last is not None:
+            # Only stock or prices changed since; the same chunks serve the new version
+            return ProductSnapshot(version, self._last._chunks, self._last._length)
+        self._shared = [True] * len(self._chunks)
+        self._last = ProductSnapshot(version, tuple(self._chunks), len(self._slots))
+        return self._last